@@ -28,6 +28,11 @@ def pdf_to_json(
         force_ocr: bool = False,
         num_ocr_threads: int = 2,
         batch_size: int = 100,
+        parse_cache: str = None,
+        ocr_timeout: int = None,
+        worker_max_docs: int = None,
+        worker_max_rss_mb: int = None,
+        mp_start_method: str = None,
 ) -> None:
     """
     Converts input pdf file to json
@@ -40,8 +45,14 @@ def pdf_to_json(
         multiprocess: Multiprocessing. Will take integer for number of cores,
         ocr_missing_doc: OCR non-OCR'ed files
         num_ocr_threads: Number of threads to use for OCR (per file)
+        parse_cache: local dir or s3://bucket/prefix of the parse cache, unchanged docs are served from it
+        ocr_timeout: Seconds after which a single reOCR job is killed, no limit by default
+        worker_max_docs: Docs after which a reused parse worker is replaced, see process_dir
+        worker_max_rss_mb: RSS in MB after which a reused parse worker is replaced, see process_dir
+        mp_start_method: multiprocessing start method of the parse processes, see process_dir
     """
     from common.document_parser.process import process_dir, single_process, resolve_dynamic_parser
+    from common.document_parser.parse_cache import ParseCache, make_parser_fingerprint
 
     parser = resolve_dynamic_parser(parser_path)
 
@@ -56,7 +67,9 @@ def pdf_to_json(
             ocr_missing_doc,
             num_ocr_threads,
             force_ocr,
-            destination)
+            destination,
+            ParseCache(parse_cache, make_parser_fingerprint(parser, force_ocr, ocr_missing_doc)) if parse_cache else None,
+            None)
 
         single_process(parser_input)
 
@@ -70,7 +83,12 @@ def pdf_to_json(
             ocr_missing_doc=ocr_missing_doc,
             force_ocr=force_ocr,
             num_ocr_threads=num_ocr_threads,
-            batch_size=batch_size
+            batch_size=batch_size,
+            parse_cache=parse_cache,
+            ocr_timeout=ocr_timeout,
+            worker_max_docs=worker_max_docs,
+            worker_max_rss_mb=worker_max_rss_mb,
+            mp_start_method=mp_start_method
         )
     if verify:
         verified = validators.verify(destination)
@@ -164,6 +182,37 @@ def pdf_to_json(
     help="Batch size. If using multiprocessing, controls the size of batches that \
         will be processed at one time.",
 )
+@click.option(
+    '--parse-cache',
+    required=False,
+    default=None,
+    type=str,
+    help="Local dir or s3://bucket/prefix of a parse cache. Documents whose bytes were parsed before \
+        are served from it instead of being parsed again.",
+)
+@click.option(
+    '--ocr-timeout',
+    required=False,
+    default=None,
+    type=int,
+    help="Seconds after which a single reOCR job is killed. Default is no limit.",
+)
+@click.option(
+    '--worker-max-docs',
+    required=False,
+    default=None,
+    type=int,
+    help="If using multiprocessing, keep workers alive for this many documents instead of starting \
+        a new process per batch.",
+)
+@click.option(
+    '--worker-max-rss-mb',
+    required=False,
+    default=None,
+    type=int,
+    help="If using multiprocessing, keep workers alive until their memory use goes over this many MB \
+        instead of starting a new process per batch.",
+)
 def pdf_to_json_cmd_wrapper(
         parser_path: str,
         source: str,
@@ -176,6 +225,10 @@ def pdf_to_json_cmd_wrapper(
         force_ocr: bool,
         num_ocr_threads: int,
         batch_size: int,
+        parse_cache: str,
+        ocr_timeout: int,
+        worker_max_docs: int,
+        worker_max_rss_mb: int,
 ) -> None:
     """Parse OCR'ed PDF files into JSON schema"""
     if platform.system() == "Linux":
@@ -191,7 +244,11 @@ def pdf_to_json_cmd_wrapper(
         ocr_missing_doc=ocr_missing_doc,
         force_ocr=force_ocr,
         num_ocr_threads=num_ocr_threads,
-        batch_size=batch_size
+        batch_size=batch_size,
+        parse_cache=parse_cache,
+        ocr_timeout=ocr_timeout,
+        worker_max_docs=worker_max_docs,
+        worker_max_rss_mb=worker_max_rss_mb
     )
 
 
@@ -1,4 +1,3 @@
-
 """
 This module contains functions for date extractions
 """
@@ -6,37 +5,102 @@ This module contains functions for date extractions
 import re
 import datetime
 
-PAT_DAY_MONTH_YEAR = r"(\d{1,2}\s*(?:january|february|march|april|may|june|july|august|september|october|november|december)\s*,*\s*\d{4})"
-PAT_DAY_MONTH_YEAR_SHORT = r"(\d{1,2}\s*(?:jan\.?|feb\.?|mar\.?|apr\.?|may\.?|jun\.?|jul\.?|aug\.?|sep\.?|sept\.?|oct\.?|nov\.?|dec\.?)\s*,*\s*\d{4})"
-PAT_MONTH_DAY_YEAR = r"((?:january|february|march|april|may|june|july|august|september|october|november|december)\s*\d{1,2}\s*,*\s*\d{4})"
-PAT_MONTH_DAY_YEAR_SHORT = r"((?:jan\.?|feb\.?|mar\.?|apr\.?|may\.?|jun\.?|jul\.?|aug\.?|sep\.?|sept\.?|oct\.?|nov\.?|dec\.?)\s*\d{1,2}\s*,*\s*\d{4})"
+from common.document_parser.ref_utils import fold_case
+
+MONTH_NAMES = [
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+]
+
+# lower case full and short month name -> month number, used instead of strptime
+MONTH_NUMBERS = {name: num for num, name in enumerate(MONTH_NAMES, 1)}
+MONTH_NUMBERS.update({name[:3]: num for num, name in enumerate(MONTH_NAMES, 1)})
+MONTH_NUMBERS["sept"] = 9
+
+_FULL_MONTHS = "january|february|march|april|may|june|july|august|september|october|november|december"
+_SHORT_MONTHS = r"jan\.?|feb\.?|mar\.?|apr\.?|may\.?|jun\.?|jul\.?|aug\.?|sep\.?|sept\.?|oct\.?|nov\.?|dec\.?"
+
+PAT_DAY_MONTH_YEAR = r"(?P<day>\d{1,2})\s*(?P<month>" + _FULL_MONTHS + r")\s*,*\s*(?P<year>\d{4})"
+PAT_DAY_MONTH_YEAR_SHORT = r"(?P<day>\d{1,2})\s*(?P<month>" + _SHORT_MONTHS + r")\s*,*\s*(?P<year>\d{4})"
+PAT_MONTH_DAY_YEAR = r"(?P<month>" + _FULL_MONTHS + r")\s*(?P<day>\d{1,2})\s*,*\s*(?P<year>\d{4})"
+PAT_MONTH_DAY_YEAR_SHORT = r"(?P<month>" + _SHORT_MONTHS + r")\s*(?P<day>\d{1,2})\s*,*\s*(?P<year>\d{4})"
+
+# Full and short month names, with shared prefixes factored out so that the
+# regex doesn't retry every name at every position of the text.
+_MONTHS = (
+    r"j(?:an(?:uary|\.)?|un(?:e|\.)?|ul(?:y|\.)?)|feb(?:ruary|\.)?|ma(?:r(?:ch|\.)?|y\.?)|apr(?:il|\.)?"
+    r"|aug(?:ust|\.)?|sep(?:t(?:ember|\.)?|\.)?|oct(?:ober|\.)?|nov(?:ember|\.)?|dec(?:ember|\.)?"
+)
+
+# All of the formats above in one pattern, so the text is only scanned once.
+# The lookahead skips positions that can't start a day or a month name.
+# Group names can't repeat in an alternation, so the day first and month first
+# alternatives have their own group names.
+PAT_DATE = (
+    r"(?=[\dadfjmnos])"
+    r"(?:(?P<day_first>\d{1,2})\s*(?P<month_after_day>" + _MONTHS + r")\s*,*\s*(?P<year_after_day>\d{4})"
+    r"|(?P<month_first>" + _MONTHS + r")\s*(?P<day_after_month>\d{1,2})\s*,*\s*(?P<year_after_month>\d{4}))"
+)
+
+RE_DAY_MONTH_YEAR = re.compile(PAT_DAY_MONTH_YEAR, re.IGNORECASE)
+RE_DAY_MONTH_YEAR_SHORT = re.compile(PAT_DAY_MONTH_YEAR_SHORT, re.IGNORECASE)
+RE_MONTH_DAY_YEAR = re.compile(PAT_MONTH_DAY_YEAR, re.IGNORECASE)
+RE_MONTH_DAY_YEAR_SHORT = re.compile(PAT_MONTH_DAY_YEAR_SHORT, re.IGNORECASE)
+RE_DATE = re.compile(PAT_DATE, re.IGNORECASE)
+
+
+def to_datetime(day: str, month: str, year: str):
+    """
+    Function to make a datetime from the parts of a matched date
+    Args:
+        day: day of the month, e.g. "05"
+        month: full or short month name in any case, e.g. "Sept."
+        year: 4 digit year
 
+    Returns: datetime, or None if the parts aren't a valid date
 
-def extract_d_B_Y(text: str):
     """
-    Function to extract date from text
+    month_num = MONTH_NUMBERS.get(fold_case(month).rstrip("."))
+    try:
+        if month_num is None:
+            raise ValueError
+        return datetime.datetime(int(year), month_num, int(day))
+    except ValueError:
+        print("Datetime had an issue extracting Date for " + " ".join([day, month, year]))
+        return None
+
+
+def extract_with(pattern, text: str):
+    """
+    Function to extract dates from text with one of the compiled patterns
+    above that have day, month and year groups
     Args:
-        text: date to be extracted
+        pattern: compiled date pattern
+        text: text to extract dates from
 
-    Returns: extracted date in form of list
+    Returns: extracted dates in form of list
 
     """
     date_list = []
-    m_comp = re.compile(PAT_DAY_MONTH_YEAR, re.IGNORECASE)
-    all_m = m_comp.findall(text)
-
-    for m_date in all_m:
-        simp_str = ' '.join(m_date.replace(",", "").replace(".", "").split())
-        try:
-            date_time_obj = datetime.datetime.strptime(simp_str, '%d %B %Y')
+    for m in pattern.finditer(text):
+        date_time_obj = to_datetime(m.group("day"), m.group("month"), m.group("year"))
+        if date_time_obj is not None:
             date_list.append(date_time_obj)
-        except ValueError:
-            print("Datetime had an issue extracting Date for " + str(simp_str))
 
     return date_list
 
 
-def extract_d_B_Y_short(text: str):
+def extract_d_B_Y(text: str):
     """
     Function to extract date from text
     Args:
@@ -45,28 +109,10 @@ def extract_d_B_Y_short(text: str):
     Returns: extracted date in form of list
 
     """
-    date_list = []
-    m_comp = re.compile(PAT_DAY_MONTH_YEAR_SHORT, re.IGNORECASE)
-    all_m = m_comp.findall(text)
-
-    for m_date in all_m:
-        simp_str = ' '.join(
-            m_date.replace(",", "")
-            .replace(".", "")
-            .lower()
-            .replace("sept", "sep")
-            .split()
-        )
-        try:
-            date_time_obj = datetime.datetime.strptime(simp_str, '%d %b %Y')
-            date_list.append(date_time_obj)
-        except ValueError:
-            print("Datetime had an issue extracting Date for " + str(simp_str))
-
-    return date_list
+    return extract_with(RE_DAY_MONTH_YEAR, text)
 
 
-def extract_B_d_Y(text: str):
+def extract_d_B_Y_short(text: str):
     """
     Function to extract date from text
     Args:
@@ -75,19 +121,19 @@ def extract_B_d_Y(text: str):
     Returns: extracted date in form of list
 
     """
-    date_list = []
-    m_comp = re.compile(PAT_MONTH_DAY_YEAR, re.IGNORECASE)
-    all_m = m_comp.findall(text)
+    return extract_with(RE_DAY_MONTH_YEAR_SHORT, text)
 
-    for m_date in all_m:
-        simp_str = ' '.join(m_date.replace(",", "").replace(".", "").split())
-        try:
-            date_time_obj = datetime.datetime.strptime(simp_str, '%B %d %Y')
-            date_list.append(date_time_obj)
-        except ValueError:
-            print("Datetime had an issue extracting Date for " + str(simp_str))
 
-    return date_list
+def extract_B_d_Y(text: str):
+    """
+    Function to extract date from text
+    Args:
+        text: date to be extracted
+
+    Returns: extracted date in form of list
+
+    """
+    return extract_with(RE_MONTH_DAY_YEAR, text)
 
 
 def extract_B_d_Y_short(text: str):
@@ -99,25 +145,7 @@ def extract_B_d_Y_short(text: str):
     Returns: extracted date in form of list
 
     """
-    date_list = []
-    m_comp = re.compile(PAT_MONTH_DAY_YEAR_SHORT, re.IGNORECASE)
-    all_m = m_comp.findall(text)
-
-    for m_date in all_m:
-        simp_str = ' '.join(
-            m_date.replace(",", "")
-            .replace(".", "")
-            .lower()
-            .replace("sept", "sep")
-            .split()
-        )
-        try:
-            date_time_obj = datetime.datetime.strptime(simp_str, '%b %d %Y')
-            date_list.append(date_time_obj)
-        except ValueError:
-            print("Datetime had an issue extracting Date for " + str(simp_str))
-
-    return date_list
+    return extract_with(RE_MONTH_DAY_YEAR_SHORT, text)
 
 
 def dates_to_list(text: str):
@@ -125,14 +153,17 @@ def dates_to_list(text: str):
     Takes as an input a string of any lenght and outputs a list of datetime objects
     that were found in the string
 
-    Formats currently supported:
+    Formats currently supported (full or short month names):
     %B %d %Y
     %d %B %Y
 
     Examples:
-    31 september 1998
+    31 august 1998
     31 August, 2000
     August 31, 1984
+    Sept. 5, 2019
+
+    Each date is only listed once, in the order it first appears in the text.
 
      Args:
         text: date to be extracted
@@ -141,14 +172,21 @@ def dates_to_list(text: str):
 
     """
 
-    date_list = []
-
-    date_list += extract_d_B_Y(text)
-    date_list += extract_B_d_Y_short(text)
-    date_list += extract_B_d_Y(text)
-    date_list += extract_B_d_Y_short(text)
-
-    return date_list
+    # dict keeps insertion order, so it dedups repeated dates in text order
+    dates = {}
+    for m in RE_DATE.finditer(text):
+        if m.group("day_first") is not None:
+            date_time_obj = to_datetime(
+                m.group("day_first"), m.group("month_after_day"), m.group("year_after_day")
+            )
+        else:
+            date_time_obj = to_datetime(
+                m.group("day_after_month"), m.group("month_first"), m.group("year_after_month")
+            )
+        if date_time_obj is not None:
+            dates[date_time_obj] = None
+
+    return list(dates)
 
 
 def add_dates_list(doc_dict):
@@ -12,6 +12,7 @@ class FieldNames:
 
     PAGES = "pages"
     PAGE_RAW_TEXT = "p_raw_text"  # Raw text of a page.
+    PAGE_OFFSETS = "page_offsets"  # (start, end) of each page within TEXT.
 
     PARAGRAPHS = "paragraphs"
     PAGE_NUM = "page_num_i"
@@ -36,6 +36,52 @@ ENTITY_RENAME_DICT = {
 }
 
 
+def normalize_text(text, clean=True):
+    """Normalize text to search it for entities.
+
+    Non-alphanumeric characters are removed since the keys of
+    ENTITIES_LOOKUP_DICT also have non-alphanumeric characters removed.
+
+    Args:
+        text (str)
+        clean (bool, optional): True to apply simple_clean() first. Defaults
+            to True.
+
+    Returns:
+        str: The normalized text.
+    """
+    if clean:
+        text = simple_clean(text)
+
+    return replace_nonalpha_chars(text, "")
+
+
+def find_entities(normalized_text):
+    """Find the entities in text normalized by normalize_text().
+
+    Args:
+        normalized_text (str)
+
+    Returns:
+        list of tuple: Non-overlapping entities as (start index, end index,
+            raw entity, entity type).
+    """
+    # The flashtext KeywordProcessor (inspired by the Aho-Corasick
+    # algorithm and Trie data structure) is MUCH faster than re.finditer()
+    # in this case.
+    ents = [
+        (
+            e[1],
+            e[2],
+            ENTITIES_LOOKUP_DICT[e[0]]["raw_ent"],
+            ENTITIES_LOOKUP_DICT[e[0]]["ent_type"],
+        )
+        for e in PROCESSOR.extract_keywords(normalized_text, span_info=True)
+    ]
+
+    return remove_overlapping_ents(ents)
+
+
 def extract_entities(doc_dict):
     """Extract entities from a document's text.
 
@@ -84,25 +130,7 @@ def extract_entities(doc_dict):
         if text is None:
             par[FieldNames.ENTITIES] = ents_by_type
             continue
-        text = simple_clean(text)
-        # Remove non-alphanumeric characters in the paragraph's text since we
-        # search for entities using the keys of ENTITIES_LOOKUP_DICT which also
-        # have non-alphanumeric characters removed.
-        text = replace_nonalpha_chars(text, "")
-
-        # The flashtext KeywordProcessor (inspired by the Aho-Corasick
-        # algorithm and Trie data structure) is MUCH faster than re.finditer()
-        # in this case.
-        ents = [
-            (
-                e[1],
-                e[2],
-                ENTITIES_LOOKUP_DICT[e[0]]["raw_ent"],
-                ENTITIES_LOOKUP_DICT[e[0]]["ent_type"],
-            )
-            for e in PROCESSOR.extract_keywords(text, span_info=True)
-        ]
-        ents = remove_overlapping_ents(ents)
+        ents = find_entities(normalize_text(text))
         for ent in ents:
             ents_by_type[ENTITY_RENAME_DICT[ent[3]]].add(ent[2])
         ents_by_type = {k: list(v) for k, v in ents_by_type.items()}
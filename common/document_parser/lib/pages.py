@@ -1,6 +1,51 @@
 from gamechangerml.src.utilities.text_utils import utf8_pass, clean_text
 from gamechangerml.src.featurization.keywords.extract_keywords import get_keywords
 
+from common.document_parser.lib.document import FieldNames
+
+
+class PageTextAccumulator:
+    """Collects page texts and joins them once, instead of re-copying the
+    full document text for every page.
+
+    Also records the (start, end) character offsets of each page within the
+    joined text so later stages can slice the document text by page rather
+    than re-joining page texts.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offsets = []
+        self._length = 0
+
+    def append(self, page_text):
+        """Add the next page's text.
+
+        Args:
+            page_text (str)
+
+        Returns:
+            tuple of int: (start, end) offsets of the page in the joined text
+        """
+        start = self._length
+        self._length += len(page_text)
+        self._chunks.append(page_text)
+        self._offsets.append((start, self._length))
+        return start, self._length
+
+    @property
+    def offsets(self):
+        """list of tuple of int: (start, end) offsets, indexed by page number"""
+        return list(self._offsets)
+
+    def text(self):
+        """Return the text of all pages joined together.
+
+        Returns:
+            str
+        """
+        return "".join(self._chunks)
+
 
 def create_page_dict(page_num, page_text, doc_dict):
     cleaned_text = clean_text(page_text)
@@ -23,11 +68,14 @@ def handle_page(page_num, page_text, doc_dict):
 
 
 def handle_pages(doc_obj, doc_dict):
-    doc_dict["text"] = ""
     doc_dict["page_count"] = 0
     doc_dict["pages"] = []
     doc_dict["keyw_5"] = []
+    accumulator = PageTextAccumulator()
     for page_num, page in enumerate(doc_obj.pages()):
         page_text = page.getText()
-        doc_dict["text"] = doc_dict["text"] + page_text
+        accumulator.append(page_text)
         handle_page(page_num, page_text, doc_dict)
+    doc_dict["text"] = accumulator.text()
+    doc_dict[FieldNames.PAGE_OFFSETS] = accumulator.offsets
+
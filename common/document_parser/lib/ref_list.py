@@ -1,11 +1,22 @@
 import re
 from collections import defaultdict
 
-from common.document_parser.ref_utils import make_dict, preprocess_text
+from common.document_parser.ref_utils import (
+    make_dict,
+    preprocess_text,
+    fold_case,
+    required_literals,
+)
 
 
 ref_regex = make_dict()
 
+# Literals that every match of a ref_regex pattern contains at least one of,
+# used to skip the patterns that can't match a document.
+ref_literals = {
+    ref_type: required_literals(pattern) for ref_type, pattern in ref_regex.items()
+}
+
 
 def look_for_general(text, ref_dict, pattern, doc_type):
     """
@@ -73,8 +84,14 @@ def collect_ref_list(text: str) -> defaultdict:
     """
     ref_dict = defaultdict(int)
     text = preprocess_text(text)
+    folded_text = fold_case(text)
 
     for ref_type, pattern in ref_regex.items():
+        literals = ref_literals[ref_type]
+        if literals is not None and not any(
+            literal in folded_text for literal in literals
+        ):
+            continue
         ref_dict = look_for_general(text, ref_dict, pattern, ref_type)
 
     return ref_dict
@@ -99,13 +99,8 @@ class ResponsibilityParser:
             an empty list
 
         """
-        text = entities.replace_nonalpha_chars(text, "")
-        ent_info_list = [
-            (e[1], e[2], entities.ENTITIES_LOOKUP_DICT[e[0]]["raw_ent"],
-             entities.ENTITIES_LOOKUP_DICT[e[0]]["ent_type"])
-            for e in entities.PROCESSOR.extract_keywords(text, span_info=True)
-        ]
-        unique_entities_list = list(set([ent_info[2] for ent_info in entities.remove_overlapping_ents(ent_info_list)]))
+        ent_info_list = entities.find_entities(entities.normalize_text(text, clean=False))
+        unique_entities_list = list(set([ent_info[2] for ent_info in ent_info_list]))
         unique_entities_list.sort()
         return unique_entities_list
 
@@ -22,6 +22,24 @@ class DoDParser(ParserDefinition):
 
     SUPPORTED_DOC_TYPES = ["dodd", "dodi", "dodm"]
 
+    SECTION_TITLES = [
+        "purpose",
+        "responsibilities",
+        "subject",
+        "references",
+        "procedures",
+        "effective date",
+        "applicability",
+        "policy",
+        "organizations",
+        "definitions",
+        "table of contents",
+        "authorities",
+        "glossary",
+        "releasability",
+        "summary of change",
+    ]
+
     def __init__(self, doc_dict: dict, test_mode: bool = False):
         super().__init__(doc_dict, test_mode)
         self._set_pagebreak_text()
@@ -144,25 +162,6 @@ class DoDParser(ParserDefinition):
             )
             self._pagebreak_text = splitext(self._filename)[0]
 
-    def _get_section_by_title(self, title_words: str) -> List[str]:
-        # Note: don't include special regex chars in title_words
-        if len(title_words) == 0:
-            raise ValueError("title_word arg cannot be an empty string.")
-
-        title_words = title_words.split(" ")
-
-        pattern = r"\b"
-        for word in title_words:
-            pattern += rf"{word[:1].upper()}(?:{word[1:].lower()}|{word[1:].upper()})\s+"
-        pattern = pattern.rstrip(r"\s+")
-        pattern += r"\b"
-
-        return [
-            "\n".join(section)
-            for section in self._sections
-            if search(pattern, section[0])
-        ]
-
     def _get_section_by_num(self, section_num: int) -> List[List[str]]:
         section_num = str(section_num)
 
@@ -263,10 +262,19 @@ class DoDParser(ParserDefinition):
                 ["ENCLOSURE 1 RESPONSIBILITIES"]
             ]
         """
-        i = 0
-        while i < self.num_of_sections - 1:
-            section_1 = self._sections[i]
-            section_2 = self._sections[i + 1]
+        if not self._sections:
+            return
+
+        # Single forward pass: `section_1` is the section being built and
+        # `self._sections[j]` is the next one, so removing or merging a
+        # section never shifts the rest of the list.
+        sections = self._sections
+        result = []
+        section_1 = sections[0]
+        j = 1
+
+        while j < len(sections):
+            section_2 = sections[j]
 
             if len(section_1) == 1 and len(section_2) > 0:
                 section_1_sub = section_1[0].strip()
@@ -274,14 +282,18 @@ class DoDParser(ParserDefinition):
                 if is_toc(section_1_sub) or not any(
                     c.isalpha() for c in section_1_sub
                 ):
-                    i += 1
+                    result.append(section_1)
+                    section_1 = section_2
+                    j += 1
                     continue
                 elif (
                     is_toc(section_2_sub)
                     or len(section_2_sub) < 4
                     or not any(c.isalpha() for c in section_1_sub)
                 ):
-                    i += 2
+                    result += [section_1, section_2]
+                    section_1 = sections[j + 1] if j + 1 < len(sections) else None
+                    j += 2
                     continue
 
                 section_1_enclosure = match_enclosure_num(section_1_sub)
@@ -290,17 +302,27 @@ class DoDParser(ParserDefinition):
                 if section_1_enclosure:
                     if section_2_enclosure:
                         if section_1_sub == section_2_sub:
-                            del self._sections[i]
+                            section_1 = section_2
+                            j += 1
                             continue
                         elif section_1_enclosure == section_2_enclosure:
-                            self.combine_sections(i, i + 1)
+                            result.append(section_1 + section_2)
+                            section_1 = sections[j + 1] if j + 1 < len(sections) else None
+                            j += 2
+                            continue
                     elif section_2_sub.isupper():
-                        self._sections[i][0] = section_1[0] + section_2[0]
-                        self._sections[i] += section_2[1:]
-                        del self._sections[i + 1]
+                        section_1 = [section_1[0] + section_2[0]] + section_2[1:]
+                        j += 1
                         continue
 
-            i += 1
+            result.append(section_1)
+            section_1 = section_2
+            j += 1
+
+        if section_1 is not None:
+            result.append(section_1)
+
+        self._sections = result
 
     def _combine_sentence_continuations(self):
         """Updates self._sections so that improperly split sentences are 
@@ -308,16 +330,18 @@ class DoDParser(ParserDefinition):
 
         See comments in is_sentence_continuation() for examples.
         """
-        i = 1
-        while i < self.num_of_sections:
-            if is_sentence_continuation(
-                self._get_subsection(i, 0, False),
-                self._get_subsection(i - 1, -1, False),
-            ):
-                self._sections[i - 1][-1] += "".join(self._sections[i])
-                del self._sections[i]
+        if not self._sections:
+            return
+
+        result = [self._sections[0]]
+        for section in self._sections[1:]:
+            prev_section = result[-1]
+            if is_sentence_continuation(section[0], prev_section[-1]):
+                prev_section[-1] += "".join(section)
             else:
-                i += 1
+                result.append(section)
+
+        self._sections = result
 
     def _combine_alpha_list_items(self):
         """Updates self._sections so that lines of alphabetical lists are 
@@ -346,24 +370,23 @@ class DoDParser(ParserDefinition):
                 ["REFERENCES:]
             ]
         """
-        i = 0
-
-        while i < self.num_of_sections:
+        def find_last(i):
             curr_subsection = self._get_subsection(i)
             curr_letter, curr_func = match_alpha_list_item(curr_subsection)
 
             if not curr_letter or not curr_func:
-                i += 1
-                continue
+                return None
 
-            j = i + 1
-            while j - i < 5 and j < self.num_of_sections:
+            # Look ahead up to 4 sections past the last one combined so far.
+            last = i
+            j = last + 1
+            while j - last < 5 and j < self.num_of_sections:
                 next_subsection = self._get_subsection(j)
                 next_letter, next_func = match_alpha_list_item(next_subsection)
                 if next_letter and next_func:
                     if next_func == curr_func:
-                        self.combine_sections(i, j)
-                        j = i + 1
+                        last = j
+                        j = last + 1
                     else:
                         break
                 elif (
@@ -375,7 +398,9 @@ class DoDParser(ParserDefinition):
                 else:
                     j += 1
 
-            i += 1
+            return last
+
+        self.combine_sections_forward(find_last)
 
     def _combine_reference_list(self):
         """Updates self._sections so that lines of the References section are
@@ -441,35 +466,44 @@ class DoDParser(ParserDefinition):
             ]
         ]
         """
-        i = 0
-        while i < self.num_of_sections:
-            curr_num = match_section_num(self._get_subsection(i))
+        # Sections are rescanned when a section number isn't followed by its
+        # next number or a known section start, so cache the (expensive)
+        # section start check per section, and the next numbers already known
+        # to not appear before the end of the document.
+        is_section_start = [None] * self.num_of_sections
+        unmatched_nums = set()
+
+        def check_section_start(j):
+            if is_section_start[j] is None:
+                subsection_j = self._remove_pagebreak(self._get_subsection(j))
+                is_section_start[j] = (
+                    not is_toc(subsection_j)
+                    and is_known_section_start(subsection_j)
+                    # Sometimes the Responsibilities section has a Policy
+                    # subsection.
+                    and match(r"P(?:olicy|OLICY)", subsection_j) is None
+                )
+            return is_section_start[j]
 
-            if curr_num:
-                j = i + 1
-                next_num = next_section_num(curr_num)
+        def find_last(i):
+            curr_num = match_section_num(self._get_subsection(i))
+            if not curr_num:
+                return None
 
-                while j < self.num_of_sections - 1:
-                    subsection_j = self._get_subsection(j)
+            next_num = next_section_num(curr_num)
+            if next_num in unmatched_nums:
+                return None
 
-                    if match_section_num(subsection_j, next_num):
-                        self.combine_sections(i, j - 1)
-                        break
+            for j in range(i + 1, self.num_of_sections - 1):
+                if match_section_num(
+                    self._get_subsection(j), next_num
+                ) or check_section_start(j):
+                    return j - 1
 
-                    subsection_j = self._remove_pagebreak(subsection_j)
-                    if (
-                        not is_toc(subsection_j)
-                        and is_known_section_start(subsection_j)
-                        # Sometimes the Responsibilities section has a Policy
-                        # subsection.
-                        and match(r"P(?:olicy|OLICY)", subsection_j) is None
-                    ):
-                        self.combine_sections(i, j - 1)
-                        break
-                    else:
-                        j += 1
+            unmatched_nums.add(next_num)
+            return None
 
-            i += 1
+        self.combine_sections_forward(find_last)
 
     def _combine_enclosures(self):
         """Updates self._sections so that each Enclosure's lines are combined.
@@ -507,36 +541,36 @@ class DoDParser(ParserDefinition):
                 ["GLOSSARY"],
             ]
         """
-        i = 0
-        while i < self.num_of_sections:
+        def find_last(i):
             curr_subsection = self._get_subsection(i)
             curr_enclosure_num = match_enclosure_num(curr_subsection)
 
-            if curr_enclosure_num:
-                next_enclosure_num = str(int(curr_enclosure_num) + 1)
+            if not curr_enclosure_num:
+                return None
 
-                j = i + 1
-                last_ind = None
-                while j < self.num_of_sections:
-                    next_subsection = self._get_subsection(j)
-                    if next_subsection == "GLOSSARY":
+            next_enclosure_num = str(int(curr_enclosure_num) + 1)
+
+            j = i + 1
+            last_ind = None
+            while j < self.num_of_sections:
+                next_subsection = self._get_subsection(j)
+                if next_subsection == "GLOSSARY":
+                    last_ind = j - 1
+                    break
+                next_enclosure = match_enclosure_num(next_subsection)
+                if next_enclosure:
+                    if next_enclosure == next_enclosure_num:
                         last_ind = j - 1
                         break
-                    next_enclosure = match_enclosure_num(next_subsection)
-                    if next_enclosure:
-                        if next_enclosure == next_enclosure_num:
-                            last_ind = j - 1
-                            break
-                        elif next_enclosure == curr_enclosure_num:
-                            last_ind = j
-                        else:
-                            break
-                    j += 1
+                    elif next_enclosure == curr_enclosure_num:
+                        last_ind = j
+                    else:
+                        break
+                j += 1
 
-                if last_ind is not None:
-                    self.combine_sections(i, last_ind)
+            return last_ind
 
-            i += 1
+        self.combine_sections_forward(find_last)
 
     def _combine_enclosures_list(self):
         """Updates self._sections so that the lines of an Enclosures list are 
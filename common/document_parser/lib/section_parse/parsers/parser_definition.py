@@ -1,11 +1,13 @@
 from itertools import chain
-from typing import List
+from re import search
+from typing import Callable, Dict, List, Optional
 from common.document_parser.cli import get_default_logger
 from os.path import basename, split
 from typing import List
 from gamechangerml.src.utilities.text_utils import utf8_pass
 from common.document_parser.cli import get_default_logger
 from common.document_parser.lib.document import FieldNames
+from .utils import make_title_pattern, compile_titles_pattern
 
 
 class ParserDefinition:
@@ -56,6 +58,12 @@ class ParserDefinition:
     # Document types supported by the parser.
     SUPPORTED_DOC_TYPES = []
 
+    # Titles of the sections looked up with _get_section_by_title(). Section
+    # heads are matched against all of them at once (see
+    # _section_title_index). To be set by child classes. Note: don't include
+    # special regex chars.
+    SECTION_TITLES = []
+
     def __init__(self, doc_dict: dict, test_mode: bool = False):
         """Base class for section parsers.
 
@@ -170,6 +178,88 @@ class ParserDefinition:
             list(chain.from_iterable(self._sections[start : end + 1]))
         ]
 
+    def combine_sections_forward(
+        self, find_last: Callable[[int], Optional[int]]
+    ) -> None:
+        """Combine sections in a single forward pass.
+
+        Same result as walking the sections with index i and calling
+        combine_sections(i, find_last(i)), but builds a new list instead of
+        shifting the remaining sections on every combine, so the pass stays
+        linear in the number of sections.
+
+        Args:
+            find_last (Callable[[int], Optional[int]]): Called with the index
+                of each section that was not combined into an earlier one.
+                Indexes refer to self._sections as it was before the pass,
+                which is left unchanged until the pass is done. Returns the
+                index of the last section to combine it with, or None.
+        """
+        sections = self._sections
+        combined = []
+        i = 0
+
+        while i < len(sections):
+            last = find_last(i)
+            if last is not None and i < last < len(sections):
+                combined.append(list(chain.from_iterable(sections[i : last + 1])))
+                i = last + 1
+            else:
+                combined.append(sections[i])
+                i += 1
+
+        self._sections = combined
+
+    @property
+    def _section_title_index(self) -> Dict[str, List[int]]:
+        """Maps each title in SECTION_TITLES to the indexes of the sections
+        whose first line contains it.
+
+        Built with one pass over the section heads the first time it's needed
+        for the current self._sections.
+        """
+        if getattr(self, "_indexed_sections", None) is not self._sections:
+            index = {title: [] for title in self.SECTION_TITLES}
+            if self.SECTION_TITLES:
+                pattern = compile_titles_pattern(tuple(self.SECTION_TITLES))
+                for i, section in enumerate(self._sections):
+                    titles = {
+                        self.SECTION_TITLES[int(m.lastgroup[1:])]
+                        for m in pattern.finditer(section[0])
+                    }
+                    for title in titles:
+                        index[title].append(i)
+
+            self._title_index = index
+            self._indexed_sections = self._sections
+
+        return self._title_index
+
+    def _get_section_by_title(self, title_words: str) -> List[str]:
+        """Get the sections whose first line contains `title_words`.
+
+        Args:
+            title_words (str): Section title. Each word matches in uppercase
+                or titlecase. Note: don't include special regex chars.
+
+        Returns:
+            List[str]: The matching sections, each joined by newlines.
+        """
+        if len(title_words) == 0:
+            raise ValueError("title_word arg cannot be an empty string.")
+
+        if title_words in self.SECTION_TITLES:
+            indexes = self._section_title_index[title_words]
+        else:
+            pattern = make_title_pattern(title_words)
+            indexes = [
+                i
+                for i, section in enumerate(self._sections)
+                if search(pattern, section[0])
+            ]
+
+        return ["\n".join(self._sections[i]) for i in indexes]
+
     def get_raw_text(self) -> str:
         field = FieldNames.TEXT
 
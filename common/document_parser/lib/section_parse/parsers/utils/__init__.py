@@ -1,6 +1,8 @@
 from .shared_utils import (
     next_letter,
     make_pattern_for_uppercase_or_titlecase,
+    make_title_pattern,
+    compile_titles_pattern,
     MONTH_LIST,
     MONTH_ABBREVIATIONS_LIST,
     CAPITAL_ENCLOSURE, 
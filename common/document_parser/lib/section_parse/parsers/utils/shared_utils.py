@@ -1,6 +1,7 @@
 from calendar import month_name
-from re import sub, search, RegexFlag, Match, VERBOSE
-from typing import List, Union
+from functools import lru_cache
+from re import sub, search, compile, RegexFlag, Match, Pattern, VERBOSE
+from typing import List, Tuple, Union
 
 
 def make_pattern_for_uppercase_or_titlecase(s: str) -> str:
@@ -14,6 +15,36 @@ def make_pattern_for_uppercase_or_titlecase(s: str) -> str:
     return rf"{s[:1].upper()}(?:{s[1:].upper()}|{s[1:].lower()})"
 
 
+def make_title_pattern(title: str) -> str:
+    """Returns a string that can be used in a regex pattern to match `title`
+    as whole words, each in uppercase or titlecase.
+
+    Example: input = "effective date",
+        output = r"\bE(?:FFECTIVE|ffective)\s+D(?:ATE|ate)\b"
+    """
+    words = [
+        make_pattern_for_uppercase_or_titlecase(word)
+        for word in title.split(" ")
+    ]
+    return r"\b" + r"\s+".join(words) + r"\b"
+
+
+@lru_cache(maxsize=None)
+def compile_titles_pattern(titles: Tuple[str, ...]) -> Pattern:
+    """Compile one pattern that matches any of `titles` (see
+    make_title_pattern()).
+
+    The title matched is given by the name of the last matched group:
+    `titles[int(m.lastgroup[1:])]`.
+    """
+    return compile(
+        "|".join(
+            rf"(?P<t{i}>{make_title_pattern(title)})"
+            for i, title in enumerate(titles)
+        )
+    )
+
+
 # [r"J(?:ANUARY|anuary)", r"F(?:EBRUARY|ebruary)", ...]
 # Used to match a month that is uppercase or titlecase.
 MONTH_LIST = [
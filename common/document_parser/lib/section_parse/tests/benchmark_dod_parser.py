@@ -0,0 +1,85 @@
+"""Benchmark DoDParser section combining against the number of lines in a
+document.
+
+The section combining passes should scale linearly, so the time per line
+should stay about flat as the number of lines grows.
+
+Usage:
+    python benchmark_dod_parser.py [--lines 1000 2000 4000 8000] [--repeat 3]
+"""
+from argparse import ArgumentParser
+from os.path import dirname
+from random import Random
+from time import perf_counter
+import sys
+sys.path.append(dirname(__file__).replace("/section_parse/tests", ""))
+from section_parse import DoDParser
+
+
+FILLER_LINES = [
+    "and the text of the paragraph continues on this line",
+    "a.  Establishes policy and assigns responsibilities. ",
+    "b.  Provides guidance for the execution and oversight. ",
+    "(1) Coordinates with the Heads of the DoD Components. ",
+    "DoDI 1234.05, May 2, 2019 ",
+    "17",
+    "in accordance with the References.",
+]
+
+
+def make_doc_text(num_lines: int, seed: int = 0) -> str:
+    """Make the text of a DoD issuance-like document with about `num_lines`
+    lines.
+
+    The last section has many numbered subsections and no following section,
+    which is the worst case for section number combining.
+    """
+    rng = Random(seed)
+    lines = [
+        "TABLE OF CONTENTS ",
+        "SECTION 1:  GENERAL ISSUANCE INFORMATION ............... 3 ",
+        "SECTION 2:  RESPONSIBILITIES ............... 4 ",
+    ]
+    section_num = 0
+    while len(lines) < num_lines:
+        section_num += 1
+        lines.append(f"SECTION {section_num}:  TITLE OF SECTION {section_num} ")
+        for subsection_num in range(1, rng.randint(5, 40)):
+            lines.append(f"{section_num}.{subsection_num}.  SUBSECTION. Text ")
+            lines.extend(
+                rng.choice(FILLER_LINES) for _ in range(rng.randint(0, 4))
+            )
+    lines += ["GLOSSARY ", "G.1.  ACRONYMS ", "REFERENCES ", "(a) DoD Directive"]
+
+    return "\n".join(lines)
+
+
+def benchmark(num_lines: int, repeat: int) -> float:
+    """Returns the best time, in seconds, to parse a document with
+    `num_lines` lines."""
+    doc = {
+        "filename": "DoDI 1234.05.pdf",
+        "doc_type": "DoDI",
+        "text": make_doc_text(num_lines),
+    }
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        DoDParser(doc)
+        times.append(perf_counter() - start)
+
+    return min(times)
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument(
+        "--lines", type=int, nargs="+", default=[1000, 2000, 4000, 8000]
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    print(f"{'lines':>8} {'seconds':>10} {'ms/line':>10}")
+    for num_lines in args.lines:
+        seconds = benchmark(num_lines, args.repeat)
+        print(f"{num_lines:>8} {seconds:>10.3f} {1000 * seconds / num_lines:>10.4f}")
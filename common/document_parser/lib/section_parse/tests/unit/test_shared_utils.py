@@ -9,6 +9,8 @@ from section_parse import (
     next_letter,
     DD_MONTHNAME_YYYY,
     remove_pagebreaks,
+    make_title_pattern,
+    compile_titles_pattern,
 )
 from section_parse.tests import TestItem
 
@@ -78,6 +80,32 @@ class SharedUtilsTest(TestCase):
         ]
         self._run(remove_pagebreaks, test_cases)
 
+    def test_make_title_pattern(self):
+        """Verifies make_title_pattern()."""
+        pattern = make_title_pattern("effective date")
+        test_cases = [
+            TestItem((pattern, "8.  EFFECTIVE DATE.  This"), "EFFECTIVE DATE"),
+            TestItem((pattern, "Effective  Date:"), "Effective  Date"),
+            TestItem((pattern, "effective date"), None),
+            TestItem((pattern, "Effective Dates"), None),
+        ]
+        self._run(self._get_match_text, test_cases)
+
+    def test_compile_titles_pattern(self):
+        """Verifies compile_titles_pattern()."""
+        titles = ("purpose", "applicability", "summary of change")
+        pattern = compile_titles_pattern(titles)
+
+        def get_titles(text):
+            return [titles[int(m.lastgroup[1:])] for m in pattern.finditer(text)]
+
+        test_cases = [
+            TestItem(("1.  PURPOSE AND APPLICABILITY.",), ["purpose", "applicability"]),
+            TestItem(("SUMMARY OF CHANGE 1",), ["summary of change"]),
+            TestItem(("Purposes",), []),
+        ]
+        self._run(get_titles, test_cases)
+
 
 if __name__ == "__main__":
     main(failfast=True)
@@ -0,0 +1,153 @@
+import concurrent.futures
+import multiprocessing
+import os
+import typing as t
+from datetime import datetime
+from pathlib import Path
+from tqdm import tqdm
+
+from common.utils.file_utils import PdfProbe, probe_pdf
+from dataPipelines.gc_ocr.utils import PDFOCR, OCRTimeoutError
+
+
+class OCRJob(t.NamedTuple):
+    """A file that needs (part of) its pages reOCR'ed"""
+    file: str
+    ocr_job_type: str
+    bad_pages: t.Optional[str]
+    probe: PdfProbe
+
+
+def inspect_for_reocr(file: t.Union[str, Path]) -> t.Optional[OCRJob]:
+    """
+    Check if a file needs reOCR
+    Args:
+        file: path to the file
+
+    Returns:
+        OCRJob if the file is a readable, unencrypted pdf with pages missing text, else None
+    """
+    probe = probe_pdf(file)
+    status = probe.ocr_status()
+    if status.get('successful_ocr'):
+        return None
+    if not probe.is_pdf or probe.is_encrypted:
+        return None
+    return OCRJob(file=str(file), ocr_job_type=status.get('ocr_job_type'), bad_pages=status.get('bad_page_nums'),
+                  probe=probe)
+
+
+def run_ocr_job(job: OCRJob, num_ocr_threads: int = 2, timeout: t.Optional[float] = None) -> bool:
+    """
+    OCR the job's bad pages in place
+    Args:
+        job: OCRJob to run
+        num_ocr_threads: number of threads ocrmypdf uses for this job
+        timeout: seconds after which the job is killed
+
+    Returns:
+        True if OCR was successful
+    """
+    print(f"[OCR] Attempt reOCR of pages {job.bad_pages} of {Path(job.file).name}")
+    ocr = PDFOCR(
+        input_file=job.file,
+        output_file=job.file,
+        ocr_job_type=job.ocr_job_type,
+        ignore_init_errors=True,
+        num_threads=num_ocr_threads,
+        probe=job.probe
+    )
+    return ocr.convert_in_subprocess(pages=job.bad_pages, output_type="pdf", timeout=timeout)
+
+
+def reocr_files(
+        files: t.List[t.Union[str, Path]],
+        num_ocr_threads: int = 2,
+        max_workers: t.Optional[int] = None,
+        timeout: t.Optional[float] = None,
+        mp_context: t.Optional[multiprocessing.context.BaseContext] = None
+) -> t.Dict[str, t.Any]:
+    """
+    ReOCR the pages missing text in the given files, in place.
+
+    All files are checked in parallel, then the resulting (file, bad_pages) jobs go into one work queue
+    that runs max_workers // num_ocr_threads jobs at a time, so the whole box is used without
+    oversubscribing it.
+    Args:
+        files: files to check and reOCR
+        num_ocr_threads: number of threads used for OCR (per doc)
+        max_workers: number of cores to use, all cores by default
+        timeout: seconds after which a single OCR job is killed, no limit by default
+        mp_context: multiprocessing context the OCR status checks run in, the default context by default
+
+    Returns:
+        stats of the run
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_ocr_jobs = max(1, max_workers // max(1, num_ocr_threads))
+
+    stats = {
+        'total_files': len(files),
+        'reocr_attempted': 0,
+        'reocr_successful': 0,
+        'reocr_failed': 0,
+        'reocr_timed_out': 0,
+        'pages_attempted': 0,
+    }
+
+    start_time = datetime.now()
+    print("Start reOCR Time =", start_time.strftime("%H:%M:%S"))
+
+    jobs: t.List[OCRJob] = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+        future_to_file = {executor.submit(inspect_for_reocr, str(f)): str(f) for f in files}
+        for fut in tqdm(concurrent.futures.as_completed(future_to_file), total=len(future_to_file),
+                        desc="Checking OCR status"):
+            try:
+                job = fut.result()
+            except Exception as e:
+                print(f"[OCR] Could not check OCR status of {future_to_file[fut]}: {e}")
+                continue
+            if job:
+                jobs.append(job)
+
+    check_time = datetime.now()
+    print(f"Checked OCR status of {len(files)} files in {check_time - start_time}, {len(jobs)} need reOCR")
+
+    # OCR jobs are ocrmypdf subprocesses, so threads are enough to keep them fed
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_ocr_jobs) as executor:
+        future_to_job = {executor.submit(run_ocr_job, job, num_ocr_threads, timeout): job for job in jobs}
+        for fut in tqdm(concurrent.futures.as_completed(future_to_job), total=len(future_to_job), desc="reOCR"):
+            job = future_to_job[fut]
+            stats['reocr_attempted'] += 1
+            stats['pages_attempted'] += len(job.bad_pages.split()) if job.bad_pages else 0
+            try:
+                is_ocr = fut.result()
+            except OCRTimeoutError as e:
+                print(e)
+                stats['reocr_timed_out'] += 1
+                continue
+            except Exception as e:
+                print(e)
+                is_ocr = False
+
+            if is_ocr:
+                stats['reocr_successful'] += 1
+            else:
+                stats['reocr_failed'] += 1
+
+    end_time = datetime.now()
+    ocr_secs = max((end_time - check_time).total_seconds(), 1e-6)
+    stats['total_time'] = str(end_time - start_time)
+    stats['docs_per_min'] = round(stats['reocr_attempted'] * 60 / ocr_secs, 2)
+    stats['pages_per_min'] = round(stats['pages_attempted'] * 60 / ocr_secs, 2)
+
+    print("End  reOCR  Time =", end_time.strftime("%H:%M:%S"))
+    print("Total OCR Time:", stats['total_time'])
+    print(f"Count of documents reOCRed / total: {stats['reocr_attempted']} / {stats['total_files']}")
+    print(f"reOCR successful: {stats['reocr_successful']}, failed: {stats['reocr_failed']}, "
+          f"timed out: {stats['reocr_timed_out']}")
+    print(f"reOCR throughput: {stats['docs_per_min']} docs/min, {stats['pages_per_min']} pages/min "
+          f"({max_ocr_jobs} concurrent jobs x {num_ocr_threads} threads)")
+
+    return stats
@@ -0,0 +1,139 @@
+import json
+import os
+import sys
+import tempfile
+import typing as t
+from hashlib import sha256
+from pathlib import Path
+
+# Bump when the cache layout or key derivation changes.
+CACHE_FORMAT_VERSION = "1"
+
+# Size of the chunks used when hashing raw document bytes.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(f_name: t.Union[str, Path]) -> str:
+    """Get the sha256 hex digest of a file's raw bytes"""
+    digest = sha256()
+    with open(f_name, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_parser_fingerprint(parse_func: t.Callable, force_ocr: bool = False, ocr_missing_doc: bool = False) -> str:
+    """
+    Fingerprint of everything besides the raw bytes that determines parser output
+    Args:
+        parse_func: parser function, its module may define PARSER_VERSION and PARSE_STAGES
+        force_ocr: whether every document is force-OCR'ed before parsing
+        ocr_missing_doc: whether documents missing text are OCR'ed before parsing
+
+    Returns: fingerprint string
+    """
+    module = sys.modules.get(parse_func.__module__)
+    parser_version = getattr(module, "PARSER_VERSION", "")
+    stages = getattr(module, "PARSE_STAGES", [])
+
+    return "|".join([
+        CACHE_FORMAT_VERSION,
+        f"{parse_func.__module__}::{parse_func.__qualname__}",
+        str(parser_version),
+        ",".join(f"{s.__module__}.{s.__qualname__}" for s in stages),
+        "force_ocr" if force_ocr else "",
+        "ocr_missing_doc" if ocr_missing_doc else "",
+    ])
+
+
+class ParseCache:
+    """
+    Content-addressed store of parser output jsons, keyed by the sha256 of the raw document bytes
+    plus a fingerprint of the parser. Location is either a local directory or an s3://bucket/prefix url.
+    """
+    S3_SCHEME = "s3://"
+
+    def __init__(self, location: t.Union[str, Path], fingerprint: str = ""):
+        self.location = str(location)
+        self.fingerprint = fingerprint
+        self._s3_utils = None
+
+    @property
+    def is_s3(self) -> bool:
+        return self.location.startswith(self.S3_SCHEME)
+
+    @property
+    def s3_utils(self):
+        # created lazily so the cache object stays picklable for worker processes
+        if self._s3_utils is None:
+            from configuration.utils import get_connection_helper_from_env
+            from common.utils.s3 import S3Utils
+
+            bucket = self.location[len(self.S3_SCHEME):].split("/", 1)[0]
+            self._s3_utils = S3Utils(get_connection_helper_from_env(), bucket=bucket)
+        return self._s3_utils
+
+    def __getstate__(self) -> t.Dict[str, t.Any]:
+        state = self.__dict__.copy()
+        state["_s3_utils"] = None
+        return state
+
+    def make_key(self, f_name: t.Union[str, Path]) -> str:
+        """Cache key for the given raw document"""
+        return sha256(
+            (file_sha256(f_name) + "|" + self.fingerprint).encode("utf-8")
+        ).hexdigest()
+
+    def _relative_path(self, key: str) -> str:
+        # shard by key prefix to keep directory listings small
+        return f"{key[:2]}/{key}.json"
+
+    def _local_path(self, key: str) -> Path:
+        return Path(self.location, self._relative_path(key))
+
+    def _object_path(self, key: str) -> str:
+        prefix = self.location[len(self.S3_SCHEME):].split("/", 1)[1:]
+        return self.s3_utils.path_join(prefix[0] if prefix else "", self._relative_path(key))
+
+    def contains(self, key: str) -> bool:
+        """Check if there is a cached parse result for key"""
+        if self.is_s3:
+            return self.s3_utils.object_exists(self._object_path(key))
+        return self._local_path(key).is_file()
+
+    def get(self, key: str) -> t.Optional[t.Dict[str, t.Any]]:
+        """Get the cached parse result for key, None if there isn't one"""
+        if self.is_s3:
+            if not self.contains(key):
+                return None
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                local_path = self.s3_utils.download_file(
+                    object_path=self._object_path(key),
+                    file=Path(tmp_dir, key + ".json")
+                )
+                with open(local_path, "r") as f:
+                    return json.load(f)
+
+        local_path = self._local_path(key)
+        if not local_path.is_file():
+            return None
+        try:
+            with open(local_path, "r") as f:
+                return json.load(f)
+        except json.decoder.JSONDecodeError:
+            return None
+
+    def put(self, key: str, json_file: t.Union[str, Path]) -> None:
+        """Store a parser output json under key"""
+        if self.is_s3:
+            self.s3_utils.upload_file(file=json_file, object_name=self._object_path(key))
+            return
+
+        local_path = self._local_path(key)
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temp file first so concurrent readers never see a partial json
+        fd, tmp_path = tempfile.mkstemp(dir=local_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f_out, open(json_file, "rb") as f_in:
+            for chunk in iter(lambda: f_in.read(HASH_CHUNK_SIZE), b""):
+                f_out.write(chunk)
+        os.replace(tmp_path, local_path)
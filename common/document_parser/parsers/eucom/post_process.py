@@ -174,7 +174,8 @@ def rename_and_format(doc_dict):
         "version_hash",
         "ingest_date",
         "orgs",
-        "f_name"
+        "f_name",
+        "page_offsets",
     ]
 
     for key in to_delete:
@@ -6,6 +6,7 @@ from common.document_parser.lib import (
     entities,
     topics,
     ref_list,
+    dates,
     abbreviations,
     summary,
     keywords,
@@ -26,6 +27,24 @@ from common.document_parser.lib.ml_features import (
 )
 from gamechangerml.src.utilities.text_utils import utf8_pass, clean_text
 
+# Bump when a change to this parser or its stages changes the output for the same document,
+# this invalidates previously cached parse results
+PARSER_VERSION = "2"
+
+PARSE_STAGES = [
+    ref_list.add_ref_list,
+    dates.process,
+    entities.extract_entities,
+    topics.extract_topics,
+    keywords.add_keyw_5,
+    abbreviations.add_abbreviations_n,
+    summary.add_summary,
+    add_pagerank_r,
+    add_popscore_r,
+    text_length.add_word_count,
+    add_sections,
+]
+
 
 def parse(
     f_name,
@@ -49,33 +68,18 @@ def parse(
             f_name = file_utils.coerce_file_to_pdf(f_name)
             doc_dict['filename'] = re.sub(r'\.[^.]+$', '.pdf', doc_dict['filename'])
             should_delete = False
-        funcs = [
-            ref_list.add_ref_list,
-            entities.extract_entities,
-            topics.extract_topics,
-            keywords.add_keyw_5,
-            abbreviations.add_abbreviations_n,
-            summary.add_summary,
-            add_pagerank_r,
-            add_popscore_r,
-            text_length.add_word_count,
-            add_sections,
-        ]
-
         doc_obj = pdf_reader.get_fitz_doc_obj(f_name)
         pages.handle_pages(doc_obj, doc_dict)
         doc_obj.close()
 
         paragraphs.add_paragraphs(doc_dict)
 
-        for func in funcs:
+        for func in PARSE_STAGES:
             try:
                 func(doc_dict)
             except Exception as e:
                 print(e)
                 print("Could not run %s on document dict" % func)
-        # TODO: ADD DATES ? ## Unsure what this note is referring to
-        # doc_dict = dates.process(doc_dict) 
         doc_dict = post_process(doc_dict)
         doc_dict = process_ingest_date(doc_dict)
 
@@ -86,29 +90,95 @@ def parse(
         if should_delete:
             os.remove(f_name)
 
+def refresh_metadata(doc_dict, f_name, meta_data=None):
+    """
+        refreshes the metadata-derived fields of a previously parsed doc_dict (e.g. one from the parse cache)
+        for the given file and metadata, leaving the text-derived fields untouched
+    """
+    meta_dict = read_meta.read_metadata(meta_data)
+    meta_doc_dict = init_doc.create_doc_dict_with_meta(meta_dict)
+    init_doc.assign_f_name_fields(f_name, meta_doc_dict)
+    if not str(f_name).endswith(".pdf"):
+        meta_doc_dict['filename'] = re.sub(r'\.[^.]+$', '.pdf', meta_doc_dict['filename'])
+    meta_doc_dict = apply_metadata(meta_doc_dict)
+
+    doc_dict.update(meta_doc_dict)
+    return process_ingest_date(doc_dict)
+
+# doc_name -> (original_ingest_date, current_ingest_date), prefetched for a whole batch by process_dir
+# through prefetch() / init_worker(). When unset, process_ingest_date queries the db per document.
+INGEST_DATES = None
+
+INGEST_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+def load_ingest_dates(doc_names):
+    """
+        loads the first and last batch_timestamp for each of the given doc_names with one grouped query
+        returns dict of doc_name -> (original_ingest_date, current_ingest_date) formatted strings
+    """
+    from datetime import datetime
+    from sqlalchemy import text
+    from dataPipelines.gc_ingest.tools.db.utils import CoreDBManager, DBType
+    db_manager = CoreDBManager("", "")
+    db_engine = db_manager.get_db_engine(db_type=DBType('orch'))
+    result = db_engine.execute(
+        text(
+            "SELECT json_metadata->>'doc_name' as doc_name, min(batch_timestamp), max(batch_timestamp) "
+            "from public.versioned_docs where json_metadata->>'doc_name' = ANY(:doc_names) "
+            "group by json_metadata->>'doc_name'"
+        ),
+        doc_names=list(set(doc_names))
+    )
+    return {
+        row['doc_name']: (
+            datetime.strftime(row['min'], INGEST_DATE_FORMAT) if row['min'] != None else None,
+            datetime.strftime(row['max'], INGEST_DATE_FORMAT) if row['max'] != None else None
+        )
+        for row in result
+    }
+
+
+def prefetch(meta_data_files):
+    """
+        called once per batch by process_dir before parsing, returns state handed to init_worker in each worker
+    """
+    doc_names = []
+    for meta_data in meta_data_files:
+        doc_name = read_meta.read_metadata(meta_data).get("doc_name")
+        if doc_name:
+            doc_names.append(doc_name)
+    return load_ingest_dates(doc_names) if doc_names else {}
+
+
+def init_worker(ingest_dates):
+    global INGEST_DATES
+    INGEST_DATES = ingest_dates
+
+
 def process_ingest_date(doc_dict):
     """
         adds two new fields (or override existing)
             - original_ingest_date = when the document was first ingested
             - current_ingest_date = when the document was last ingested
     """
-    from datetime import datetime
-    from json import dumps
-    from dataPipelines.gc_ingest.tools.db.utils import CoreDBManager, DBType
-    db_type = DBType('orch')
-    db_manager = CoreDBManager("", "")
-    db_engine = db_manager.get_db_engine(db_type=db_type)
-    result = db_engine.execute(f"SELECT min(batch_timestamp), max(batch_timestamp) from public.versioned_docs where json_metadata->>'doc_name' = '{doc_dict['doc_name']}'")
-    resultset = [dict(row) for row in result]
-    if len(resultset) > 0:
-        doc_dict['original_ingest_date'] = datetime.strftime(resultset[0]['min'], '%Y-%m-%dT%H:%M:%S') if resultset[0]['min'] != None else doc_dict["access_timestamp_dt"] 
-        doc_dict['current_ingest_date'] = datetime.strftime(resultset[0]['max'], '%Y-%m-%dT%H:%M:%S') if resultset[0]['max'] != None else doc_dict["access_timestamp_dt"]
+    if INGEST_DATES is not None:
+        ingest_dates = INGEST_DATES
+    else:
+        ingest_dates = load_ingest_dates([doc_dict['doc_name']])
+
+    original_ingest_date, current_ingest_date = ingest_dates.get(doc_dict['doc_name'], (None, None))
+    doc_dict['original_ingest_date'] = original_ingest_date if original_ingest_date != None else doc_dict["access_timestamp_dt"]
+    doc_dict['current_ingest_date'] = current_ingest_date if current_ingest_date != None else doc_dict["access_timestamp_dt"]
     return doc_dict
 
 def post_process(doc_dict):
     doc_dict["raw_text"] = utf8_pass(doc_dict["text"])
     doc_dict["text"] = clean_text(doc_dict["text"])
 
+    return apply_metadata(doc_dict)
+
+def apply_metadata(doc_dict):
     # because an old format of the metadata could exist, we need to check if the entry exists in each assignment
     if doc_dict["meta_data"]:
         doc_dict["file_ext_s"] = doc_dict["meta_data"]["file_ext"] if "file_ext" in doc_dict["meta_data"] \
@@ -173,7 +243,8 @@ def post_process(doc_dict):
         "display_source",
         "data_source",
         "source_title",
-        "is_revoked"
+        "is_revoked",
+        "page_offsets",
     ]
 
     for key in to_delete:
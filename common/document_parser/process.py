@@ -3,23 +3,22 @@ import typing
 import os
 from datetime import datetime
 from pathlib import Path
-import filetype
+from common.utils.file_utils import guess_mime
 from collections import namedtuple
 
 from . import get_default_logger
 
 from dataPipelines.gc_ocr.utils import OCRError
 from .lib.pdf_reader import PageCountParse
+from .lib import write_doc_dict_to_json
+from .parse_cache import ParseCache, make_parser_fingerprint
 
 import time
 import importlib
+import sys
 
-# Added for missed page fix
-import concurrent.futures
-from tqdm import tqdm
-from common.utils.file_utils import is_pdf, is_ocr_pdf, is_encrypted_pdf, check_ocr_status_job_type
-from ocrmypdf import SubprocessOutputError
-from dataPipelines.gc_ocr.utils import PDFOCR, OCRJobType
+from .ocr_scheduler import reocr_files
+from .worker_pool import run_recycling_pool, WorkerCrashedError
 
 
 class UnparseableDocument(Exception):
@@ -71,10 +70,72 @@ def resolve_dynamic_parser(parser_path: str) -> typing.Callable:
         raise Exception(e)
 
 
-def single_process(data_inputs: typing.Tuple[typing.Callable, str, str, bool, int, bool, str]) -> None:
+def resolve_refresh_metadata_func(parse_func: typing.Callable) -> typing.Optional[typing.Callable]:
+    """
+    Args:
+        parse_func: parser function
+
+    Returns:
+        the parser module's refresh_metadata(doc_dict, f_name, meta_data) function, if it has one.
+        Parse results can only be served from the parse cache for parsers that have one.
+    """
+    return getattr(sys.modules.get(parse_func.__module__), 'refresh_metadata', None)
+
+
+def prefetch_batch_state(parse_func: typing.Callable, meta_data_files: typing.List[str]) -> typing.Tuple[
+        typing.Optional[typing.Callable], tuple]:
+    """
+    Runs the parser module's optional prefetch(meta_data_files) hook once for the whole batch, so per-document
+    lookups (e.g. ingest dates) can be answered from memory in the workers instead of one query per document.
+    Args:
+        parse_func: parser function
+        meta_data_files: metadata file paths of the docs in the batch
+
+    Returns:
+        (initializer, initargs) for the worker processes, initializer is the parser module's init_worker(state)
+    """
+    module = sys.modules.get(parse_func.__module__)
+    prefetch = getattr(module, 'prefetch', None)
+    init_worker = getattr(module, 'init_worker', None)
+    if prefetch is None or init_worker is None:
+        return None, ()
+
+    try:
+        state = prefetch(meta_data_files)
+    except Exception as e:
+        # workers fall back to per document lookups
+        print(f"Could not prefetch batch state for {parse_func.__module__}: {e}")
+        return None, ()
+
+    return init_worker, (state,)
+
+
+def serve_from_parse_cache(parse_func: typing.Callable, parse_cache: ParseCache, cache_key: str,
+                           f_name: str, meta_data: str, out_dir: str) -> bool:
+    """
+    Writes the cached parse result for the file to out_dir, with metadata-derived fields refreshed
+    Returns:
+        True if the parse result was served from the cache
+    """
+    refresh_metadata = resolve_refresh_metadata_func(parse_func)
+    if refresh_metadata is None:
+        return False
+
+    doc_dict = parse_cache.get(cache_key)
+    if doc_dict is None:
+        return False
+
+    doc_dict = refresh_metadata(doc_dict, f_name=f_name, meta_data=meta_data)
+    write_doc_dict_to_json.write(out_dir=out_dir, ex_dict=doc_dict)
+    return True
+
+
+def single_process(data_inputs: typing.Tuple[typing.Callable, str, str, bool, int, bool, str,
+                                             typing.Optional[ParseCache], typing.Optional[str]]) -> None:
     """
     Args:
         data_inputs: named tuple of kind "parser_input", the necessary data inputs
+            parse_cache and cache_key are optional, cache_key is computed from the file if not given
     Returns:
     """
 
@@ -84,7 +145,9 @@ def single_process(data_inputs: typing.Tuple[typing.Callable, str, str, bool, in
      ocr_missing_doc,
      num_ocr_threads,
      force_ocr,
-     out_dir
+     out_dir,
+     parse_cache,
+     cache_key
      ) = data_inputs
 
     # Logging is not safe in multiprocessing thread. Especially if its going to a file
@@ -100,22 +163,33 @@ def single_process(data_inputs: typing.Tuple[typing.Callable, str, str, bool, in
         )
     )
 
-    try:
-        if not meta_data:
-            parse_func(f_name=f_name, meta_data=meta_data, ocr_missing_doc=ocr_missing_doc,
-                       num_ocr_threads=num_ocr_threads, force_ocr=force_ocr, out_dir=out_dir)
-        else:
-
-            loc_meta_path = Path(Path(meta_data) if Path(meta_data).is_dir() else Path(meta_data).parent,
-                                 Path(f_name).name + '.metadata')
+    if meta_data:
+        loc_meta_path = Path(Path(meta_data) if Path(meta_data).is_dir() else Path(meta_data).parent,
+                             Path(f_name).name + '.metadata')
+        if loc_meta_path.exists():
+            meta_data = loc_meta_path
 
-            if loc_meta_path.exists():
-                parse_func(f_name=f_name, meta_data=loc_meta_path, ocr_missing_doc=ocr_missing_doc, 
-                           num_ocr_threads=num_ocr_threads, force_ocr=force_ocr, out_dir=out_dir)
-
-            else:
-                parse_func(f_name=f_name, meta_data=meta_data, ocr_missing_doc=ocr_missing_doc,
-                           num_ocr_threads=num_ocr_threads, force_ocr=force_ocr, out_dir=out_dir)
+    try:
+        if parse_cache:
+            cache_key = cache_key or parse_cache.make_key(f_name)
+            if serve_from_parse_cache(parse_func, parse_cache, cache_key, f_name, meta_data, out_dir):
+                print(
+                    "%s - [INFO] - Served From Parse Cache: %s - Filename: %s"
+                    % (
+                        datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f'")[:-4],
+                        str(m_id),
+                        Path(f_name).name,
+                    )
+                )
+                return
+
+        parse_func(f_name=f_name, meta_data=meta_data, ocr_missing_doc=ocr_missing_doc,
+                   num_ocr_threads=num_ocr_threads, force_ocr=force_ocr, out_dir=out_dir)
+
+        if parse_cache:
+            out_json = Path(out_dir, Path(f_name).stem + '.json')
+            if out_json.exists():
+                parse_cache.put(cache_key, out_json)
 
     # TODO: catch this where failed files can be counted or increment shared counter (for mp)
     except (OCRError, UnparseableDocument, PageCountParse) as e:
@@ -149,7 +223,12 @@ def process_dir(
         ocr_missing_doc: bool = False,
         force_ocr: bool = False,
         num_ocr_threads: int = 2,
-        batch_size: int = 100
+        batch_size: int = 100,
+        parse_cache: str = None,
+        ocr_timeout: int = None,
+        worker_max_docs: int = None,
+        worker_max_rss_mb: int = None,
+        mp_start_method: str = None
 ):
     """
     Processes a directory of pdf files, returns corresponding Json files
@@ -161,13 +240,26 @@ def process_dir(
         multiprocess: Multiprocessing. Will take integer for number of cores
         ocr_missing_doc: OCR non-ocr'ed docs in place
         num_ocr_threads: Number of threads used for OCR (per doc)
+        parse_cache: local dir or s3://bucket/prefix of the parse cache, unchanged docs are served from it
+        ocr_timeout: Seconds after which a single reOCR job is killed, no limit by default
+        worker_max_docs: If set (or worker_max_rss_mb is), parse with long-lived workers that are only replaced
+            after this many docs, instead of a fresh process per batch_size docs
+        worker_max_rss_mb: If set, workers are also replaced once their RSS goes over this many MB
+        mp_start_method: multiprocessing start method of the parse and OCR check processes, the platform default by
+            default. Use "forkserver" or "spawn" when other threads of this process may be running, a forked child
+            inherits the locks those threads hold
     """
 
     p = Path(dir_path).glob("**/*")
     files = [x for x in p if x.is_file() and (x.suffix.lower() in (".pdf", ".html", ".txt")
-        or (filetype.guess(str(x)) is not None and (filetype.guess(str(x)).mime == "pdf" or filetype.guess(str(x)).mime == "application/pdf")))]
+        or guess_mime(x) in ("pdf", "application/pdf"))]
+
+    cache = ParseCache(parse_cache, make_parser_fingerprint(parse_func, force_ocr, ocr_missing_doc)) if parse_cache else None
+    # keys are computed before any reOCR rewrites the files in place, so they match the downloaded bytes
+    cache_keys = {f_name: cache.make_key(f_name) for f_name in files} if cache else {}
+
     data_inputs = [(parse_func, f_name, str(f_name)+'.metadata', ocr_missing_doc,
-                    num_ocr_threads, force_ocr, out_dir) for f_name in files]
+                    num_ocr_threads, force_ocr, out_dir, cache, cache_keys.get(f_name)) for f_name in files]
 
     doc_logger = get_default_logger()
     doc_logger.info("Parsing Multiple Documents: %i", len(data_inputs))
@@ -176,73 +268,61 @@ def process_dir(
     current_time = now.strftime("%H:%M:%S")
     print("Current Time =", current_time)
 
+    initializer, initargs = prefetch_batch_state(parse_func, [data[2] for data in data_inputs])
+
     if multiprocess != -1:
         # begin = time.time()
-        if multiprocess == 0:
-            pool = multiprocessing.Pool(
-                processes=os.cpu_count(), maxtasksperchild=1)
-        else:
-            pool = multiprocessing.Pool(
-                processes=int(multiprocess), maxtasksperchild=1)
-        doc_logger.info("Processing pool: %s", str(pool))
+        mp_context = multiprocessing.get_context(mp_start_method)
+        if mp_start_method == "forkserver":
+            # workers are forked from a server that has the parser imported already
+            mp_context.set_forkserver_preload([parse_func.__module__])
+        processes = os.cpu_count() if multiprocess == 0 else int(multiprocess)
+        recycle_workers = bool(worker_max_docs or worker_max_rss_mb)
+        if not recycle_workers:
+            pool = mp_context.Pool(
+                processes=processes, maxtasksperchild=1, initializer=initializer, initargs=initargs)
+            doc_logger.info("Processing pool: %s", str(pool))
 
         if ocr_missing_doc:
             # ReOCR PDF if need (ex: page is missing)
-            start_ocr_time = datetime.now()
-            start_ocr_time_display = start_ocr_time.strftime("%H:%M:%S")
-            print("Start reOCR Time =", start_ocr_time_display)
-
-
-            # How many elements each list should have # work around with issue on queue being over filled
-            # using list comprehension
-            process_list = [data_inputs[i * batch_size:(i + 1) * batch_size] for i in range((len(data_inputs) + batch_size - 1) // batch_size)]
-
-            total_num_files = len(data_inputs)
-            reocr_count = 0
-            for item_process in tqdm(process_list):
-                with concurrent.futures.ProcessPoolExecutor(max_workers=5) as executor:
-                    results = [executor.submit(check_ocr_status_job_type, data[1]) for data in item_process]
-                    for index, fut in enumerate(concurrent.futures.as_completed(results)):
-                        if not isinstance(fut, type(None)):
-                            if fut.result() is not None:
-                                ocrd_pdf = fut.result().get('successful_ocr')
-                                if is_pdf(str(item_process[index][1])) and not ocrd_pdf and not is_encrypted_pdf(str(item_process[index][1])):
-                                    reocr_count+=1
-                                    kwargs = {#"deskew": True if ocr_job_type == OCRJobType.FORCE_OCR else False,
-                                        #"rotate_pages": True,
-                                        #"use_threads":True,
-                                        "bad_pages": fut.result().get('bad_page_nums')}
-                                    try:
-                                        print(f"[OCR] Attempt reOCR of pages {kwargs.get('bad_pages')}")
-                                        # TODO: This is not multi threaded -- we want to multithread and batch process!!!!!
-                                        ocr = PDFOCR(
-                                            input_file=item_process[index][1],
-                                            output_file=item_process[index][1],
-                                            ocr_job_type=fut.result().get('ocr_job_type'),
-                                            ignore_init_errors=True,
-                                            num_threads=num_ocr_threads # default=2
-                                        )
-                                        try:
-                                            is_ocr = ocr.convert(**kwargs)
-                                        except SubprocessOutputError as e:
-                                            print(e)
-                                            is_ocr = False
-                                    except Exception as ex:
-                                        print(ex)
-                                        is_ocr = False
-
-            end_ocr_time = datetime.now()
-            end_ocr_time_dispaly = end_ocr_time.strftime("%H:%M:%S")
-            total_ocr_time = end_ocr_time - start_ocr_time
-            print("End  reOCR  Time =", end_ocr_time_dispaly)
-            print("Total OCR Time:", total_ocr_time)
-            print(f"Count of documents reOCRed / total: {reocr_count} / {total_num_files}")
+            reocr_files(
+                # every file is reOCR'ed, also docs served from the parse cache, since the OCR'ed raw files are
+                # what gets uploaded to the raw snapshot afterwards
+                [data[1] for data in data_inputs],
+                num_ocr_threads=num_ocr_threads,
+                max_workers=processes,
+                timeout=ocr_timeout,
+                mp_context=mp_context
+            )
         # Process files
-        pool.map(single_process, data_inputs, batch_size)
+        if recycle_workers:
+            doc_logger.info("Processing with %i reused workers, recycled after %s docs or %s MB RSS",
+                            processes, worker_max_docs or "unlimited", worker_max_rss_mb or "unlimited")
+            try:
+                stats = run_recycling_pool(
+                    single_process,
+                    data_inputs,
+                    processes=processes,
+                    initializer=initializer,
+                    initargs=initargs,
+                    max_tasks_per_worker=worker_max_docs,
+                    max_worker_rss_mb=worker_max_rss_mb,
+                    mp_context=mp_context
+                )
+            except WorkerCrashedError as e:
+                doc_logger.error("Worker pool stats: %s", e.stats)
+                for task_index in e.task_indexes:
+                    doc_logger.error("No output for %s, its worker crashed", data_inputs[task_index][1])
+                raise
+            doc_logger.info("Worker pool stats: %s", stats)
+        else:
+            pool.map(single_process, data_inputs, batch_size)
         # diff = time.time() - begin
         # print('MP total: ', diff)
         # print('MP avg', diff / (len(data_inputs) + 0.0001))
     else:
+        if initializer:
+            initializer(*initargs)
         # times = []
         for item in data_inputs:
             # start = time.time()
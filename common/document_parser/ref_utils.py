@@ -1,4 +1,26 @@
 import re
+from typing import List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+
+# Non-ASCII characters that a case-insensitive regex matches with an ASCII
+# letter, mapped to that letter. Every other character that matches an ASCII
+# letter lowercases to it with str.lower().
+CASEFOLD_FIXES = {0x130: "i", 0x131: "i", 0x17F: "s", 0x212A: "k"}
+
+# Max number of strings tracked for one part of a pattern when looking for
+# the literals that its matches must contain.
+MAX_LITERAL_SET_SIZE = 64
+
+_REPEAT_OPS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT} | (
+    {sre_parse.POSSESSIVE_REPEAT}
+    if hasattr(sre_parse, "POSSESSIVE_REPEAT")
+    else set()
+)
 
 
 def pattern(raw_string, flags=re.IGNORECASE | re.VERBOSE):
@@ -28,6 +50,143 @@ def preprocess_text(text):
     return text
 
 
+def fold_case(text):
+    """Fold text so that an ASCII literal that a case-insensitive regex finds
+    in `text` is found by `literal.lower() in fold_case(text)`.
+
+    Args:
+        text (str)
+
+    Returns:
+        str
+    """
+    return text.translate(CASEFOLD_FIXES).lower()
+
+
+def required_literals(compiled_pattern) -> Optional[List[str]]:
+    """Get literals that every match of a pattern contains at least one of.
+
+    Used to skip patterns that can't match a text without scanning the text
+    with them: if none of the literals are in fold_case(text), the pattern
+    has no match in text.
+
+    Args:
+        compiled_pattern (re.Pattern)
+
+    Returns:
+        list of str or None: Lowercase ASCII literals, or None if none could
+            be found.
+    """
+    try:
+        parsed = sre_parse.parse(compiled_pattern.pattern, compiled_pattern.flags)
+    except Exception:
+        return None
+
+    _, required = _analyze_sequence(parsed)
+    if not required:
+        return None
+
+    literals = {literal.lower() for literal in required}
+    # A literal that contains another one is redundant.
+    return sorted(
+        literal
+        for literal in literals
+        if not any(other != literal and other in literal for other in literals)
+    )
+
+
+def _more_selective(current: Optional[Set[str]], candidate: Optional[Set[str]]):
+    """Pick the required literal set with the longest shortest literal."""
+    if (
+        not candidate
+        or "" in candidate
+        or not all(literal.isascii() for literal in candidate)
+    ):
+        return current
+    if not current:
+        return candidate
+    if min(map(len, candidate)) > min(map(len, current)):
+        return candidate
+    return current
+
+
+def _analyze_sequence(parsed) -> Tuple[Optional[Set[str]], Optional[Set[str]]]:
+    """Returns (exact, required) for a parsed pattern: the finite set of
+    strings it matches (None if unknown) and a set of strings that each of
+    its matches contains at least one of (None if unknown)."""
+    all_exact = True
+    exact = {""}
+    required = None
+
+    for op, av in parsed:
+        item_exact, item_required = _analyze_node(op, av)
+        required = _more_selective(required, item_required)
+
+        if item_exact is None:
+            all_exact = False
+            required = _more_selective(required, exact)
+            exact = {""}
+        elif len(exact) * len(item_exact) > MAX_LITERAL_SET_SIZE:
+            all_exact = False
+            required = _more_selective(required, exact)
+            exact = item_exact
+        else:
+            exact = {a + b for a in exact for b in item_exact}
+
+    required = _more_selective(required, exact)
+    return (exact if all_exact else None), required
+
+
+def _analyze_node(op, av) -> Tuple[Optional[Set[str]], Optional[Set[str]]]:
+    """Returns (exact, required) for one node of a parsed pattern, see
+    _analyze_sequence()."""
+    if op is sre_parse.LITERAL:
+        return {chr(av)}, None
+
+    if op is sre_parse.AT:
+        # Zero-width, e.g. \b
+        return {""}, None
+
+    if op is sre_parse.IN:
+        chars = set()
+        for in_op, in_av in av:
+            if in_op is sre_parse.LITERAL:
+                chars.add(chr(in_av))
+            elif in_op is sre_parse.RANGE and in_av[1] - in_av[0] < 10:
+                chars.update(map(chr, range(in_av[0], in_av[1] + 1)))
+            else:
+                return None, None
+        return chars, None
+
+    if op is sre_parse.SUBPATTERN:
+        return _analyze_sequence(av[-1])
+
+    if op is sre_parse.BRANCH:
+        results = [_analyze_sequence(branch) for branch in av[1]]
+        exact = None
+        if all(branch_exact is not None for branch_exact, _ in results):
+            exact = set().union(*(branch_exact for branch_exact, _ in results))
+            if len(exact) > MAX_LITERAL_SET_SIZE:
+                exact = None
+        required = [branch_required for _, branch_required in results]
+        if all(required):
+            return exact, set().union(*required)
+        return exact, None
+
+    if op in _REPEAT_OPS:
+        min_count, max_count, body = av
+        body_exact, body_required = _analyze_sequence(body)
+        if max_count == 1 and body_exact is not None:
+            if min_count == 0:
+                return body_exact | {""}, None
+            return body_exact, None
+        if min_count >= 1:
+            return None, body_required
+        return None, None
+
+    return None, None
+
+
 def make_dict():
     # Each pattern should have only 1 capturing group that is the numerical
     # part of the reference.
@@ -0,0 +1,59 @@
+"""Test date extraction from lib/dates.py
+
+When used as a script, all functions starting with "test_" will run.
+If there are no errors, the tests passed.
+"""
+
+import inspect
+import sys
+from datetime import datetime
+from common.document_parser.lib.dates import (
+    dates_to_list,
+    extract_d_B_Y,
+    extract_d_B_Y_short,
+    extract_B_d_Y,
+    extract_B_d_Y_short,
+)
+
+
+def run_all_tests(mod):
+    """Run all functions in this file that start with "test_".
+
+    Args:
+        mod (module): Use sys.modules[__name__]
+    """
+    all_functions = inspect.getmembers(mod, inspect.isfunction)
+    for name, value in all_functions:
+        if name.startswith("test_") and str(inspect.signature(value) == "()"):
+            value()
+
+
+def test_formats():
+    text = "31 August, 2000 and August 31, 1984 and 5 Sept. 2019 and Dec 1 1999"
+    assert dates_to_list(text) == [
+        datetime(2000, 8, 31),
+        datetime(1984, 8, 31),
+        datetime(2019, 9, 5),
+        datetime(1999, 12, 1),
+    ]
+
+
+def test_single_formats():
+    assert extract_d_B_Y("signed 4 July 1976") == [datetime(1976, 7, 4)]
+    assert extract_d_B_Y_short("signed 4 Jul. 1976") == [datetime(1976, 7, 4)]
+    assert extract_B_d_Y("signed July 4, 1976") == [datetime(1976, 7, 4)]
+    assert extract_B_d_Y_short("signed JUL 4, 1976") == [datetime(1976, 7, 4)]
+
+
+def test_dedup():
+    # "May 5 2020" matches both the full and short month name formats
+    text = "May 5 2020. Effective May 5, 2020; expires 6 may 2021"
+    assert dates_to_list(text) == [datetime(2020, 5, 5), datetime(2021, 5, 6)]
+
+
+def test_invalid_dates():
+    assert dates_to_list("31 september 1998, June. 5 2020, 0 May 2020") == []
+
+
+if __name__ == "__main__":
+    run_all_tests(sys.modules[__name__])
@@ -10,8 +10,16 @@ from typing import Union, List
 from collections import Counter, defaultdict
 import inspect
 import sys
-from common.document_parser.ref_utils import make_dict, preprocess_text
-from common.document_parser.lib.ref_list import look_for_general
+from common.document_parser.ref_utils import (
+    make_dict,
+    preprocess_text,
+    fold_case,
+)
+from common.document_parser.lib.ref_list import (
+    look_for_general,
+    collect_ref_list,
+    ref_literals,
+)
 from common import PACKAGE_DOCUMENT_PARSER_PATH
 
 
@@ -94,6 +102,13 @@ def check(check_str, ref_type, exp_result: Union[int, str, List[str]]):
     )
     num_results = sum(ref_dict.values())
 
+    # collect_ref_list() must not skip a pattern that has matches
+    literals = ref_literals[ref_type]
+    if num_results and literals is not None:
+        assert any(
+            literal in fold_case(check_str) for literal in literals
+        ), f"ERR: for ref type `{ref_type}`: none of {literals} in `{check_str}`"
+
     if type(exp_result) == int:
         assert exp_result == num_results
     elif type(exp_result) == str:
@@ -1205,5 +1220,34 @@ def test_respersman():
     check_bookends(needs_bookend, "RESPERSMAN", exp_result)
 
 
+def test_collect_ref_list_matches_all_patterns():
+    """Skipping patterns by their required literals doesn't change results."""
+    input_dir = os.path.join(
+        PACKAGE_DOCUMENT_PARSER_PATH,
+        "lib/responsibility_parse/tests/data/input",
+    )
+    for filename in sorted(os.listdir(input_dir)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(input_dir, filename)) as f:
+            try:
+                text = json.load(f)["text"]
+            except json.decoder.JSONDecodeError:
+                continue
+
+        expected = defaultdict(int)
+        for ref_type, pattern in ref_regex.items():
+            look_for_general(preprocess_text(text), expected, pattern, ref_type)
+
+        assert list(collect_ref_list(text).items()) == list(expected.items())
+
+
+def test_fold_case():
+    text = "DoD \u0130nstruction \u212a \u017fECNAV"
+    assert "dod instruction" in fold_case(text)
+    assert "k" in fold_case(text)
+    assert "secnav" in fold_case(text)
+
+
 if __name__ == "__main__":
     run_all_tests(sys.modules[__name__])
@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+import typing as t
+from multiprocessing.connection import Connection, wait
+
+
+class WorkerCrashedError(RuntimeError):
+    """Workers died (segfault, OOM kill, failing initializer) while running tasks, so those tasks never completed"""
+
+    def __init__(self, task_indexes: t.List[int], stats: t.Dict[str, t.Any]):
+        super().__init__(f"{len(task_indexes)} task(s) lost to crashed workers, task indexes: {task_indexes}")
+        self.task_indexes = task_indexes
+        self.stats = stats
+
+
+def current_rss_mb() -> t.Optional[float]:
+    """
+    Resident set size of the current process
+    Returns:
+        RSS in MB, None where /proc isn't available
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _worker_loop(conn: Connection,
+                 func: t.Callable[[t.Any], t.Any],
+                 initializer: t.Optional[t.Callable],
+                 initargs: tuple,
+                 max_tasks: t.Optional[int],
+                 max_rss_mb: t.Optional[float]) -> None:
+    """Run tasks sent over conn until told to stop, or until the task/memory limit says this worker is spent"""
+    if initializer:
+        initializer(*initargs)
+
+    completed = 0
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        error = None
+        try:
+            func(task)
+        except Exception as e:
+            error = e
+        completed += 1
+
+        recycle = bool(max_tasks and completed >= max_tasks)
+        if not recycle and max_rss_mb:
+            rss = current_rss_mb()
+            if rss is not None and rss > max_rss_mb:
+                print(f"[WORKER] {os.getpid()} at {rss:.0f} MB RSS after {completed} tasks, recycling")
+                recycle = True
+
+        try:
+            conn.send((recycle, error))
+        except Exception:
+            # unpicklable exception, still report the failure
+            conn.send((recycle, RuntimeError(repr(error))))
+        if recycle:
+            break
+    conn.close()
+
+
+def run_recycling_pool(func: t.Callable[[t.Any], t.Any],
+                       tasks: t.List[t.Any],
+                       processes: int,
+                       initializer: t.Optional[t.Callable] = None,
+                       initargs: tuple = (),
+                       max_tasks_per_worker: t.Optional[int] = None,
+                       max_worker_rss_mb: t.Optional[float] = None,
+                       mp_context: t.Optional[multiprocessing.context.BaseContext] = None) -> t.Dict[str, int]:
+    """
+    Run func on every task with long-lived worker processes, like multiprocessing.Pool.map but a worker is only
+    replaced after max_tasks_per_worker tasks or once its RSS goes over max_worker_rss_mb - so per task cost is a
+    pipe round trip instead of a process start, while leaks and fragmentation still get cleaned up.
+
+    Tasks are handed out one at a time, so a worker that dies mid-task (segfault, OOM kill) only loses that task
+    and gets replaced, instead of hanging the whole map. Lost tasks are reported once all tasks ran.
+    Args:
+        func: picklable function called on each task
+        tasks: task arguments
+        processes: number of worker processes
+        initializer: called with initargs once in every worker, e.g. to load heavy resources
+        initargs: initializer arguments
+        max_tasks_per_worker: tasks after which a worker is replaced, no limit by default
+        max_worker_rss_mb: RSS in MB after which a worker is replaced, no limit by default
+        mp_context: multiprocessing context the workers are started from, the default context by default
+
+    Returns:
+        stats of the run, crashed_tasks being the indexes of tasks lost to crashed workers
+
+    Raises:
+        WorkerCrashedError if any task was lost to a crashed worker, chained to the first exception raised by func
+            if there was one
+        otherwise the first exception raised by func, after all tasks ran (same as Pool.map)
+    """
+    ctx = mp_context or multiprocessing.get_context()
+    stats: t.Dict[str, t.Any] = {"tasks": len(tasks), "completed": 0, "crashed": 0, "workers_started": 0,
+                                 "crashed_tasks": []}
+    errors: t.List[Exception] = []
+
+    next_task = 0
+    # conn -> (process, index of the task it's running)
+    workers: t.Dict[Connection, t.Tuple[multiprocessing.Process, t.Optional[int]]] = {}
+
+    def dispatch(conn: Connection) -> None:
+        nonlocal next_task
+        process, _ = workers[conn]
+        if next_task >= len(tasks):
+            conn.send(None)
+            retire(conn)
+            return
+        conn.send(tasks[next_task])
+        workers[conn] = (process, next_task)
+        next_task += 1
+
+    def retire(conn: Connection) -> None:
+        process, _ = workers.pop(conn)
+        conn.close()
+        process.join()
+
+    def start_worker() -> None:
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(
+            target=_worker_loop,
+            args=(child_conn, func, initializer, initargs, max_tasks_per_worker, max_worker_rss_mb),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        stats["workers_started"] += 1
+        workers[parent_conn] = (process, None)
+        dispatch(parent_conn)
+
+    for _ in range(min(max(1, processes), len(tasks))):
+        start_worker()
+
+    while workers:
+        sentinels = {process.sentinel: conn for conn, (process, _) in workers.items()}
+        for ready in wait(list(workers.keys()) + list(sentinels.keys())):
+            conn = sentinels.get(ready, ready)
+            if conn not in workers:
+                continue
+
+            process, task_index = workers[conn]
+            try:
+                if ready is not conn and not conn.poll():
+                    raise EOFError
+                recycle, error = conn.recv()
+            except (EOFError, OSError):
+                # worker died without reporting back
+                stats["crashed"] += 1
+                if task_index is not None:
+                    stats["crashed_tasks"].append(task_index)
+                print(f"[WORKER] {process.pid} died (exit code {process.exitcode}) while running task {task_index}")
+                retire(conn)
+                if next_task < len(tasks):
+                    start_worker()
+                continue
+
+            stats["completed"] += 1
+            if error is not None:
+                errors.append(error)
+
+            if recycle:
+                retire(conn)
+                if next_task < len(tasks):
+                    start_worker()
+            else:
+                dispatch(conn)
+
+    if stats["crashed_tasks"]:
+        raise WorkerCrashedError(sorted(stats["crashed_tasks"]), stats) from (errors[0] if errors else None)
+    if errors:
+        raise errors[0]
+    return stats
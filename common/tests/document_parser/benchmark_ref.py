@@ -0,0 +1,82 @@
+"""Benchmark reference extraction on the test fixture documents.
+
+Compares collect_ref_list(), which skips the patterns whose required literals
+aren't in the text, with running every pattern in ref_regex.
+
+Usage:
+    python -m common.tests.document_parser.benchmark_ref [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+from collections import defaultdict
+from time import perf_counter
+
+from common import PACKAGE_DOCUMENT_PARSER_PATH
+from common.document_parser.ref_utils import preprocess_text
+from common.document_parser.lib.ref_list import (
+    collect_ref_list,
+    look_for_general,
+    ref_regex,
+)
+
+
+FIXTURES_DIR = os.path.join(
+    PACKAGE_DOCUMENT_PARSER_PATH, "lib/responsibility_parse/tests/data/input"
+)
+
+
+def collect_ref_list_all_patterns(text):
+    """Reference extraction that runs every pattern over the text."""
+    ref_dict = defaultdict(int)
+    text = preprocess_text(text)
+    for ref_type, pattern in ref_regex.items():
+        ref_dict = look_for_general(text, ref_dict, pattern, ref_type)
+    return ref_dict
+
+
+def load_fixture_texts():
+    texts = {}
+    for filename in sorted(os.listdir(FIXTURES_DIR)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(FIXTURES_DIR, filename)) as f:
+            try:
+                texts[filename] = json.load(f)["text"]
+            except json.decoder.JSONDecodeError:
+                continue
+    return texts
+
+
+def best_time(func, text, repeat):
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func(text)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'document':<36} {'chars':>8} {'all (s)':>9} {'skip (s)':>9} {'speedup':>8}")
+    total_all = total_skip = 0
+    for filename, text in load_fixture_texts().items():
+        assert list(collect_ref_list(text).items()) == list(
+            collect_ref_list_all_patterns(text).items()
+        ), f"Different references for {filename}"
+
+        all_time = best_time(collect_ref_list_all_patterns, text, args.repeat)
+        skip_time = best_time(collect_ref_list, text, args.repeat)
+        total_all += all_time
+        total_skip += skip_time
+        print(
+            f"{filename:<36} {len(text):>8} {all_time:>9.4f} {skip_time:>9.4f} "
+            f"{all_time / skip_time:>7.1f}x"
+        )
+
+    print(f"{'total':<36} {'':>8} {total_all:>9.4f} {total_skip:>9.4f} {total_all / total_skip:>7.1f}x")
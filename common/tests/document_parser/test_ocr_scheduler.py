@@ -0,0 +1,138 @@
+import threading
+import time
+from pathlib import Path
+
+import fitz
+import pytest
+
+ocr_scheduler = pytest.importorskip("common.document_parser.ocr_scheduler")
+from common.document_parser.ocr_scheduler import inspect_for_reocr, reocr_files
+from dataPipelines.gc_ocr.utils import OCRTimeoutError
+from dev_tools import REPO_PATH
+
+OCR_PDF_DIR = Path(REPO_PATH, "common/tests/data/ocr_pdf")
+OCR_PDF = Path(OCR_PDF_DIR, "CJCSI 3520.01C, 9 1 2010 OCR.pdf")
+FAKE_PDF = Path(OCR_PDF_DIR, "acg_100.fake.pdf")
+
+
+def write_pdf(f_name, page_texts, **save_kwargs):
+    doc = fitz.open()
+    for text in page_texts:
+        page = doc.newPage()
+        if text:
+            page.insertText((72, 72), text)
+    doc.save(str(f_name), **save_kwargs)
+    doc.close()
+    return Path(f_name)
+
+
+@pytest.fixture
+def scanned_pdfs(tmpdir):
+    """pdfs missing text on some of their pages, by name"""
+    return {
+        name: write_pdf(Path(tmpdir, name + ".pdf"), page_texts)
+        for name, page_texts in [
+            ("first_blank", ["", "page 2", "page 3"]),
+            ("last_blank", ["page 1", "page 2", ""]),
+            ("all_blank", ["", ""]),
+            ("middle_blank", ["page 1", "", "page 3"]),
+        ]
+    }
+
+
+def test_inspect_for_reocr(scanned_pdfs, tmpdir):
+    job = inspect_for_reocr(scanned_pdfs["middle_blank"])
+
+    assert job.file == str(scanned_pdfs["middle_blank"])
+    assert job.ocr_job_type == "redo-ocr"
+    assert job.bad_pages.split() == ["2"]
+    assert job.probe.page_count == 3
+
+    assert inspect_for_reocr(scanned_pdfs["all_blank"]).bad_pages.split() == ["1", "2"]
+    # fully OCR'ed, not a pdf and encrypted docs are left alone
+    assert inspect_for_reocr(OCR_PDF) is None
+    assert inspect_for_reocr(FAKE_PDF) is None
+    encrypted = write_pdf(Path(tmpdir, "encrypted.pdf"), ["", "page 2"], encryption=fitz.PDF_ENCRYPT_AES_256,
+                          owner_pw="owner", user_pw="user")
+    assert inspect_for_reocr(encrypted) is None
+
+
+class FakeOCR:
+    """Stands in for PDFOCR.convert_in_subprocess, records the jobs it got and how many ran at once"""
+
+    def __init__(self, timed_out_files=(), failed_files=(), duration=.2):
+        self.timed_out_files = {Path(f).name for f in timed_out_files}
+        self.failed_files = {Path(f).name for f in failed_files}
+        self.duration = duration
+        self.jobs = {}
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def convert_in_subprocess(self, pdf_ocr, raise_error=False, pages=None, output_type=None, timeout=None):
+        name = pdf_ocr.input_file.name
+        with self.lock:
+            self.jobs[name] = dict(pages=pages.split(), num_threads=pdf_ocr.num_threads, timeout=timeout)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.duration)
+            if name in self.timed_out_files:
+                raise OCRTimeoutError(f"[ERROR] OCR of '{name}' timed out after {timeout}s")
+            return name not in self.failed_files
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    def install(**kwargs):
+        fake = FakeOCR(**kwargs)
+        monkeypatch.setattr(ocr_scheduler.PDFOCR, "convert_in_subprocess",
+                            lambda self, **convert_kwargs: fake.convert_in_subprocess(self, **convert_kwargs))
+        return fake
+    return install
+
+
+def test_reocr_files_maps_jobs_to_their_files(scanned_pdfs, fake_ocr, capsys):
+    fake = fake_ocr(duration=0)
+    missing = Path(OCR_PDF_DIR, "missing.pdf")
+
+    stats = reocr_files([*scanned_pdfs.values(), OCR_PDF, FAKE_PDF, missing], num_ocr_threads=1, max_workers=2,
+                        timeout=30)
+
+    assert fake.jobs == {
+        "first_blank.pdf": dict(pages=["1"], num_threads=1, timeout=30),
+        "last_blank.pdf": dict(pages=["3"], num_threads=1, timeout=30),
+        "all_blank.pdf": dict(pages=["1", "2"], num_threads=1, timeout=30),
+        "middle_blank.pdf": dict(pages=["2"], num_threads=1, timeout=30),
+    }
+    assert stats["total_files"] == 7
+    assert stats["reocr_attempted"] == stats["reocr_successful"] == 4
+    assert stats["pages_attempted"] == 5
+    # files the status check failed on are reported by name, the others still get OCR'ed
+    assert f"Could not check OCR status of {missing}" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("max_workers,num_ocr_threads,expected_jobs", [(4, 2, 2), (4, 1, 4), (2, 4, 1)])
+def test_reocr_files_runs_cores_over_threads_jobs_at_once(scanned_pdfs, fake_ocr, max_workers, num_ocr_threads,
+                                                          expected_jobs):
+    fake = fake_ocr()
+
+    reocr_files(list(scanned_pdfs.values()), num_ocr_threads=num_ocr_threads, max_workers=max_workers)
+
+    assert fake.max_running == expected_jobs
+    assert {job["num_threads"] for job in fake.jobs.values()} == {num_ocr_threads}
+
+
+def test_reocr_files_counts_timed_out_job_and_finishes_others(scanned_pdfs, fake_ocr):
+    fake = fake_ocr(timed_out_files=[scanned_pdfs["all_blank"]], failed_files=[scanned_pdfs["last_blank"]])
+
+    stats = reocr_files(list(scanned_pdfs.values()), num_ocr_threads=1, max_workers=4, timeout=1)
+
+    assert set(fake.jobs) == {"first_blank.pdf", "last_blank.pdf", "all_blank.pdf", "middle_blank.pdf"}
+    assert stats["reocr_attempted"] == 4
+    assert stats["reocr_timed_out"] == 1
+    assert stats["reocr_failed"] == 1
+    assert stats["reocr_successful"] == 2
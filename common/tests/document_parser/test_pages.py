@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("gamechangerml")
+
+from common.document_parser.lib.document import FieldNames
+from common.document_parser.lib.pages import handle_pages, PageTextAccumulator
+
+PAGE_TEXTS = ["First page.\n", "", "Third page, after an empty one.\n", "Last page"]
+
+
+class FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def getText(self):
+        return self.text
+
+
+class FakeDoc:
+    def __init__(self, page_texts):
+        self.page_texts = page_texts
+
+    def pages(self):
+        return (FakePage(text) for text in self.page_texts)
+
+
+def test_page_text_accumulator():
+    accumulator = PageTextAccumulator()
+
+    assert [accumulator.append(text) for text in PAGE_TEXTS] == accumulator.offsets
+    assert accumulator.text() == "".join(PAGE_TEXTS)
+    assert [accumulator.text()[start:end] for start, end in accumulator.offsets] == PAGE_TEXTS
+
+
+def test_handle_pages_page_offsets_reproduce_page_texts():
+    doc_dict = {"filename": "doc.pdf"}
+
+    handle_pages(FakeDoc(PAGE_TEXTS), doc_dict)
+
+    text = doc_dict[FieldNames.TEXT]
+    offsets = doc_dict[FieldNames.PAGE_OFFSETS]
+    assert text == "".join(PAGE_TEXTS)
+    assert doc_dict["page_count"] == len(PAGE_TEXTS) == len(offsets)
+    assert [text[start:end] for start, end in offsets] == PAGE_TEXTS
+    assert [page[FieldNames.PAGE_RAW_TEXT] for page in doc_dict[FieldNames.PAGES]] == PAGE_TEXTS
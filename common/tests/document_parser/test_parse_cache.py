@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+from common.document_parser.parse_cache import ParseCache
+
+
+def test_parse_cache_round_trip(tmpdir):
+    raw_file = Path(tmpdir, "doc.pdf")
+    raw_file.write_bytes(b"%PDF-1.4 fake")
+    out_json = Path(tmpdir, "doc.json")
+    out_json.write_text(json.dumps({"text": "parsed"}))
+
+    cache = ParseCache(Path(tmpdir, "cache"), fingerprint="parser-v1")
+    key = cache.make_key(raw_file)
+
+    assert not cache.contains(key)
+    assert cache.get(key) is None
+
+    cache.put(key, out_json)
+
+    assert cache.contains(key)
+    assert cache.get(key) == {"text": "parsed"}
+
+
+def test_parse_cache_key_depends_on_bytes_and_fingerprint(tmpdir):
+    raw_file = Path(tmpdir, "doc.pdf")
+    raw_file.write_bytes(b"%PDF-1.4 fake")
+
+    key = ParseCache(tmpdir, fingerprint="parser-v1").make_key(raw_file)
+
+    assert key == ParseCache(tmpdir, fingerprint="parser-v1").make_key(raw_file)
+    assert key != ParseCache(tmpdir, fingerprint="parser-v2").make_key(raw_file)
+
+    raw_file.write_bytes(b"%PDF-1.4 changed")
+    assert key != ParseCache(tmpdir, fingerprint="parser-v1").make_key(raw_file)
@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("gamechangerml")
+process = pytest.importorskip("common.document_parser.process")
+
+from common.document_parser.parsers.policy_analytics import parse as pa_parse
+
+INGEST_DATES = {"DoDI 1000.01": ("2021-01-01T00:00:00", "2021-03-01T00:00:00")}
+
+
+@pytest.fixture(autouse=True)
+def no_prefetched_ingest_dates(monkeypatch):
+    # init_worker sets the module global, restore it after each test
+    monkeypatch.setattr(pa_parse, "INGEST_DATES", None)
+
+
+@pytest.fixture
+def ingest_date_queries(monkeypatch):
+    """doc_names of each load_ingest_dates call, answered from INGEST_DATES instead of the db"""
+    queries = []
+
+    def load_ingest_dates(doc_names):
+        queries.append(list(doc_names))
+        return {name: INGEST_DATES[name] for name in doc_names if name in INGEST_DATES}
+
+    monkeypatch.setattr(pa_parse, "load_ingest_dates", load_ingest_dates)
+    return queries
+
+
+def write_metadata(tmpdir, name, **metadata):
+    f_name = Path(tmpdir, name + ".pdf.metadata")
+    f_name.write_text(json.dumps(metadata))
+    return str(f_name)
+
+
+def test_prefetch_queries_doc_names_of_batch_once(tmpdir, ingest_date_queries):
+    meta_data_files = [
+        write_metadata(tmpdir, "a", doc_name="DoDI 1000.01"),
+        write_metadata(tmpdir, "b", doc_name="DoDI 1000.02"),
+        write_metadata(tmpdir, "no_doc_name", doc_title="No Doc Name"),
+        str(Path(tmpdir, "missing.pdf.metadata")),
+    ]
+
+    assert pa_parse.prefetch(meta_data_files) == INGEST_DATES
+    assert ingest_date_queries == [["DoDI 1000.01", "DoDI 1000.02"]]
+
+
+def test_prefetch_without_doc_names_skips_db(tmpdir, ingest_date_queries):
+    meta_data_files = [write_metadata(tmpdir, "no_doc_name", doc_title="No Doc Name")]
+
+    assert pa_parse.prefetch(meta_data_files) == {}
+    assert ingest_date_queries == []
+
+
+def test_init_worker_sets_ingest_dates():
+    pa_parse.init_worker(INGEST_DATES)
+
+    assert pa_parse.INGEST_DATES is INGEST_DATES
+
+
+@pytest.mark.parametrize("prefetched", [True, False])
+def test_process_ingest_date(ingest_date_queries, prefetched):
+    if prefetched:
+        pa_parse.init_worker(INGEST_DATES)
+    access_timestamp = "2021-04-01T00:00:00"
+
+    known = pa_parse.process_ingest_date(dict(doc_name="DoDI 1000.01", access_timestamp_dt=access_timestamp))
+    unknown = pa_parse.process_ingest_date(dict(doc_name="DoDI 9999.99", access_timestamp_dt=access_timestamp))
+
+    assert (known["original_ingest_date"], known["current_ingest_date"]) == INGEST_DATES["DoDI 1000.01"]
+    # docs that were never ingested before default to their access timestamp
+    assert unknown["original_ingest_date"] == unknown["current_ingest_date"] == access_timestamp
+    # without prefetched dates, each doc falls back to its own query
+    assert ingest_date_queries == ([] if prefetched else [["DoDI 1000.01"], ["DoDI 9999.99"]])
+
+
+def test_prefetch_batch_state_hands_prefetched_dates_to_workers(tmpdir, ingest_date_queries):
+    meta_data_files = [write_metadata(tmpdir, "a", doc_name="DoDI 1000.01")]
+
+    initializer, initargs = process.prefetch_batch_state(pa_parse.parse, meta_data_files)
+
+    assert initializer is pa_parse.init_worker
+    assert initargs == (INGEST_DATES,)
+
+
+def test_prefetch_batch_state_swallows_db_error(tmpdir, monkeypatch, capsys):
+    def load_ingest_dates(doc_names):
+        raise ConnectionError("could not connect to server")
+
+    monkeypatch.setattr(pa_parse, "load_ingest_dates", load_ingest_dates)
+    meta_data_files = [write_metadata(tmpdir, "a", doc_name="DoDI 1000.01")]
+
+    # workers are started without an initializer, so they query ingest dates per document
+    assert process.prefetch_batch_state(pa_parse.parse, meta_data_files) == (None, ())
+    assert "could not connect to server" in capsys.readouterr().out
+    assert pa_parse.INGEST_DATES is None
@@ -0,0 +1,157 @@
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from common.document_parser.lib import write_doc_dict_to_json
+from common.document_parser.parse_cache import ParseCache, make_parser_fingerprint
+from dev_tools import REPO_PATH
+
+process = pytest.importorskip("common.document_parser.process")
+
+PDF_FILE = Path(REPO_PATH, "dev_tools/universal_test_harness/data/crawler_output/us_code_data/Title 2.pdf")
+
+# this module doubles as a minimal cacheable parser, see parse and refresh_metadata below
+PARSER_VERSION = "1"
+PARSED_FILES = []
+
+
+def parse(f_name, meta_data=None, ocr_missing_doc=False, num_ocr_threads=2, force_ocr=False, out_dir="./"):
+    PARSED_FILES.append(Path(f_name).name)
+    with open(meta_data) as f:
+        meta_dict = json.load(f)
+    write_doc_dict_to_json.write(out_dir=out_dir, ex_dict=dict(
+        filename=Path(f_name).name,
+        text=Path(f_name).read_text(),
+        display_title=meta_dict["display_title"],
+    ))
+
+
+def refresh_metadata(doc_dict, f_name, meta_data=None):
+    with open(meta_data) as f:
+        doc_dict["display_title"] = json.load(f)["display_title"]
+    return doc_dict
+
+
+@pytest.fixture
+def raw_doc(tmpdir):
+    PARSED_FILES.clear()
+    f_name = Path(tmpdir, "doc.txt")
+    f_name.write_text("some text")
+    write_metadata(f_name, display_title="Doc 1: Old Title")
+    return f_name
+
+
+def write_metadata(f_name, **metadata):
+    Path(str(f_name) + ".metadata").write_text(json.dumps(metadata))
+
+
+def run_single_process(parse_func, f_name, out_dir, cache, ocr_missing_doc=False):
+    process.single_process((parse_func, f_name, str(f_name) + ".metadata", ocr_missing_doc, 1, False, str(out_dir),
+                            cache, None))
+    out_json = Path(out_dir, Path(f_name).stem + ".json")
+    with open(out_json) as f:
+        doc_dict = json.load(f)
+    out_json.unlink()
+    return doc_dict
+
+
+def test_single_process_serves_unchanged_doc_from_parse_cache(raw_doc, tmpdir):
+    cache = ParseCache(Path(tmpdir, "cache"), make_parser_fingerprint(parse))
+
+    first = run_single_process(parse, raw_doc, tmpdir, cache)
+    write_metadata(raw_doc, display_title="Doc 1: New Title")
+    second = run_single_process(parse, raw_doc, tmpdir, cache)
+
+    assert PARSED_FILES == ["doc.txt"]
+    assert first["display_title"] == "Doc 1: Old Title"
+    assert second == dict(first, display_title="Doc 1: New Title")
+
+
+def test_parser_version_change_misses_parse_cache(raw_doc, tmpdir, monkeypatch):
+    cache_dir = Path(tmpdir, "cache")
+    run_single_process(parse, raw_doc, tmpdir, ParseCache(cache_dir, make_parser_fingerprint(parse)))
+
+    monkeypatch.setattr(sys.modules[__name__], "PARSER_VERSION", "2")
+    cache = ParseCache(cache_dir, make_parser_fingerprint(parse))
+    assert not cache.contains(cache.make_key(raw_doc))
+
+    run_single_process(parse, raw_doc, tmpdir, cache)
+
+    assert PARSED_FILES == ["doc.txt", "doc.txt"]
+    assert cache.contains(cache.make_key(raw_doc))
+
+
+def test_ocr_missing_doc_change_misses_parse_cache(raw_doc, tmpdir):
+    cache_dir = Path(tmpdir, "cache")
+    run_single_process(parse, raw_doc, tmpdir, ParseCache(cache_dir, make_parser_fingerprint(parse)))
+
+    # a doc parsed without OCR may be missing text that a run with OCR would have
+    cache = ParseCache(cache_dir, make_parser_fingerprint(parse, ocr_missing_doc=True))
+    assert not cache.contains(cache.make_key(raw_doc))
+
+    run_single_process(parse, raw_doc, tmpdir, cache, ocr_missing_doc=True)
+
+    assert PARSED_FILES == ["doc.txt", "doc.txt"]
+    assert cache.contains(cache.make_key(raw_doc))
+
+
+def test_process_dir_reocrs_docs_served_from_parse_cache(raw_doc, tmpdir, monkeypatch):
+    reocred_files = []
+    monkeypatch.setattr(process, "reocr_files", lambda files, **kwargs: reocred_files.append(files))
+    cache_dir = Path(tmpdir, "cache")
+    out_dir = Path(tmpdir, "out")
+
+    for _ in range(2):
+        process.process_dir(parse, dir_path=str(raw_doc.parent), out_dir=str(out_dir), multiprocess=1,
+                            ocr_missing_doc=True, parse_cache=str(cache_dir))
+        assert Path(out_dir, "doc.json").is_file()
+
+    cache = ParseCache(cache_dir, make_parser_fingerprint(parse, ocr_missing_doc=True))
+    assert cache.contains(cache.make_key(raw_doc))
+    # the raw files are uploaded after parsing, so cached docs must still be OCR'ed in place
+    assert reocred_files == [[raw_doc], [raw_doc]]
+
+
+@pytest.mark.parametrize("mp_start_method", ["forkserver", "spawn"])
+def test_process_dir_with_mp_start_method(raw_doc, tmpdir, mp_start_method):
+    out_dir = Path(tmpdir, "out")
+
+    process.process_dir(parse, dir_path=str(raw_doc.parent), out_dir=str(out_dir), multiprocess=2,
+                        mp_start_method=mp_start_method)
+
+    with open(Path(out_dir, "doc.json")) as f:
+        assert json.load(f)["display_title"] == "Doc 1: Old Title"
+
+
+def test_policy_analytics_cache_hit_refreshes_metadata(tmpdir, monkeypatch):
+    pytest.importorskip("gamechangerml")
+    from common.document_parser.lib import pdf_reader
+    from common.document_parser.parsers.policy_analytics import parse as pa_parse
+
+    # no ingest date lookups in the db
+    monkeypatch.setattr(pa_parse, "INGEST_DATES", {})
+    f_name = Path(shutil.copy(PDF_FILE, tmpdir))
+    metadata = json.loads(Path(str(PDF_FILE) + ".metadata").read_text())
+    Path(str(f_name) + ".metadata").write_text(json.dumps(metadata))
+    out_dir = Path(tmpdir, "out")
+    cache = ParseCache(Path(tmpdir, "cache"), make_parser_fingerprint(pa_parse.parse))
+
+    first = run_single_process(pa_parse.parse, f_name, out_dir, cache)
+
+    metadata.update(display_title="Title 2: The Congress (Renamed)", display_org="Renamed Org")
+    Path(str(f_name) + ".metadata").write_text(json.dumps(metadata))
+
+    def not_parsed(*args, **kwargs):
+        raise AssertionError("cached doc was parsed again")
+
+    # parse() swallows errors without writing output, so any output below came from the cache
+    monkeypatch.setattr(pdf_reader, "get_fitz_doc_obj", not_parsed)
+    second = run_single_process(pa_parse.parse, f_name, out_dir, cache)
+
+    assert second["text"] == first["text"]
+    assert second["display_title_s"] == "Title 2: The Congress (Renamed)"
+    assert second["display_org_s"] == "Renamed Org"
+    assert first["display_title_s"] == "Title 2: The Congress"
@@ -0,0 +1,79 @@
+import os
+from pathlib import Path
+import pytest
+from common.document_parser.worker_pool import run_recycling_pool, WorkerCrashedError
+
+
+def record_pid(task):
+    out_file, value = task
+    if value == "crash":
+        os._exit(1)
+    if value == "fail":
+        raise ValueError("failed task")
+    with open(out_file, "a") as f:
+        f.write(f"{os.getpid()} {value}\n")
+
+
+def read_records(out_file):
+    return [line.split() for line in Path(out_file).read_text().splitlines()]
+
+
+def test_recycling_pool_reuses_and_recycles_workers(tmpdir):
+    out_file = str(Path(tmpdir, "out.txt"))
+    stats = run_recycling_pool(record_pid, [(out_file, i) for i in range(20)], processes=2, max_tasks_per_worker=5)
+
+    records = read_records(out_file)
+    assert sorted(int(value) for _, value in records) == list(range(20))
+    assert stats["completed"] == 20
+    pids = [pid for pid, _ in records]
+    assert stats["workers_started"] == len(set(pids)) >= 4
+    assert max(pids.count(pid) for pid in pids) <= 5
+
+
+def test_recycling_pool_survives_crashed_worker_and_raises_task_error(tmpdir):
+    out_file = str(Path(tmpdir, "out.txt"))
+    tasks = [(out_file, i) for i in range(5)] + [(out_file, "crash"), (out_file, "fail")]
+
+    with pytest.raises(WorkerCrashedError) as exc_info:
+        run_recycling_pool(record_pid, tasks, processes=2)
+
+    assert exc_info.value.task_indexes == [5]
+    assert isinstance(exc_info.value.__cause__, ValueError)
+    assert sorted(int(value) for _, value in read_records(out_file)) == list(range(5))
+
+
+def test_recycling_pool_raises_task_error(tmpdir):
+    out_file = str(Path(tmpdir, "out.txt"))
+    tasks = [(out_file, i) for i in range(5)] + [(out_file, "fail")]
+
+    with pytest.raises(ValueError):
+        run_recycling_pool(record_pid, tasks, processes=2)
+
+    assert sorted(int(value) for _, value in read_records(out_file)) == list(range(5))
+
+
+def test_recycling_pool_reports_tasks_lost_to_crashed_workers(tmpdir):
+    out_file = str(Path(tmpdir, "out.txt"))
+    tasks = [(out_file, i) for i in range(3)] + [(out_file, "crash"), (out_file, 3), (out_file, "crash")]
+
+    with pytest.raises(WorkerCrashedError) as exc_info:
+        run_recycling_pool(record_pid, tasks, processes=2, max_tasks_per_worker=2)
+
+    assert exc_info.value.task_indexes == [3, 5]
+    assert exc_info.value.stats["crashed"] == 2
+    assert exc_info.value.stats["completed"] == 4
+    assert sorted(int(value) for _, value in read_records(out_file)) == list(range(4))
+
+
+def failing_initializer():
+    raise RuntimeError("initializer failed")
+
+
+def test_recycling_pool_reports_tasks_lost_to_failing_initializer(tmpdir):
+    out_file = str(Path(tmpdir, "out.txt"))
+
+    with pytest.raises(WorkerCrashedError) as exc_info:
+        run_recycling_pool(record_pid, [(out_file, i) for i in range(4)], processes=2,
+                           initializer=failing_initializer)
+
+    assert exc_info.value.task_indexes == [0, 1, 2, 3]
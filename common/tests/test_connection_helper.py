@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from configuration.helpers import ConnectionHelper
+
+
+def make_connection_helper():
+    return ConnectionHelper({'aws': {
+        'default_region': 'us-east-1',
+        'auth_type': 'key',
+        'access_key': 'testing',
+        'secret_key': 'testing',
+        'endpoint_type': 'aws',
+    }})
+
+
+def test_ensure_s3_pool_connections_rebuilds_shared_client():
+    ch = make_connection_helper()
+    old_client = ch.s3_client
+    old_resource = ch.s3_resource
+    assert old_client.meta.config.max_pool_connections == ConnectionHelper.DEFAULT_S3_MAX_POOL_CONNECTIONS
+
+    ch.ensure_s3_pool_connections(ConnectionHelper.DEFAULT_S3_MAX_POOL_CONNECTIONS - 1)
+    assert ch.s3_client is old_client
+
+    lock = ch._s3_lock
+    ch.ensure_s3_pool_connections(50)
+    # the client is rebuilt under the existing lock, the per process cache isn't reset
+    assert ch._s3_lock is lock
+    assert ch._s3_cache_pid == os.getpid()
+    assert ch._s3_client.meta.config.max_pool_connections == 50
+    assert ch.s3_max_pool_connections == 50
+    assert ch.s3_client is not old_client
+    assert ch.s3_client.meta.config.max_pool_connections == 50
+    assert ch.s3_resource is not old_resource
+    assert ch.s3_resource.meta.client.meta.config.max_pool_connections == 50
+
+
+def test_ensure_s3_pool_connections_from_many_threads():
+    ch = make_connection_helper()
+
+    def use_client(max_connections):
+        ch.ensure_s3_pool_connections(max_connections)
+        return ch.s3_client
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(use_client, range(1, 100)))
+
+    assert all(client is not None for client in clients)
+    assert ch.s3_max_pool_connections == 99
+    assert ch.s3_client.meta.config.max_pool_connections == 99
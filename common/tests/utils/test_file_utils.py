@@ -0,0 +1,103 @@
+import os
+from pathlib import Path
+
+import PyPDF2
+import pytest
+
+from common.tests import PACKAGE_OCR_PDF_PATH
+from common.utils.file_utils import (
+    probe_pdf, guess_mime, is_pdf, is_encrypted_pdf, is_ocr_pdf, check_ocr_status_job_type
+)
+
+TEXT_PDF = os.path.join(PACKAGE_OCR_PDF_PATH, "DoDD 5535.04, 8 31 1984, Ch 1 11 16 1994, Cc 11 21 2003 OCR.pdf")
+
+
+def write_pdf(path, pages=(), blank_pages=0, user_pwd=None):
+    writer = PyPDF2.PdfFileWriter()
+    for page in pages:
+        writer.addPage(page)
+    for _ in range(blank_pages):
+        writer.addBlankPage(width=612, height=792)
+    if user_pwd is not None:
+        writer.encrypt(user_pwd)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def assert_probe_matches_single_checks(probe, file):
+    assert probe.is_pdf == is_pdf(file)
+    assert probe.is_ocr() == is_ocr_pdf(file)
+    assert probe.ocr_status() == check_ocr_status_job_type(file)
+
+
+def test_probe_text_pdf():
+    probe = probe_pdf(TEXT_PDF)
+
+    assert probe.file == str(Path(TEXT_PDF).resolve())
+    assert probe.is_mime_pdf
+    assert probe.is_pdf
+    assert not probe.is_encrypted
+    assert probe.page_count == 3
+    assert probe.page_has_text == (True, True, True)
+    assert probe.page_replacement_char_ratio == (0.0, 0.0, 0.0)
+    assert probe.ocr_status() == {'successful_ocr': True, "ocr_job_type": "skip-text", "bad_page_nums": None}
+    assert probe.is_encrypted == is_encrypted_pdf(TEXT_PDF)
+    assert_probe_matches_single_checks(probe, TEXT_PDF)
+
+
+def test_probe_pdf_without_text(tmpdir):
+    no_text_pdf = write_pdf(Path(tmpdir, "scanned.pdf"), blank_pages=2)
+    probe = probe_pdf(no_text_pdf)
+
+    assert probe.is_pdf
+    assert not probe.is_encrypted
+    assert probe.page_count == 2
+    assert probe.page_has_text == (False, False)
+    assert not probe.is_ocr()
+    assert probe.ocr_status() == {'successful_ocr': False, "ocr_job_type": "redo-ocr", "bad_page_nums": "1 2 "}
+    assert_probe_matches_single_checks(probe, no_text_pdf)
+
+
+def test_probe_pdf_with_some_pages_without_text(tmpdir):
+    text_page = PyPDF2.PdfFileReader(TEXT_PDF).getPage(0)
+    mixed_pdf = write_pdf(Path(tmpdir, "mixed.pdf"), pages=[text_page], blank_pages=1)
+    probe = probe_pdf(mixed_pdf)
+
+    assert probe.page_has_text == (True, False)
+    assert probe.is_ocr()
+    assert probe.bad_page_nums == "2 "
+    assert_probe_matches_single_checks(probe, mixed_pdf)
+
+
+def test_probe_encrypted_pdf(tmpdir):
+    encrypted_pdf = write_pdf(Path(tmpdir, "encrypted.pdf"), blank_pages=1, user_pwd="secret")
+    probe = probe_pdf(encrypted_pdf)
+
+    assert probe.is_pdf
+    assert probe.is_encrypted
+    assert probe.is_encrypted == is_encrypted_pdf(encrypted_pdf)
+    # pages of a pdf that can't be decrypted aren't read
+    assert probe.page_has_text == ()
+
+
+@pytest.mark.parametrize("content", [b"", b"%PDF-1.4\n garbage", b"not a pdf at all"])
+def test_probe_corrupt_pdf(tmpdir, content):
+    corrupt_pdf = Path(tmpdir, "corrupt.pdf")
+    corrupt_pdf.write_bytes(content)
+    probe = probe_pdf(corrupt_pdf)
+
+    assert not probe.is_pdf
+    # err on a side of caution, like is_encrypted_pdf
+    assert probe.is_encrypted
+    assert probe.is_encrypted == is_encrypted_pdf(corrupt_pdf)
+    assert probe.page_count == 0
+    assert probe.ocr_status() == {'successful_ocr': False, "ocr_job_type": None, "bad_page_nums": None}
+
+
+def test_guess_mime(tmpdir):
+    not_pdf = Path(tmpdir, "doc.pdf")
+    not_pdf.write_text("plain text")
+
+    assert guess_mime(TEXT_PDF) == "application/pdf"
+    assert guess_mime(not_pdf) is None
@@ -2,6 +2,7 @@ import typing as t
 from pathlib import Path
 import fitz
 import os
+import filetype
 import PyPDF2
 from PyPDF2.utils import PdfReadError
 #from dataPipelines.gc_ocr.utils import OCRJobType
@@ -110,3 +111,88 @@ def is_encrypted_pdf(file: t.Union[Path, str]) -> bool:
         print(f"Unexpected error while trying to open {file_path.name}")
         print(e)
         return True  # err on a side of caution
+
+
+# character 65533 is the 'replace'/'unknown' character
+REPLACEMENT_CHAR = chr(65533)
+
+
+def guess_mime(file: t.Union[Path, str]) -> t.Optional[str]:
+    """Guess mime type of the file from its magic bytes, None if unknown"""
+    kind = filetype.guess(str(file))
+    return kind.mime if kind is not None else None
+
+
+class PdfProbe(t.NamedTuple):
+    """Everything the OCR and parsing steps need to know about a pdf, gathered with a single open of the file"""
+    file: str
+    mime: t.Optional[str]
+    is_pdf: bool
+    is_encrypted: bool
+    page_count: int
+    # per page, whether the page has any (stripped) text
+    page_has_text: t.Tuple[bool, ...]
+    # per page, fraction of the page's (stripped) text that is the replacement char
+    page_replacement_char_ratio: t.Tuple[float, ...]
+
+    @property
+    def is_mime_pdf(self) -> bool:
+        return self.mime in ("pdf", "application/pdf")
+
+    def is_ocr(self, error_char_threshold=.2) -> bool:
+        """Same as is_ocr_pdf - decided by the first page with text"""
+        for has_text, ratio in zip(self.page_has_text, self.page_replacement_char_ratio):
+            if has_text:
+                # if the OCR font (or char encodings) are problematic, the PDF does need OCR
+                return not ratio > error_char_threshold
+        return False
+
+    @property
+    def bad_page_nums(self) -> str:
+        """Page numbers (index + 1) of pages without text, space separated"""
+        return "".join(str(i + 1) + " " for i, has_text in enumerate(self.page_has_text) if not has_text)
+
+    def ocr_status(self) -> t.Dict[str, t.Any]:
+        """Same as check_ocr_status_job_type"""
+        if not self.is_pdf:
+            return {'successful_ocr': False, "ocr_job_type": None, "bad_page_nums": None}
+        if not all(self.page_has_text):
+            return {'successful_ocr': False, "ocr_job_type": "redo-ocr", "bad_page_nums": self.bad_page_nums}
+        return {'successful_ocr': True, "ocr_job_type": "skip-text", "bad_page_nums": None}
+
+
+def probe_pdf(file: t.Union[Path, str]) -> PdfProbe:
+    """Open the file once and gather what is_pdf, is_encrypted_pdf, is_ocr_pdf and check_ocr_status_job_type
+    would each have opened it for"""
+    file_path = Path(file).resolve()
+    mime = guess_mime(file_path)
+
+    try:
+        with fitz.open(str(file_path)) as doc:
+            # metadata 'encryption' is set even when fitz could open the file with an empty password
+            is_encrypted = bool(doc.isEncrypted or (doc.metadata or {}).get('encryption'))
+            page_count = doc.pageCount
+            page_has_text = []
+            page_replacement_char_ratio = []
+            for page_num in range(0 if doc.isEncrypted else page_count):
+                page_text = doc.getPageText(page_num).strip()
+                page_has_text.append(bool(page_text))
+                page_replacement_char_ratio.append(
+                    page_text.count(REPLACEMENT_CHAR) / len(page_text) if page_text else 0.0
+                )
+    except Exception as e:
+        print(f"Unexpected error while trying to open {file_path}")
+        print(e)
+        # err on a side of caution
+        return PdfProbe(file=str(file_path), mime=mime, is_pdf=False, is_encrypted=True,
+                        page_count=0, page_has_text=(), page_replacement_char_ratio=())
+
+    return PdfProbe(
+        file=str(file_path),
+        mime=mime,
+        is_pdf=True,
+        is_encrypted=is_encrypted,
+        page_count=page_count,
+        page_has_text=tuple(page_has_text),
+        page_replacement_char_ratio=tuple(page_replacement_char_ratio)
+    )
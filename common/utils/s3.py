@@ -1,4 +1,5 @@
 from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
 from configuration.helpers import ConnectionHelper
 from typing import Optional, Union, List, Iterable, Tuple, Dict, Any
 from pathlib import Path
@@ -12,6 +13,11 @@ import os
 from .text_utils import size_fmt
 import datetime as dt
 import typing as t
+import json
+import sys
+import hashlib
+import threading
+import time
 
 
 class TimestampedPrefix:
@@ -21,6 +27,50 @@ class TimestampedPrefix:
         self.timestamp = timestamp
         self.timestamp_str = timestamp_str
 
+class S3ListingCache:
+    """Short-lived in-process cache of complete prefix listings, shared by all S3Utils instances so
+    checkpoint/snapshot/s3 utils that look at the same prefixes within a job only list them once.
+    Entries are dropped after ttl_secs or as soon as this process writes under the listed prefix."""
+    def __init__(self, ttl_secs: float = 30):
+        self.ttl_secs = ttl_secs
+        self._entries: Dict[Tuple[str, str, Optional[str], str], Tuple[float, List[Any]]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation, listings that raced with a write aren't cached"""
+        return self._generation
+
+    def get(self, key: Tuple[str, str, Optional[str], str]) -> Optional[List[Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, items = entry
+            if time.monotonic() - created > self.ttl_secs:
+                del self._entries[key]
+                return None
+            return items
+
+    def put(self, key: Tuple[str, str, Optional[str], str], items: List[Any], generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic(), items)
+
+    def invalidate(self, bucket: str, object_path: str = "") -> None:
+        """Drop listings of bucket that could contain object_path, all listings of bucket if no path is given"""
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if k[0] == bucket and object_path.startswith(k[1])]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
 # TODO
 #   relying on S3-compatible storage is not ideal
 #   there should be a more abstract storage-provider interface
@@ -52,6 +102,13 @@ class S3Utils:
                 """,
         flags=re.VERBOSE,
     )
+    # single CopyObject requests are limited to 5GB, bigger objects are copied in parts
+    MULTIPART_COPY_THRESHOLD = 5 * 1024 ** 3
+    MULTIPART_COPY_CHUNKSIZE = 512 * 1024 ** 2
+    # max number of keys accepted by a single DeleteObjects request
+    DELETE_OBJECTS_BATCH_SIZE = 1000
+    COPY_MANIFEST_SUFFIX = ".copy-manifest.json"
+    listing_cache = S3ListingCache()
 
     def __init__(self, ch: ConnectionHelper, bucket: Optional[str] = None):
         self.ch = ch
@@ -88,9 +145,85 @@ class S3Utils:
 
     def iter_object_paths_at_prefix(self, prefix: str, bucket: Optional[str] = None) -> Iterable[str]:
         """Iterate over object keys at prefix"""
+        for obj in self.iter_objects_at_prefix(prefix=prefix, bucket=bucket):
+            yield obj['Key']
+
+    def _iter_listing(self,
+                      prefix: str,
+                      bucket_name: str,
+                      delimiter: Optional[str],
+                      result_key: str) -> Iterable[Dict[str, Any]]:
+        """Lazily iterate over all pages of a list_objects_v2 listing.
+        Complete listings are kept in the listing cache, partially consumed ones aren't."""
+        cache_key = (bucket_name, prefix, delimiter, result_key)
+        cached = self.listing_cache.get(cache_key)
+        if cached is not None:
+            yield from cached
+            return
+
+        generation = self.listing_cache.generation
+        items: List[Dict[str, Any]] = []
+        paginator = self.ch.s3_client.get_paginator('list_objects_v2')
+        delimiter_kwargs = dict(Delimiter=delimiter) if delimiter else {}
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, **delimiter_kwargs):
+            page_items = page.get(result_key, [])
+            items.extend(page_items)
+            yield from page_items
+        self.listing_cache.put(cache_key, items, generation)
+
+    def iter_objects_at_prefix(self,
+                               prefix: str,
+                               bucket: Optional[str] = None,
+                               delimiter: Optional[str] = None) -> Iterable[Dict[str, Any]]:
+        """Iterate over object listings (Key, Size, ETag, LastModified) at prefix
+        :param prefix: S3 prefix
+        :param bucket: Bucket name
+        :param delimiter: if given, e.g. '/', only objects directly under the prefix are listed
+        """
+        bucket_name = bucket or self.bucket
+        yield from self._iter_listing(prefix=prefix, bucket_name=bucket_name, delimiter=delimiter,
+                                      result_key='Contents')
+
+    def iter_common_prefixes(self, prefix: str, bucket: Optional[str] = None, delimiter: str = "/") -> Iterable[str]:
+        """Iterate over the "subdirectories" directly under prefix
+        :param prefix: S3 prefix
+        :param bucket: Bucket name
+        :param delimiter: path delimiter
+        """
+        bucket_name = bucket or self.bucket
+        for p in self._iter_listing(prefix=prefix, bucket_name=bucket_name, delimiter=delimiter,
+                                    result_key='CommonPrefixes'):
+            yield p['Prefix']
+
+    def get_json_object(self, object_path: str, bucket: Optional[str] = None) -> Optional[Any]:
+        """Get the deserialized contents of a json object, None if it doesn't exist"""
+        bucket_name = bucket or self.bucket
+        try:
+            response = self.ch.s3_client.get_object(Bucket=bucket_name, Key=object_path)
+        except ClientError:
+            return None
+        return json.loads(response['Body'].read().decode(encoding="utf-8"))
+
+    def put_json_object(self, obj: Any, object_path: str, bucket: Optional[str] = None) -> str:
+        """Serialize obj to a json object at object_path"""
         bucket_name = bucket or self.bucket
-        for obj_summary in self.ch.s3_resource.Bucket(bucket_name).objects.filter(Prefix=prefix):
-            yield obj_summary.key
+        self.ch.s3_client.put_object(
+            Bucket=bucket_name,
+            Key=object_path,
+            Body=json.dumps(obj).encode(encoding="utf-8")
+        )
+        self.listing_cache.invalidate(bucket_name, object_path)
+        return object_path
+
+    @staticmethod
+    def get_max_workers(max_threads: int) -> int:
+        """Number of workers for a given max_threads setting, -1 meaning all cpus"""
+        if max_threads < 0:
+            return multiprocessing.cpu_count()
+        elif max_threads >= 1:
+            return max_threads
+        else:
+            raise ValueError(f"Invalid max_threads value given: ${max_threads}")
 
     def get_prefix_stats(self, prefix: str, bucket: Optional[str] = None) -> Dict[str, Any]:
         """Get summary stats about contents of the prefix"""
@@ -100,10 +233,9 @@ class S3Utils:
             'total_size': '0'
         }
 
-        bucket_name = bucket or self.bucket
-        for obj_summary in self.ch.s3_resource.Bucket(bucket_name).objects.filter(Prefix=prefix):
+        for obj in self.iter_objects_at_prefix(prefix=prefix, bucket=bucket):
             stats['obj_count'] += 1
-            stats['total_size_bytes'] += obj_summary.meta.data.get('Size', 0)
+            stats['total_size_bytes'] += obj.get('Size', 0)
         stats['total_size'] = size_fmt(stats['total_size_bytes'])
 
         return stats
@@ -135,6 +267,7 @@ class S3Utils:
         # Upload the file
         s3_client = self.ch.s3_client
         s3_client.upload_file(str(file_path), bucket_name, object_path)
+        self.listing_cache.invalidate(bucket_name, object_path)
 
         return object_path
 
@@ -160,6 +293,28 @@ class S3Utils:
 
         return file_path
 
+    def upload_fileobj(self, fileobj: t.BinaryIO, object_path: str, bucket: Optional[str] = None) -> str:
+        """Upload from a readable binary file object, e.g. a pipe - non-seekable streams go up as multipart chunks
+        :param fileobj: readable binary file object, read until EOF
+        :param object_path: full s3 path of the object to create
+        :param bucket: Bucket to upload to
+        :return: Uploaded object path
+        """
+        bucket_name = bucket or self.bucket
+        self.ch.s3_client.upload_fileobj(fileobj, bucket_name, object_path)
+        self.listing_cache.invalidate(bucket_name, object_path)
+
+        return object_path
+
+    def download_fileobj(self, object_path: str, fileobj: t.BinaryIO, bucket: Optional[str] = None) -> None:
+        """Download object into a writable binary file object, e.g. a pipe
+        :param object_path: full s3 path of the object to download
+        :param fileobj: writable binary file object
+        :param bucket: Bucket name
+        """
+        bucket_name = bucket or self.bucket
+        self.ch.s3_client.download_fileobj(bucket_name, object_path, fileobj)
+
     def object_exists(self, object_path: str, bucket: Optional[str] = None) -> bool:
         """Check if s3 object exists at given path
         :param object_path: Full s3 path to object (sans bucket name)
@@ -181,6 +336,8 @@ class S3Utils:
         :return: True/False
         """
         bucket_name = bucket or self.bucket
+        # as a "directory", so sibling keys sharing the leading string (e.g. copy manifests) don't count
+        prefix_path = self.format_as_prefix(prefix_path)
         if next(iter(self.iter_object_paths_at_prefix(prefix=prefix_path, bucket=bucket_name)), None):
             return True
         else:
@@ -198,8 +355,6 @@ class S3Utils:
         :param max_threads: number of threads for multithreading
         """
         local_dir_path = Path(local_dir).resolve()
-        s3_client = self.ch.s3_client
-        s3_resource = self.ch.s3_resource
         print(local_dir_path)
         # Handle missing / at end of prefix
         if not prefix_path.endswith('/'):
@@ -237,23 +392,61 @@ class S3Utils:
         else:
             raise ValueError(f"Invalid max_threads value given: ${max_threads}")
 
+        self.ch.ensure_s3_pool_connections(max_workers)
+
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             executor.map(dl_inner_func, (tasks for tasks in tasks_to_do))
 
+    @staticmethod
+    def compute_etag(file: Union[str, Path],
+                     multipart_threshold: int = TransferConfig().multipart_threshold,
+                     multipart_chunksize: int = TransferConfig().multipart_chunksize) -> str:
+        """Compute the ETag S3 assigns to a file uploaded with upload_file (default transfer config).
+        Plain MD5 for single part uploads, MD5 of the part MD5s suffixed with the part count for multipart ones.
+        :param file: Path to file
+        :param multipart_threshold: size at which uploads switch to multipart
+        :param multipart_chunksize: size of the parts of multipart uploads
+        :return: quoted ETag, as returned by S3 listings
+        """
+        file_path = Path(file)
+        if file_path.stat().st_size < multipart_threshold:
+            digest = hashlib.md5()
+            with file_path.open("rb") as f:
+                for chunk in iter(lambda: f.read(multipart_chunksize), b""):
+                    digest.update(chunk)
+            return f'"{digest.hexdigest()}"'
+
+        part_digests = []
+        with file_path.open("rb") as f:
+            for chunk in iter(lambda: f.read(multipart_chunksize), b""):
+                part_digests.append(hashlib.md5(chunk).digest())
+        return f'"{hashlib.md5(b"".join(part_digests)).hexdigest()}-{len(part_digests)}"'
+
     def upload_dir(self,
                    local_dir: Union[str, Path],
                    prefix_path: str = "",
                    bucket: Optional[str] = None,
-                   max_threads: int = 1) -> List[str]:
+                   max_threads: int = 1,
+                   sync: bool = False) -> List[str]:
         """Upload all files in the directory to S3
         :param local_dir: path to local dir
         :param prefix_path: S3 prefix for uploaded objects
         :param bucket: Bucket name
         :param max_threads: number of threads for multithreading
+        :param sync: skip files already at the destination with the same size and ETag
         :return: List of uploaded object names
         """
         local_dir_path = Path(local_dir).resolve()
+        bucket_name = bucket or self.bucket
         uploaded_objects: List[str] = []
+        stats = {'uploaded_count': 0, 'uploaded_bytes': 0, 'skipped_count': 0, 'skipped_bytes': 0}
+
+        # files are uploaded flat under prefix_path, so listing its direct children is enough
+        existing_objects = {
+            o['Key']: o for o in self.iter_objects_at_prefix(
+                prefix=self.format_as_prefix(prefix_path), bucket=bucket_name, delimiter='/'
+            )
+        } if sync else {}
 
         # defining an inner function for the upload commands for ease of running the multithreading command
         # makes it so that everything's in one place when I run executor.map() if multithreading
@@ -268,63 +461,179 @@ class S3Utils:
                     self.format_as_prefix(relative_parent_dir_path)
                 )
 
+                size = locpath.stat().st_size
+                existing_object = existing_objects.get(self.path_join(self.format_as_prefix(prefix_path), locpath.name))
+                if (existing_object
+                        and existing_object['Size'] == size
+                        and existing_object['ETag'] == self.compute_etag(locpath)):
+                    return None, size
+
                 print(f"Uploading {locpath.name} to prefix {prefix_path}")
-                self.upload_file(file=locpath, object_prefix=prefix_path, bucket=(bucket or self.bucket))
+                self.upload_file(file=locpath, object_prefix=prefix_path, bucket=bucket_name)
 
-                return os.path.join(final_prefix, locpath.name)
+                return os.path.join(final_prefix, locpath.name), size
+            return None, None
 
         tasks_to_do = local_dir_path.rglob("*")
-
-        # if we use all available resources
-        # NOT recommended. This uses all computing power at once, will probably crash if big directory
-        if max_threads < 0:
-            max_workers = multiprocessing.cpu_count()
-
-        # if we don't use multithreading or if we do partitioned multithreading
-        elif max_threads >= 1:
-            max_workers = max_threads
-
-        # else, bad value inserted for max_threads
-        else:
-            raise ValueError(f"Invalid max_threads value given: ${max_threads}")
+        max_workers = self.get_max_workers(max_threads)
+        self.ch.ensure_s3_pool_connections(max_workers)
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             r = executor.map(up_inner_func, (tasks for tasks in tasks_to_do))
-            for result in r:
+            for result, size in r:
                 if result:
                     uploaded_objects.append(result)
+                    stats['uploaded_count'] += 1
+                    stats['uploaded_bytes'] += size
+                elif size is not None:
+                    stats['skipped_count'] += 1
+                    stats['skipped_bytes'] += size
+
+        if sync:
+            print(f"Uploaded {stats['uploaded_count']} files ({size_fmt(stats['uploaded_bytes'])}), "
+                  f"skipped {stats['skipped_count']} unchanged files ({size_fmt(stats['skipped_bytes'])})",
+                  file=sys.stderr)
 
         return uploaded_objects
 
-    def copy_prefix(self, src_prefix: str, dst_prefix: str, bucket: Optional[str] = None) -> List[str]:
-        """Recursively copies all objects from given src prefix to corresponding paths on destination prefix
-        :param src_prefix: Source prefix
-        :param dst_prefix: Destination prefix
+    def copy_object(self,
+                    src_obj_path: str,
+                    dst_obj_path: str,
+                    bucket: Optional[str] = None,
+                    size: Optional[int] = None) -> str:
+        """Server-side copy of a single object, in parts if it's too big for a single CopyObject
+        :param src_obj_path: Source object path
+        :param dst_obj_path: Destination object path
         :param bucket: Bucket name
-        :return: dst_object_paths
+        :param size: Size of the source object in bytes, looked up if not given
+        :return: dst_obj_path
         """
-        s3_resource = self.ch.s3_resource
-        dst_obj_paths: List[str] = []
-
         bucket_name = bucket or self.bucket
-        for obj_path in self.iter_object_paths_at_prefix(prefix = src_prefix):
-            new_obj_path = (
-                    self.format_as_prefix(dst_prefix)
-                    + str(Path(obj_path).relative_to(src_prefix))
+        copy_source = {'Bucket': bucket_name, 'Key': src_obj_path}
+
+        if size is not None and size < self.MULTIPART_COPY_THRESHOLD:
+            self.ch.s3_client.copy_object(CopySource=copy_source, Bucket=bucket_name, Key=dst_obj_path)
+        else:
+            # managed copy heads the source itself and switches to UploadPartCopy above the threshold
+            self.ch.s3_client.copy(
+                CopySource=copy_source,
+                Bucket=bucket_name,
+                Key=dst_obj_path,
+                Config=TransferConfig(
+                    multipart_threshold=self.MULTIPART_COPY_THRESHOLD,
+                    multipart_chunksize=self.MULTIPART_COPY_CHUNKSIZE
+                )
             )
+        self.listing_cache.invalidate(bucket_name, dst_obj_path)
+        return dst_obj_path
+
+    def get_copy_manifest_path(self, dst_prefix: str) -> str:
+        """Path of the manifest for copies into dst_prefix, a sibling of the prefix so it's never part of it"""
+        return self.format_as_prefix(dst_prefix).rstrip('/') + self.COPY_MANIFEST_SUFFIX
+
+    def get_copy_manifest(self, dst_prefix: str, bucket: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get the manifest of a (possibly interrupted) copy into dst_prefix, None if there isn't one"""
+        return self.get_json_object(object_path=self.get_copy_manifest_path(dst_prefix), bucket=bucket)
+
+    def put_copy_manifest(self, dst_prefix: str, manifest: Dict[str, Any], bucket: Optional[str] = None) -> str:
+        """Write the manifest of a copy into dst_prefix"""
+        return self.put_json_object(obj=manifest, object_path=self.get_copy_manifest_path(dst_prefix), bucket=bucket)
+
+    def is_copy_resumable(self, dst_prefix: str, bucket: Optional[str] = None) -> bool:
+        """Check if there's an unfinished resumable copy into dst_prefix"""
+        manifest = self.get_copy_manifest(dst_prefix=dst_prefix, bucket=bucket)
+        return bool(manifest) and not manifest.get('complete', False)
+
+    @staticmethod
+    def is_same_object(src_obj: Dict[str, Any], dst_obj: Optional[Dict[str, Any]]) -> bool:
+        """Check if listing of dst object matches the src object it was copied from"""
+        if not dst_obj or src_obj['Size'] != dst_obj['Size']:
+            return False
+        # multipart copies get a new etag, size is all there is to compare then
+        if '-' in src_obj['ETag'] or '-' in dst_obj['ETag']:
+            return True
+        return src_obj['ETag'] == dst_obj['ETag']
 
-            print(f"Copying {obj_path} to {new_obj_path}")
+    def list_prefix_objects(self, prefix: str, bucket: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List (Key, Size, ETag) of all objects under prefix, as a "directory" - sibling keys that only share
+        its leading string, like the copy manifest of the prefix, aren't included
+        :param prefix: S3 prefix
+        :param bucket: Bucket name
+        :return: object listings
+        """
+        return [
+            {'Key': o['Key'], 'Size': o['Size'], 'ETag': o['ETag']}
+            for o in self.iter_objects_at_prefix(prefix=self.format_as_prefix(prefix), bucket=bucket)
+        ]
 
-            # self.copy_file(src_obj_path=obj_path, dst_obj_path=new_obj_path, bucket=bucket_name)
+    def copy_prefix(self,
+                    src_prefix: str,
+                    dst_prefix: str,
+                    bucket: Optional[str] = None,
+                    max_threads: int = 1,
+                    resumable: bool = False,
+                    src_objects: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+        """Recursively copies all objects from given src prefix to corresponding paths on destination prefix.
+        Copies are server-side and run in parallel.
+        :param src_prefix: Source prefix
+        :param dst_prefix: Destination prefix
+        :param bucket: Bucket name
+        :param max_threads: number of threads for multithreading
+        :param resumable: record the source listing in a manifest next to dst_prefix. If the copy is interrupted,
+            calling again with the same args copies only what's missing from dst_prefix.
+        :param src_objects: listing of src_prefix from list_prefix_objects, listed here if not given
+        :return: dst_object_paths
+        """
+        bucket_name = bucket or self.bucket
+        src_prefix = self.format_as_prefix(src_prefix)
+        dst_prefix = self.format_as_prefix(dst_prefix)
+        max_workers = self.get_max_workers(max_threads)
+        self.ch.ensure_s3_pool_connections(max_workers)
+
+        manifest = self.get_copy_manifest(dst_prefix=dst_prefix, bucket=bucket_name) if resumable else None
+        if manifest and not manifest.get('complete', False):
+            # manifests written before listings were limited to the src "directory" can list its sibling keys
+            src_objects = [o for o in manifest['objects'] if o['Key'].startswith(src_prefix)]
+            dst_objects = {o['Key']: o for o in self.list_prefix_objects(prefix=dst_prefix, bucket=bucket_name)}
+            print(f"Resuming copy of {len(src_objects)} objects from {src_prefix} to {dst_prefix}, "
+                  f"{len(dst_objects)} already at destination", file=sys.stderr)
+        else:
+            if src_objects is None:
+                src_objects = self.list_prefix_objects(prefix=src_prefix, bucket=bucket_name)
+            dst_objects = {}
+            if resumable:
+                self.put_copy_manifest(
+                    dst_prefix=dst_prefix,
+                    manifest={'src_prefix': src_prefix, 'dst_prefix': dst_prefix, 'complete': False,
+                              'objects': src_objects},
+                    bucket=bucket_name
+                )
 
-            s3_resource.Object(
-                bucket_name=bucket_name,
-                key=new_obj_path
-            ).copy_from(
-                CopySource={'Bucket': bucket_name, 'Key': obj_path}
+        def copy_inner_func(src_obj: Dict[str, Any]) -> str:
+            if not src_obj['Key'].startswith(src_prefix):
+                raise ValueError(f"Object {src_obj['Key']} is not under source prefix {src_prefix}")
+            new_obj_path = dst_prefix + src_obj['Key'][len(src_prefix):]
+            if self.is_same_object(src_obj, dst_objects.get(new_obj_path)):
+                return new_obj_path
+
+            print(f"Copying {src_obj['Key']} to {new_obj_path}")
+            return self.copy_object(
+                src_obj_path=src_obj['Key'],
+                dst_obj_path=new_obj_path,
+                bucket=bucket_name,
+                size=src_obj['Size']
             )
 
-            dst_obj_paths.append(new_obj_path)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            dst_obj_paths = list(executor.map(copy_inner_func, src_objects))
+
+        if resumable:
+            self.put_copy_manifest(
+                dst_prefix=dst_prefix,
+                manifest={'src_prefix': src_prefix, 'dst_prefix': dst_prefix, 'complete': True,
+                          'objects': src_objects},
+                bucket=bucket_name
+            )
         return dst_obj_paths
 
     def delete_object(self, object_path: str, bucket: Optional[str] = None) -> None:
@@ -338,42 +647,63 @@ class S3Utils:
 
         if self.object_exists(object_path=object_path, bucket=bucket_name):
             s3_resource.Object(bucket_name, object_path).delete()
+            self.listing_cache.invalidate(bucket_name, object_path)
 
-    def delete_prefix(self, prefix: str, bucket: Optional[str] = None, max_threads: int = 1) -> List[str]:
-        """Delete all S3 objects with given prefix
-        :param prefix: S3 obj prefix
+    def delete_objects(self, object_paths: Iterable[str], bucket: Optional[str] = None, max_threads: int = 1) -> List[str]:
+        """Delete s3 objects in batches of up to 1000 keys per request
+        :param object_paths: Full object keys
         :param bucket: Bucket name
         :param max_threads: number of threads for multithreading
         :return: List of deleted object paths
         """
-
         bucket_name = bucket or self.bucket
+        max_workers = self.get_max_workers(max_threads)
+        self.ch.ensure_s3_pool_connections(max_workers)
         deleted_object_paths: List[str] = []
-        tasks_to_do = self.iter_object_paths_at_prefix(prefix=prefix, bucket=bucket_name)
-
-        # if we use all available resources
-        # NOT recommended. This uses all computing power at once, will probably crash if big directory
-        if max_threads < 0:
-            max_workers = multiprocessing.cpu_count()
 
-        # if we don't use multithreading or if we do partitioned multithreading
-        elif max_threads >= 1:
-            max_workers = max_threads
-
-        # else, bad value inserted for max_threads
-        else:
-            raise ValueError(f"Invalid max_threads value given: ${max_threads}")
+        def iter_batches() -> Iterable[List[str]]:
+            batch: List[str] = []
+            for object_path in object_paths:
+                batch.append(object_path)
+                if len(batch) == self.DELETE_OBJECTS_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        def delete_inner_func(batch: List[str]) -> List[str]:
+            response = self.ch.s3_client.delete_objects(
+                Bucket=bucket_name,
+                Delete={'Objects': [{'Key': k} for k in batch], 'Quiet': True}
+            )
+            for k in batch:
+                self.listing_cache.invalidate(bucket_name, k)
+            errors = response.get('Errors', [])
+            for error in errors:
+                print(f"Failed to delete {error.get('Key')}: {error.get('Message')}", file=sys.stderr)
+            failed = {error.get('Key') for error in errors}
+            return [k for k in batch if k not in failed]
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            r = executor.map(self.delete_object,
-                             (tasks for tasks in tasks_to_do),
-                             (bucket_name for _ in tasks_to_do))
-            for result in r:
-                if result:
-                    deleted_object_paths.append(result[0])
+            for deleted in executor.map(delete_inner_func, iter_batches()):
+                deleted_object_paths.extend(deleted)
 
         return deleted_object_paths
 
+    def delete_prefix(self, prefix: str, bucket: Optional[str] = None, max_threads: int = 1) -> List[str]:
+        """Delete all S3 objects with given prefix
+        :param prefix: S3 obj prefix
+        :param bucket: Bucket name
+        :param max_threads: number of threads for multithreading
+        :return: List of deleted object paths
+        """
+        bucket_name = bucket or self.bucket
+        return self.delete_objects(
+            object_paths=list(self.iter_object_paths_at_prefix(prefix=prefix, bucket=bucket_name)),
+            bucket=bucket_name,
+            max_threads=max_threads
+        )
+
     def move_prefix(self, old_prefix: str, new_prefix: str, bucket: Optional[str] = None) -> List[str]:
         """Move all objects from old prefix to new prefix (copies then deletes)
         :param old_prefix: Old S3 prefix
@@ -442,6 +772,7 @@ class S3Utils:
 
         s3_obj = s3_resource.Object(bucket_name, checkpoint_path)
         s3_obj.put(Body=ts_str)
+        self.listing_cache.invalidate(bucket_name, checkpoint_path)
 
         return checkpoint_path
 
@@ -466,8 +797,6 @@ class S3Utils:
         :param bucket: Bucket name
         :return: List of valid timestamped prefixes
         """
-        s3_client = self.ch.s3_client
-
         _base_prefix = self.format_as_prefix(base_prefix)
         if not isinstance(after_timestamp, datetime.datetime):
             after_timestamp = parse_formatted_timestamp(after_timestamp, self.TIMESTAMP_FORMAT)
@@ -475,20 +804,17 @@ class S3Utils:
         bucket_name = bucket or self.bucket
         default_delimiter = "/"
 
-
         valid_timestamped_prefixes = [
             TimestampedPrefix(
-                prefix_path=p["Prefix"],
+                prefix_path=p,
                 timestamp=datetime.datetime.strptime(
-                    self.TIMESTAMPED_PATH_REGEX.match(p["Prefix"]).groupdict()["timestamp"],
+                    self.TIMESTAMPED_PATH_REGEX.match(p).groupdict()["timestamp"],
                     self.TIMESTAMP_FORMAT,
                 ),
-                timestamp_str=self.TIMESTAMPED_PATH_REGEX.match(p["Prefix"]).groupdict()["timestamp"]
+                timestamp_str=self.TIMESTAMPED_PATH_REGEX.match(p).groupdict()["timestamp"]
             )
-            for p in s3_client.list_objects(
-                Bucket=bucket_name, Delimiter=default_delimiter, Prefix=_base_prefix
-            ).get("CommonPrefixes", [])
-            if self.TIMESTAMPED_PATH_REGEX.match(p["Prefix"])
+            for p in self.iter_common_prefixes(prefix=_base_prefix, bucket=bucket_name, delimiter=default_delimiter)
+            if self.TIMESTAMPED_PATH_REGEX.match(p)
         ]
 
         prefixes_after_last_checkpoint = [
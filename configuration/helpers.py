@@ -16,6 +16,7 @@ from dataPipelines.gc_db_utils.orch.utils import init_db_bindings as init_orch_d
 from dataPipelines.gc_db_utils.web.utils import init_db_bindings as init_web_db_bindings, create_tables_and_views as create_web_db_schema, drop_tables_and_views as drop_web_schema
 from common.utils.timeout_utils import raise_on_timeout, ContextTimeout
 import os
+import threading
 
 class ApiSession(requests.Session):
     def __init__(self, __api_base_url=None, *args, **kwargs):
@@ -34,6 +35,7 @@ class DBSessionScopeMode(Enum):
 
 class ConnectionHelper:
     DEFAULT_TIMEOUT_SECS=5
+    DEFAULT_S3_MAX_POOL_CONNECTIONS = 10
     def __init__(self, conf_dict: t.Dict[str, t.Any]):
         self.conf = conf_dict
 
@@ -41,9 +43,45 @@ class ConnectionHelper:
     def from_config(cls, *config_provider_args, **config_provider_kwargs) -> 'ConnectionHelper':
         return cls(DefaultConfigProvider().get_config(*config_provider_args, **config_provider_kwargs))  # type: ignore
 
+    def __getstate__(self) -> t.Dict[str, t.Any]:
+        state = self.__dict__.copy()
+        # boto3 objects, locks and thread locals don't survive pickling, they're recreated lazily
+        for attr in ('_s3_local', '_s3_lock', '_s3_client', '_s3_cache_pid'):
+            state.pop(attr, None)
+        return state
+
     @property
-    def s3_resource(self) -> 'boto3.resources.factory.s3.ServiceResource':
+    def s3_max_pool_connections(self) -> int:
+        """Max number of connections kept open by each cached s3 client"""
+        return getattr(self, '_s3_max_pool_connections', None) or self.conf['aws'].get(
+            'max_pool_connections', self.DEFAULT_S3_MAX_POOL_CONNECTIONS
+        )
 
+    def ensure_s3_pool_connections(self, max_connections: int) -> None:
+        """Grow the s3 connection pools so max_connections threads can share them without waiting on a connection.
+        The shared client is rebuilt with the bigger pool, per thread resources are recreated on next access.
+        Threads still holding the old client or resources can keep using them."""
+        if max_connections <= self.s3_max_pool_connections:
+            return
+        self._get_s3_cache()
+        with self._s3_lock:
+            if max_connections <= self.s3_max_pool_connections:
+                return
+            self._s3_max_pool_connections = max_connections
+            self._s3_local = threading.local()
+            if self._s3_client is not None:
+                self._s3_client = boto3.session.Session().client('s3', **self._get_s3_kwargs())
+
+    def _get_s3_cache(self) -> threading.local:
+        # boto3 sessions and their connection pools can't be shared with forked processes
+        if getattr(self, '_s3_cache_pid', None) != os.getpid():
+            self._s3_local = threading.local()
+            self._s3_lock = threading.Lock()
+            self._s3_client = None
+            self._s3_cache_pid = os.getpid()
+        return self._s3_local
+
+    def _get_s3_kwargs(self) -> t.Dict[str, t.Any]:
         base_kwargs = dict(
             region_name=self.conf['aws']['default_region']
         )
@@ -55,22 +93,43 @@ class ConnectionHelper:
 
         endpoint_kwargs = dict(
             endpoint_url=self.conf['aws']['endpoint_url'],
+        ) if self.conf['aws']['endpoint_type'] != 'aws' else {}
+
+        signature_kwargs = dict(
+            signature_version=self.conf['aws']['endpoint_s3_signature_version']
+        ) if self.conf['aws']['endpoint_type'] != 'aws' else {}
+
+        config_kwargs = dict(
             config=botocore.client.Config(
-                signature_version=self.conf['aws']['endpoint_s3_signature_version']
+                max_pool_connections=self.s3_max_pool_connections,
+                **signature_kwargs
             )
-        ) if self.conf['aws']['endpoint_type'] != 'aws' else {}
+        )
 
-        boto_resource_kwargs = dict(
+        return dict(
             **base_kwargs,
             **key_kwargs,
-            **endpoint_kwargs
+            **endpoint_kwargs,
+            **config_kwargs
         )
 
-        return boto3.resource('s3', **boto_resource_kwargs)
+    @property
+    def s3_resource(self) -> 'boto3.resources.factory.s3.ServiceResource':
+        """S3 resource cached per thread, boto3 resources aren't thread-safe"""
+        cache = self._get_s3_cache()
+        if getattr(cache, 'resource', None) is None:
+            cache.resource = boto3.session.Session().resource('s3', **self._get_s3_kwargs())
+        return cache.resource
 
     @property
     def s3_client(self) -> 'botocore.client.S3':
-        return self.s3_resource.meta.client
+        """S3 client cached per process and shared by all its threads, boto3 clients are thread-safe"""
+        self._get_s3_cache()
+        if self._s3_client is None:
+            with self._s3_lock:
+                if self._s3_client is None:
+                    self._s3_client = boto3.session.Session().client('s3', **self._get_s3_kwargs())
+        return self._s3_client
 
     @property
     def data_api_requests_session(self) -> requests.Session:
@@ -0,0 +1,2 @@
+CREATE INDEX CONCURRENTLY IF NOT EXISTS versioned_docs_doc_name_idx
+    ON versioned_docs ((json_metadata->>'doc_name'));
@@ -0,0 +1 @@
+DROP INDEX CONCURRENTLY IF EXISTS versioned_docs_doc_name_idx;
@@ -1,7 +1,8 @@
 import sqlalchemy as sa
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List
 import datetime as dt
 from sqlalchemy.orm import Session
 import json
@@ -32,7 +33,12 @@ class Publication(AutoRepr, PublicationSchema, DeferredOrchReflectedBase):
     @staticmethod
     def create_from_document(doc: Dict[str, Any]) -> 'Publication':
         """Generate Publication from Document dict obj."""
-        return Publication(
+        return Publication(**Publication.row_from_document(doc))
+
+    @staticmethod
+    def row_from_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate publications table row (column -> value) from Document dict obj."""
+        return dict(
             name=doc['doc_name'],
             title=doc['doc_title'][:100],
             type=doc['doc_type'],
@@ -47,6 +53,40 @@ class Publication(AutoRepr, PublicationSchema, DeferredOrchReflectedBase):
         return existing_pub
 
 
+    @staticmethod
+    def get_ids_by_name(names: Iterable[str], session: Session) -> Dict[str, int]:
+        """Get {name: id} of existing publications with given names, in one query"""
+        names = list(names)
+        if not names:
+            return {}
+        table = Publication.__table__
+        return dict(session.execute(
+            sa.select([table.c.name, table.c.id]).where(table.c.name.in_(names))
+        ).fetchall())
+
+    @staticmethod
+    def insert_rows_ignore_existing(rows: List[Dict[str, Any]], session: Session) -> Dict[str, int]:
+        """Insert publications rows in one statement, skipping names that already exist (postgres or sqlite)
+        :param rows: publications rows, see Publication.row_from_document
+        :param session: db session
+        :return: {name: id} of inserted rows, on sqlite also of the skipped existing rows
+        """
+        if not rows:
+            return {}
+        table = Publication.__table__
+        if session.get_bind().dialect.name == 'postgresql':
+            stmt = (
+                pg_insert(table)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[table.c.name])
+                .returning(table.c.name, table.c.id)
+            )
+            return dict(session.execute(stmt).fetchall())
+
+        # sqlite has no RETURNING, so ids are looked up after the insert
+        session.execute(table.insert().prefix_with('OR IGNORE'), rows)
+        return Publication.get_ids_by_name(names=[row['name'] for row in rows], session=session)
+
     @staticmethod
     def get_or_create_from_document(doc: Dict[str, Any], session: Session) -> 'Publication':
         existing_pub = Publication.get_existing_from_doc(doc=doc, session=session)
@@ -69,6 +109,22 @@ class VersionedDoc(AutoRepr, VersionedDocSchema, DeferredOrchReflectedBase):
         """Generate VersionedDoc from Document obj. and associated Publication"""
         return VersionedDoc(
             publication=pub,
+            **VersionedDoc.row_from_document(
+                doc=doc,
+                doc_location=doc_location,
+                filename=filename,
+                batch_timestamp=batch_timestamp
+            )
+        )
+
+    @staticmethod
+    def row_from_document(
+            doc: Dict[str, Any],
+            doc_location: str,
+            filename: str,
+            batch_timestamp: dt.datetime) -> Dict[str, Any]:
+        """Generate versioned_docs table row (column -> value), minus pub_id, from Document obj."""
+        return dict(
             name=doc['doc_name'],
             type=doc['doc_type'],
             number=doc['doc_num'],
@@ -28,6 +28,9 @@ CREATE TABLE IF NOT EXISTS versioned_docs (
 	FOREIGN KEY(pub_id) REFERENCES publications (id)
 );
 
+CREATE INDEX IF NOT EXISTS versioned_docs_doc_name_idx
+    ON versioned_docs ((json_metadata->>'doc_name'));
+
 CREATE TABLE IF NOT EXISTS pipeline_jobs (
 	id SERIAL NOT NULL,
 	name VARCHAR(512),
@@ -1,5 +1,12 @@
 from pathlib import Path
 import typing as t
+import contextlib
+import gzip
+import io
+import os
+import sys
+import threading
+import time
 import sqlalchemy
 import psycopg2.extensions as pg2ext
 
@@ -9,27 +16,147 @@ def truncate_table(db_engine: sqlalchemy.engine.Engine, table: str, schema: str
     db_engine.execute(f"TRUNCATE TABLE {schema + '.' + table} {'CASCADE' if cascade else ''}")
 
 
-def export_to_csv(db_engine: sqlalchemy.engine.Engine, table_or_view: str, output_file: t.Union[Path, str], schema: str = 'public') -> None:
-    """Export table/view to a csv file"""
-    output_file = Path(output_file).resolve()
+# gzip level for compressed exports, higher levels cost a lot more cpu for little gain on csv
+CSV_COMPRESSLEVEL = 6
+
+CsvTarget = t.Union[Path, str, t.BinaryIO]
+
+
+def _open_csv(target: CsvTarget, mode: str, compressed: bool) -> t.ContextManager[t.BinaryIO]:
+    """Open path or wrap binary file object, (de)compressing with gzip if needed. Given file objects aren't closed."""
+    if isinstance(target, (Path, str)):
+        path = Path(target).resolve()
+        if compressed:
+            return gzip.open(path, mode=mode, compresslevel=CSV_COMPRESSLEVEL)
+        return path.open(mode=mode)
+
+    if compressed:
+        return gzip.GzipFile(fileobj=target, mode=mode, compresslevel=CSV_COMPRESSLEVEL)
+    return contextlib.nullcontext(target)
+
+
+def export_to_csv(db_engine: sqlalchemy.engine.Engine,
+                  table_or_view: str,
+                  output_file: CsvTarget,
+                  schema: str = 'public',
+                  compressed: bool = False) -> None:
+    """Export table/view to a csv file
+    :param db_engine: PostgreSQL db engine
+    :param table_or_view: table/view to export
+    :param output_file: path or writable binary file object (e.g. a pipe to an s3 upload)
+    :param schema: table_or_view schema
+    :param compressed: whether to gzip the output
+    """
     con: pg2ext.connection = db_engine.raw_connection()
-    cur: pg2ext.cursor = con.cursor()
-    query = f"COPY {schema + '.' + table_or_view} TO STDOUT WITH (FORMAT CSV, HEADER, DELIMITER ',')"
+    try:
+        cur: pg2ext.cursor = con.cursor()
+        query = f"COPY {schema + '.' + table_or_view} TO STDOUT WITH (FORMAT CSV, HEADER, DELIMITER ',')"
 
-    with output_file.open(mode="wb") as fd:
-        cur.copy_expert(sql=query, file=fd)
+        with _open_csv(output_file, mode="wb", compressed=compressed) as fd:
+            cur.copy_expert(sql=query, file=fd)
+    finally:
+        con.close()
 
 
-def import_from_csv(db_engine: sqlalchemy.engine.Engine, input_file: t.Union[Path, str], table: str, schema: str = 'public') -> None:
-    """Import csv file into given table"""
-    input_file = Path(input_file).resolve()
+def import_from_csv(db_engine: sqlalchemy.engine.Engine,
+                    input_file: CsvTarget,
+                    table: str,
+                    schema: str = 'public',
+                    compressed: bool = False) -> None:
+    """Import csv file into given table
+    :param db_engine: PostgreSQL db engine
+    :param input_file: path or readable binary file object (e.g. a pipe from an s3 download)
+    :param table: table to import into
+    :param schema: table schema
+    :param compressed: whether input is gzipped
+    """
     con: pg2ext.connection = db_engine.raw_connection()
-    cur: pg2ext.cursor = con.cursor()
-    query = f"COPY {schema + '.' + table} FROM STDIN WITH (FORMAT CSV, HEADER, DELIMITER ',')"
+    try:
+        cur: pg2ext.cursor = con.cursor()
+        query = f"COPY {schema + '.' + table} FROM STDIN WITH (FORMAT CSV, HEADER, DELIMITER ',')"
 
-    with input_file.open(mode="rb") as fd:
-        cur.copy_expert(sql=query, file=fd)
-        con.commit()
+        with _open_csv(input_file, mode="rb", compressed=compressed) as fd:
+            cur.copy_expert(sql=query, file=fd)
+            con.commit()
+    finally:
+        con.close()
+
+
+class PipeWriterError(IOError):
+    """Raised on the read end of a run_piped pipe when the writer failed, instead of a clean EOF"""
+
+
+class _PipeReader(io.RawIOBase):
+    """Read end of a run_piped pipe. Once the pipe is drained it raises PipeWriterError if the writer failed,
+    so readers never take a stream cut short by a writer error (possibly with a valid gzip trailer) as complete."""
+
+    def __init__(self, fd: int, writer_errors: t.List[BaseException]):
+        self._fd = fd
+        self._writer_errors = writer_errors
+        self.raised_writer_error = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = os.read(self._fd, len(b))
+        if not data and self._writer_errors:
+            self.raised_writer_error = True
+            raise PipeWriterError(f"Writer failed: {self._writer_errors[0]!r}")
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            os.close(self._fd)
+        super().close()
+
+
+def run_piped(write_func: t.Callable[[t.BinaryIO], None], read_func: t.Callable[[t.BinaryIO], t.Any]) -> t.Any:
+    """Stream whatever write_func writes into read_func through an os pipe, without buffering it all.
+
+    write_func runs on a separate thread and the pipe is closed when it returns, so read_func sees EOF.
+    If write_func fails, read_func gets a PipeWriterError instead of EOF - so e.g. an upload is aborted or a
+    COPY isn't committed - and the write_func error is raised.
+    If read_func fails, the write end gets a broken pipe and the read_func error is raised.
+    :param write_func: function writing into given binary file object
+    :param read_func: function reading given binary file object until EOF
+    :return: read_func result
+    """
+    read_fd, write_fd = os.pipe()
+    errors: t.List[BaseException] = []
+
+    def writer() -> None:
+        fd = os.fdopen(write_fd, "wb")
+        try:
+            write_func(fd)
+        except BaseException as e:
+            # recorded before the write end is closed, so the reader knows about it by the time it sees EOF
+            errors.append(e)
+        finally:
+            try:
+                fd.close()
+            except Exception as e:
+                if not errors:
+                    errors.append(e)
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    reader = _PipeReader(read_fd, errors)
+    try:
+        with io.BufferedReader(reader) as fd:
+            result = read_func(fd)
+    except BaseException:
+        thread.join()
+        # read_func may have wrapped the PipeWriterError, the writer error is the cause then
+        if reader.raised_writer_error:
+            raise errors[0]
+        raise
+    thread.join()
+
+    if errors:
+        raise errors[0]
+    return result
 
 
 def check_if_table_or_view_exists(db_engine: sqlalchemy.engine.Engine, table_or_view: str, schema: str = 'public') -> bool:
@@ -48,4 +175,89 @@ def check_if_table_or_view_exists(db_engine: sqlalchemy.engine.Engine, table_or_
     if r.fetchall():
         return True
     else:
-        return False
\ No newline at end of file
+        return False
+
+
+def refresh_table_from_query(src_engine: sqlalchemy.engine.Engine,
+                             query: str,
+                             dst_engine: sqlalchemy.engine.Engine,
+                             table: str,
+                             columns: t.List[str],
+                             schema: str = 'public',
+                             post_swap_sql: t.Optional[str] = None) -> int:
+    """Replace contents of a table with results of a query run on another db, without read downtime.
+
+    Query results are piped from COPY ... TO STDOUT on the source straight into COPY ... FROM STDIN on a staging
+    copy of the table, so memory use doesn't grow with the table. The staging table is then renamed over the
+    original within the same transaction, so readers see either the old or the new rows, never an empty table.
+
+    :param src_engine: PostgreSQL db engine to run query on
+    :param query: SELECT query returning given columns, in order
+    :param dst_engine: PostgreSQL db engine with the table to refresh
+    :param table: table to refresh
+    :param columns: table columns to fill
+    :param schema: table schema
+    :param post_swap_sql: sql to run after the swap, before commit - e.g. to rebind views that depend on the table
+    :return: number of rows in the refreshed table, 0 if query returned nothing (table is left untouched)
+    """
+    target = f"{schema}.{table}"
+    staging_name = f"{table}_staging"
+    old_name = f"{table}_old"
+    column_list = ", ".join(columns)
+
+    start = time.time()
+    con: pg2ext.connection = dst_engine.raw_connection()
+    try:
+        cur: pg2ext.cursor = con.cursor()
+        cur.execute(f"DROP TABLE IF EXISTS {schema}.{staging_name}")
+        cur.execute(f"CREATE TABLE {schema}.{staging_name} (LIKE {target} INCLUDING ALL)")
+
+        def copy_out(fd: t.BinaryIO) -> None:
+            src_con: pg2ext.connection = src_engine.raw_connection()
+            try:
+                src_con.cursor().copy_expert(sql=f"COPY ({query}) TO STDOUT WITH (FORMAT CSV)", file=fd)
+            finally:
+                src_con.close()
+
+        run_piped(
+            write_func=copy_out,
+            read_func=lambda fd: cur.copy_expert(
+                sql=f"COPY {schema}.{staging_name} ({column_list}) FROM STDIN WITH (FORMAT CSV)",
+                file=fd
+            )
+        )
+
+        cur.execute(f"SELECT count(*) FROM {schema}.{staging_name}")
+        row_count = cur.fetchone()[0]
+        if not row_count:
+            con.rollback()
+            return 0
+
+        cur.execute(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+            (schema, staging_name)
+        )
+        staging_indexes = [r[0] for r in cur.fetchall()]
+
+        cur.execute(f"LOCK TABLE {target} IN ACCESS EXCLUSIVE MODE")
+        cur.execute(f"ALTER TABLE {target} RENAME TO {old_name}")
+        cur.execute(f"ALTER TABLE {schema}.{staging_name} RENAME TO {table}")
+        if post_swap_sql:
+            cur.execute(post_swap_sql)
+        cur.execute(f"DROP TABLE {schema}.{old_name}")
+        # keep index names stable (e.g. <table>_pkey), so the next refresh doesn't collide with them
+        for index_name in staging_indexes:
+            if index_name.startswith(staging_name):
+                cur.execute(
+                    f"ALTER INDEX {schema}.{index_name} RENAME TO {table + index_name[len(staging_name):]}"
+                )
+        cur.execute(f"GRANT SELECT ON {target} TO PUBLIC")
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        con.close()
+
+    print(f"Refreshed {target} with {row_count} rows in {time.time() - start:.1f}s", file=sys.stderr)
+    return row_count
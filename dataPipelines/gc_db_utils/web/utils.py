@@ -1,19 +1,23 @@
-from .models import DeferredWebReflectedBase
+from .models import DeferredWebReflectedBase, SnapshotEntry
+from .schemas import SnapshotEntrySchema
+from ..utils import refresh_table_from_query
 from . import PACKAGE_PATH
 from pathlib import Path
 from typing import Union
 import sqlalchemy
 
 
-def run_sql_file(sql_subpath: Union[str, Path], engine: sqlalchemy.engine.Engine) -> None:
+def read_sql_file(sql_subpath: Union[str, Path]) -> str:
     sql_path = Path(PACKAGE_PATH, 'sql', sql_subpath).resolve()
     if not sql_path.is_file():
         raise ValueError(f"There is no file at path {sql_path!s}")
 
     with sql_path.open("r") as fd:
-        sql = fd.read()
+        return fd.read()
+
 
-    engine.execute(sql)
+def run_sql_file(sql_subpath: Union[str, Path], engine: sqlalchemy.engine.Engine) -> None:
+    engine.execute(read_sql_file(sql_subpath))
 
 
 def drop_views(engine: sqlalchemy.engine.Engine) -> None:
@@ -54,3 +58,24 @@ def recreate_tables_and_views(engine: sqlalchemy.engine.Engine) -> None:
     drop_tables_and_views(engine=engine)
     create_tables_and_views(engine=engine)
 
+
+
+def refresh_snapshot_table(orch_engine: sqlalchemy.engine.Engine,
+                           web_engine: sqlalchemy.engine.Engine,
+                           orch_snapshot_view: str = 'gc_document_corpus_snapshot_vw') -> int:
+    """Stream snapshot view from orch db into web db snapshot table and swap it in atomically
+    :param orch_engine: orch db engine
+    :param web_engine: web db engine
+    :param orch_snapshot_view: orch db view to materialize
+    :return: number of snapshot rows, 0 if the view was empty (web table is left untouched)
+    """
+    columns = [k for k in SnapshotEntrySchema.__dict__.keys() if not k.startswith('_')]
+    return refresh_table_from_query(
+        src_engine=orch_engine,
+        query=f"SELECT {', '.join(columns)} FROM {orch_snapshot_view}",
+        dst_engine=web_engine,
+        table=str(SnapshotEntry.__tablename__),
+        columns=columns,
+        # views bound to the old table have to be pointed at the new one before it's dropped
+        post_swap_sql=read_sql_file('create_views.sql')
+    )
@@ -81,7 +81,41 @@ def setup_index(index_name: str, alias: str, mapping_file: str) -> None:
                     dir_okay=True, resolve_path=True),
     required=False,
 )
-def run(index_name: str, alias: str, mapping_file: str, ingest_dir) -> None:
+@click.option(
+    "--chunk-size",
+    help="Max number of docs per _bulk request",
+    type=int,
+    default=500,
+    show_default=True,
+)
+@click.option(
+    "--max-chunk-mb",
+    help="Max size of a _bulk request in MB, a single larger doc is sent on its own",
+    type=float,
+    default=50,
+    show_default=True,
+)
+@click.option(
+    "--thread-count",
+    help="Number of concurrent _bulk requests",
+    type=int,
+    default=4,
+    show_default=True,
+)
+@click.option(
+    "--load-workers",
+    help="Number of processes loading and stripping jsons, defaults to all cores",
+    type=int,
+    default=None,
+)
+@click.option(
+    "--fresh-index-build",
+    help="Disable refreshes and replicas while indexing, restored afterwards. Only use on indexes not serving searches.",
+    is_flag=True,
+    default=False,
+)
+def run(index_name: str, alias: str, mapping_file: str, ingest_dir, chunk_size: int, max_chunk_mb: float,
+        thread_count: int, load_workers: int, fresh_index_build: bool) -> None:
     """Index dir of files into elasticsearch."""
     start = time()
     publisher = ConfiguredElasticsearchPublisher(
@@ -89,11 +123,15 @@ def run(index_name: str, alias: str, mapping_file: str, ingest_dir) -> None:
         ingest_dir=ingest_dir,
         mapping_file=mapping_file,
         alias=alias,
+        bulk_chunk_size=chunk_size,
+        bulk_max_chunk_bytes=int(max_chunk_mb * 1024 * 1024),
+        bulk_thread_count=thread_count,
+        json_load_workers=load_workers,
     )
 
     publisher.create_index()
     if ingest_dir:
-        publisher.index_jsons()
+        publisher.index_jsons(fresh_index_build=fresh_index_build)
     if alias:
         publisher.update_alias()
 
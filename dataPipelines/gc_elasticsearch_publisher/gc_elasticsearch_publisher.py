@@ -1,4 +1,5 @@
 import os
+import sys
 from elasticsearch import helpers, Elasticsearch
 from pathlib import Path
 import json
@@ -11,6 +12,30 @@ import typing as t
 from configuration import RENDERED_DIR
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from collections import deque
+from time import time
+import multiprocessing
+
+# Parsed doc fields that aren't indexed
+DROPPED_FIELDS = ("text", "pages", "raw_text")
+
+
+def load_index_doc(path):
+    """Load a parsed json and strip it down to an index-ready doc, runs in a worker process
+    :param path: path to the parsed json
+    :return: (filename, doc)
+    """
+    filename = re.sub("\.json", "", os.path.basename(path))
+    with open(path, "r", encoding="utf-8") as file:
+        json_data = json.load(file)
+
+    for field in DROPPED_FIELDS:
+        json_data.pop(field, None)
+    # record_id = uuid.uuid1()
+    json_data["_id"] = hashlib.sha256(filename.encode()).hexdigest()
+    return filename, json_data
+
 
 def clean_string(string):
 
@@ -32,8 +57,18 @@ class ElasticsearchPublisher:
         username,
         password,
         environment,
+        bulk_chunk_size=500,
+        bulk_max_chunk_bytes=50 * 1024 * 1024,
+        bulk_thread_count=4,
+        bulk_max_retries=8,
+        json_load_workers=None,
     ):
         self.ingest_dir = ingest_dir
+        self.json_load_workers = json_load_workers or os.cpu_count() or 1
+        self.bulk_chunk_size = bulk_chunk_size
+        self.bulk_max_chunk_bytes = bulk_max_chunk_bytes
+        self.bulk_thread_count = bulk_thread_count
+        self.bulk_max_retries = bulk_max_retries
         self.index_name = index_name
         self.host = host
         self.port = port
@@ -77,55 +112,153 @@ class ElasticsearchPublisher:
             )
 
     def get_jdicts(self):
-        for f in Path(self.ingest_dir).glob("*.json"):
-            filename = re.sub("\.json", "", os.path.basename(f))
-            print(f"ES inserting {filename}")
-            # record_id = uuid.uuid1()
-            record_id = hashlib.sha256(filename.encode())
-            with open(f, "r", encoding="utf-8") as file:
-                data = file.read()
-                json_data = json.loads(data)
-                if "text" in json_data:
-                    del json_data["text"]
-                if "pages" in json_data:
-                    del json_data["pages"]
-                if "raw_text" in json_data:
-                    del json_data["raw_text"]
-                json_data["_id"] = record_id.hexdigest()
-                # json_data['_id'] = record_id
-                yield json_data
+        """Load index-ready docs from ingest_dir.
+        Files are read, parsed and stripped in a process pool so only the (much smaller) stripped docs
+        come back to this process. At most json_load_workers * 4 docs are in flight, so loading
+        overlaps with indexing without reading the whole dir into memory.
+        Workers are spawned rather than forked, the executor starts them lazily while bulk_index threads
+        already hold connection pool locks."""
+        files = Path(self.ingest_dir).glob("*.json")
+        max_in_flight = self.json_load_workers * 4
+        with ProcessPoolExecutor(
+            max_workers=self.json_load_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            in_flight = deque()
+            for f in files:
+                in_flight.append(executor.submit(load_index_doc, str(f)))
+                if len(in_flight) >= max_in_flight:
+                    yield from self._pop_loaded(in_flight)
+            while in_flight:
+                yield from self._pop_loaded(in_flight)
+
+    @staticmethod
+    def _pop_loaded(in_flight):
+        filename, json_data = in_flight.popleft().result()
+        print(f"ES inserting {filename}")
+        yield json_data
 
     def get_actions(self, json_dicts):
         for json_dict in json_dicts:
             yield dict(_op_type="index", _index=self.index_name, **json_dict)
 
-    def index_jsons(self):
-        print("Starting to indexing json files")
+    def chunk_actions(self, actions):
+        """Group actions into chunks bounded by both bulk_chunk_size docs and bulk_max_chunk_bytes bytes,
+        yields (chunk, chunk_bytes). A single doc larger than the byte bound gets a chunk of its own.
+        Actions are expanded into (action line, serialized source) pairs here, the source is serialized
+        once to measure it and the same string is sent, so _send_chunk doesn't serialize it again.
+        The small action line stays a dict, the bulk helper reads it when reporting failed docs."""
+        serializer = self.es.transport.serializer
+        chunk, chunk_bytes = [], 0
+        for action in actions:
+            action_line, source = helpers.expand_action(action)
+            # +1 per line for the trailing new line
+            action_bytes = len(serializer.dumps(action_line).encode("utf-8")) + 1
+            if source is not None:
+                source = serializer.dumps(source)
+                action_bytes += len(source.encode("utf-8")) + 1
+            if chunk and (
+                len(chunk) >= self.bulk_chunk_size
+                or chunk_bytes + action_bytes > self.bulk_max_chunk_bytes
+            ):
+                yield chunk, chunk_bytes
+                chunk, chunk_bytes = [], 0
+            chunk.append((action_line, source))
+            chunk_bytes += action_bytes
+        if chunk:
+            yield chunk, chunk_bytes
+
+    def _send_chunk(self, chunk):
+        """Send one chunk as a single _bulk request, 429s are retried with exponential backoff"""
+        results = []
+        for success, info in helpers.streaming_bulk(
+            client=self.es,
+            actions=chunk,
+            # already expanded by chunk_actions, the serialized sources are strings the serializer passes through
+            expand_action_callback=lambda expanded: expanded,
+            chunk_size=len(chunk),
+            # chunk is already byte bounded, don't let the helper split it again
+            max_chunk_bytes=sys.maxsize,
+            max_retries=self.bulk_max_retries,
+            initial_backoff=2,
+            max_backoff=120,
+            raise_on_error=False,
+            raise_on_exception=False,
+        ):
+            results.append((success, info))
+        return results
+
+    def bulk_index(self, actions):
+        """Index actions with bulk_thread_count concurrent _bulk requests and report throughput"""
+        count_success, error_count, total_bytes = 0, 0, 0
+        start = time()
+
+        def handle(done_futures):
+            nonlocal count_success, error_count
+            for fut in done_futures:
+                for success, info in fut.result():
+                    if not success:
+                        error_count += 1
+                        print("Doc failed", info)
+                    else:
+                        count_success += 1
 
-        count_success, error_count = 0, 0
         try:
-            for success, info in helpers.parallel_bulk(
-                client=self.es,
-                actions=self.get_actions(self.get_jdicts()),
-                thread_count=10,
-                chunk_size=1,
-                raise_on_exception=False,
-                queue_size=1,
-            ):
-                if not success:
-                    error_count += 1
-                    print("Doc failed", info)
-                else:
-                    count_success += 1
+            with ThreadPoolExecutor(max_workers=self.bulk_thread_count) as executor:
+                in_flight = set()
+                for chunk, chunk_bytes in self.chunk_actions(actions):
+                    total_bytes += chunk_bytes
+                    # bound the number of chunks held in memory
+                    if len(in_flight) >= self.bulk_thread_count * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        handle(done)
+                    in_flight.add(executor.submit(self._send_chunk, chunk))
+                handle(wait(in_flight).done)
         except UnicodeEncodeError as e:
             print(e)
             print(
                 "------------------  Failed to index files. --------------------------"
             )
 
+        elapsed = max(time() - start, 1e-6)
         # results = queue.deque(load_gen, maxlen=0)
         print("Number of Successfully index: " + str(count_success))
         print("Number of Failed index: " + str(error_count))
+        print(
+            f"Indexed {count_success + error_count} docs ({total_bytes / 1024 / 1024:.1f} MB) in {elapsed:.1f}s: "
+            f"{(count_success + error_count) / elapsed:.1f} docs/s, {total_bytes / 1024 / 1024 / elapsed:.2f} MB/s"
+        )
+        return count_success, error_count
+
+    def _get_index_settings(self):
+        settings = self.es.indices.get_settings(index=self.index_name)
+        return settings[self.index_name]["settings"]["index"]
+
+    def index_jsons(self, fresh_index_build=False):
+        """Index the parsed jsons in ingest_dir
+        :param fresh_index_build: disable refreshes and replicas while indexing, restored afterwards.
+            Only for indexes that aren't serving searches yet.
+        """
+        print("Starting to indexing json files")
+
+        restore_settings = None
+        if fresh_index_build:
+            index_settings = self._get_index_settings()
+            restore_settings = {
+                "refresh_interval": index_settings.get("refresh_interval", "1s"),
+                "number_of_replicas": index_settings.get("number_of_replicas", "1"),
+            }
+            self.es.indices.put_settings(
+                index=self.index_name,
+                body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}},
+            )
+
+        try:
+            self.bulk_index(self.get_actions(self.get_jdicts()))
+        finally:
+            if restore_settings:
+                self.es.indices.put_settings(index=self.index_name, body={"index": restore_settings})
+                self.es.indices.refresh(index=self.index_name)
+
         print("Finished indexing json files")
 
     def create_index(self):
@@ -194,6 +327,7 @@ class ConfiguredElasticsearchPublisher(ElasticsearchPublisher):
         index_name: str,
         mapping_file: t.Optional[t.Union[str, Path]] = None,
         alias: t.Optional[str] = None,
+        **bulk_kwargs,
     ):
         if ingest_dir:
             ingest_dir = str(Path(ingest_dir).resolve())
@@ -210,6 +344,7 @@ class ConfiguredElasticsearchPublisher(ElasticsearchPublisher):
             username="pass",
             password="pass",
             environment="local",
+            **bulk_kwargs,
         )
 
         self.ingest_dir = ingest_dir
@@ -300,29 +435,5 @@ class ConfiguredEntityPublisher(ConfiguredElasticsearchPublisher):
 
     def index_jsons(self):
         print("Starting to index entities")
-
-        count_success, error_count = 0, 0
-        try:
-            for success, info in helpers.parallel_bulk(
-                client=self.es,
-                actions=self.get_docs(),
-                thread_count=10,
-                chunk_size=1,
-                raise_on_exception=False,
-                queue_size=1,
-            ):
-                if not success:
-                    error_count += 1
-                    print("Doc failed", info)
-                else:
-                    count_success += 1
-        except UnicodeEncodeError as e:
-            print(e)
-            print(
-                "------------------  Failed to index files. --------------------------"
-            )
-
-        # results = queue.deque(load_gen, maxlen=0)
-        print("Number of Successfully index: " + str(count_success))
-        print("Number of Failed index: " + str(error_count))
+        self.bulk_index(self.get_docs())
         print("Finished indexing json files")
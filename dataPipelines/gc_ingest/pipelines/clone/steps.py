@@ -38,7 +38,8 @@ class CloneIngestSteps(PipelineSteps):
             announce("Backing up DB(s) ...")
             c.clone_db_manager.backup_all_tables_for_all_dbs(
                 ts=c.batch_timestamp,
-                job_dir=c.db_backup_dir
+                job_dir=c.db_backup_dir,
+                max_threads=c.max_s3_threads
             )
 
     @staticmethod
@@ -60,7 +61,8 @@ class CloneIngestSteps(PipelineSteps):
         if not c.skip_snapshot_backup:
             announce("Backing up current snapshots ...")
             c.snapshot_manager.backup_all_current_snapshots(
-                snapshot_ts=c.batch_timestamp
+                snapshot_ts=c.batch_timestamp,
+                max_threads=c.max_s3_threads
             )
             
     @staticmethod
@@ -16,6 +16,12 @@ def core_cli():
     pass
 
 
+def move_dir_files(src_dir: Path, dst_dir: Path) -> None:
+    """Move the files at the top of src_dir into dst_dir, a rename when both are on the same filesystem"""
+    for f in (p for p in src_dir.iterdir() if p.is_file()):
+        shutil.move(str(f), str(Path(dst_dir, f.name)))
+
+
 @core_cli.group(name='ingest')
 @CoreIngestConfig.pass_options
 @click.pass_context
@@ -84,16 +90,26 @@ def core_checkpoint_ingest(core_ingest_config: CoreIngestConfig, **kwargs):
     announce("Aggregating files for processing ...")
     announce(f"Aggregating files from checkpoints ...")
     last_prefix: t.Optional[TimestampedPrefix] = None
-    with cig.checkpoint_manager.checkpoint_download_manager(
+    checkpoint_manager_kwargs = dict(
         base_download_dir=cig.download_base_dir,
         advance_checkpoint=cig.advance_checkpoint,
         limit=cig.checkpoint_limit if cig.checkpoint_limit > 0 else None,
         max_threads=cig.max_threads
-    ) as downloaded_prefixes:
-        for dp in downloaded_prefixes:
-            last_prefix = dp.timestamped_prefix
-            for f in (p for p in dp.local_path.iterdir() if p.is_file()):
-                shutil.copy(str(f), str(Path(cig.raw_doc_base_dir, f.name)))
+    )
+    if cig.stream_checkpoints:
+        with cig.checkpoint_manager.checkpoint_stream_manager(**checkpoint_manager_kwargs) as downloaded_prefixes:
+            for dp in downloaded_prefixes:
+                last_prefix = dp.timestamped_prefix
+                # OCR rewrites raw docs in place, so they're moved over only once parsed.
+                # The downloader thread keeps running meanwhile, so parse processes must not be forked from here,
+                # a forked child would inherit whatever locks (s3 listing cache, connection pools) it holds
+                CoreIngestSteps.parse_and_ocr(cig, source_dir=dp.local_path, mp_start_method="forkserver")
+                move_dir_files(dp.local_path, cig.raw_doc_base_dir)
+    else:
+        with cig.checkpoint_manager.checkpoint_download_manager(**checkpoint_manager_kwargs) as downloaded_prefixes:
+            for dp in downloaded_prefixes:
+                last_prefix = dp.timestamped_prefix
+                move_dir_files(dp.local_path, cig.raw_doc_base_dir)
 
     if not last_prefix:
         announce("There was nothing to do, skipping remainder of ingest ...")
@@ -108,7 +124,8 @@ def core_checkpoint_ingest(core_ingest_config: CoreIngestConfig, **kwargs):
     CoreIngestSteps.backup_db(cig)
     CoreIngestSteps.backup_snapshots(cig)
     CoreIngestSteps.update_thumbnails(cig)
-    CoreIngestSteps.parse_and_ocr(cig)
+    if not cig.stream_checkpoints:
+        CoreIngestSteps.parse_and_ocr(cig)
     CoreIngestSteps.load_files(cig)
     CoreIngestSteps.update_s3_snapshots(cig)
     CoreIngestSteps.refresh_materialized_tables(cig)
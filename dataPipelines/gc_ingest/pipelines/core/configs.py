@@ -55,6 +55,7 @@ class CoreIngestConfig(IngestConfig):
     force_ocr: bool = False
     skip_neo4j_update: bool = False
     skip_snapshot_backup: bool = False
+    incremental_snapshot_backup: bool = False
     skip_db_backup: bool = False
     skip_db_update: bool = False
     skip_revocation_update: bool = False
@@ -64,6 +65,9 @@ class CoreIngestConfig(IngestConfig):
     backup_snapshot_prefix: NonBlankString
     infobox_dir: t.Optional[StrippedString] = None
     es_mapping_file: t.Optional[StrippedString] = None
+    parse_cache: t.Optional[StrippedString] = None
+    parse_worker_max_docs: int = 200
+    parse_worker_max_rss_mb: int = 4096
 
     @property
     def snapshot_manager(self) -> SnapshotManager:
@@ -217,6 +221,13 @@ class CoreIngestConfig(IngestConfig):
             help="Skip step to backup snapshots to s3",
             show_default=True
         )
+        @click.option(
+            '--incremental-snapshot-backup',
+            type=bool,
+            default=False,
+            help="Only backup snapshot files changed since the previous incremental backup",
+            show_default=True
+        )
         @click.option(
             '--skip-db-backup',
             type=bool,
@@ -333,6 +344,27 @@ class CoreIngestConfig(IngestConfig):
             required=False,
             help="Path to a non-default es mapping file"
         )
+        @click.option(
+            '--parse-cache',
+            type=str,
+            required=False,
+            default=None,
+            help="Local dir or s3://bucket/prefix of a parse cache, docs parsed before are served from it"
+        )
+        @click.option(
+            '--parse-worker-max-docs',
+            type=int,
+            default=200,
+            show_default=True,
+            help="Docs after which a parse worker process is replaced"
+        )
+        @click.option(
+            '--parse-worker-max-rss-mb',
+            type=int,
+            default=4096,
+            show_default=True,
+            help="Memory (RSS, MB) after which a parse worker process is replaced"
+        )
         @pass_core_snapshot_cli_options
         @pass_core_db_cli_options
         @pass_core_load_cli_options
@@ -349,6 +381,7 @@ class CheckpointIngestConfig(CoreIngestConfig):
     checkpoint_ready_marker: t.Optional[StrippedString]
     advance_checkpoint: bool = False
     checkpoint_limit: int = -1
+    stream_checkpoints: bool = False
 
     @property
     def checkpoint_manager(self) -> CheckpointManager:
@@ -372,6 +405,13 @@ class CheckpointIngestConfig(CoreIngestConfig):
             default=-1,
             help="Number of checkpoints to process this run"
         )
+        @click.option(
+            '--stream-checkpoints',
+            type=bool,
+            default=False,
+            show_default=True,
+            help="Parse each checkpoint as soon as it's downloaded, while the next ones are downloading"
+        )
         @pass_core_checkpoint_cli_options
         @pass_advance_checkpoint_option
         @functools.wraps(f)
@@ -3,6 +3,8 @@ from dataPipelines.gc_ingest.pipelines.utils import announce
 from .configs import CoreIngestConfig, S3IngestConfig, DeleteConfig, ManifestConfig
 from dataPipelines.gc_ingest.tools.snapshot.utils import SnapshotType
 from datetime import datetime
+from pathlib import Path
+import typing as t
 from dataPipelines.gc_ingest.tools.load.cli import remove_docs_from_db
 from dataPipelines.gc_ingest.tools.snapshot.cli import remove_docs_from_current_snapshot
 from dataPipelines.gc_elasticsearch_publisher.cli import remove_docs_from_index
@@ -17,17 +19,25 @@ class PipelineSteps:
 class CoreIngestSteps(PipelineSteps):
 
     @staticmethod
-    def parse_and_ocr(c: CoreIngestConfig) -> None:
-        announce(f"Parsing and OCR'ing docs from '{c.raw_doc_base_dir}' ...")
+    def parse_and_ocr(c: CoreIngestConfig, source_dir: t.Optional[Path] = None,
+                      mp_start_method: t.Optional[str] = None) -> None:
+        """Parse docs (and metadata) from source_dir, raw_doc_base_dir by default
+        :param mp_start_method: multiprocessing start method of the parse processes, see process_dir"""
+        source_dir = source_dir or c.raw_doc_base_dir
+        announce(f"Parsing and OCR'ing docs from '{source_dir}' ...")
         pdf_to_json(
             parser_path="common.document_parser.parsers.policy_analytics.parse::parse",
-            source=str(c.raw_doc_base_dir),
+            source=str(source_dir),
             destination=str(c.parsed_doc_base_dir),
-            metadata=str(c.raw_doc_base_dir),
+            metadata=str(source_dir),
             ocr_missing_doc=True, 
             force_ocr=c.force_ocr,
             multiprocess=c.max_threads,
-            num_ocr_threads=c.max_ocr_threads
+            num_ocr_threads=c.max_ocr_threads,
+            parse_cache=c.parse_cache,
+            worker_max_docs=c.parse_worker_max_docs,
+            worker_max_rss_mb=c.parse_worker_max_rss_mb,
+            mp_start_method=mp_start_method
         )
 
     @staticmethod
@@ -45,7 +55,8 @@ class CoreIngestSteps(PipelineSteps):
             announce("Backing up DB(s) ...")
             c.core_db_manager.backup_all_tables_for_all_dbs(
                 ts=c.batch_timestamp,
-                job_dir=c.db_backup_dir
+                job_dir=c.db_backup_dir,
+                max_threads=c.max_s3_threads
             )
 
     @staticmethod
@@ -69,7 +80,9 @@ class CoreIngestSteps(PipelineSteps):
         if not c.skip_snapshot_backup:
             announce("Backing up current snapshots ...")
             c.snapshot_manager.backup_all_current_snapshots(
-                snapshot_ts=c.batch_timestamp
+                snapshot_ts=c.batch_timestamp,
+                max_threads=c.max_s3_threads,
+                incremental=c.incremental_snapshot_backup
             )
 
     @staticmethod
@@ -81,19 +94,22 @@ class CoreIngestSteps(PipelineSteps):
             local_dir=c.raw_doc_base_dir,
             snapshot_type=SnapshotType.RAW,
             replace=False,
-            max_threads=c.max_s3_threads
+            max_threads=c.max_s3_threads,
+            sync=True
         )
         c.snapshot_manager.update_current_snapshot_from_disk(
             local_dir=c.parsed_doc_base_dir,
             snapshot_type=SnapshotType.PARSED,
             replace=False,
-            max_threads=c.max_s3_threads
+            max_threads=c.max_s3_threads,
+            sync=True
         )
         c.snapshot_manager.update_current_snapshot_from_disk(
             local_dir=c.thumbnail_doc_base_dir,
             snapshot_type=SnapshotType.THUMBNAIL,
             replace=False,
-            max_threads=c.max_s3_threads
+            max_threads=c.max_s3_threads,
+            sync=True
         )
 
     @staticmethod
@@ -4,6 +4,8 @@ from contextlib import contextmanager
 from pathlib import Path
 import datetime as dt
 import typing as t
+import queue
+import threading
 
 
 class DownloadedPrefix(t.NamedTuple):
@@ -188,4 +190,76 @@ class CheckpointManager:
             ]
         finally:
             if prefixes and advance_checkpoint:
-                self.current_checkpoint_ts = prefixes[-1].timestamp
\ No newline at end of file
+                self.current_checkpoint_ts = prefixes[-1].timestamp
+
+    @contextmanager
+    def checkpoint_stream_manager(self,
+                                  base_download_dir: t.Union[str, Path],
+                                  advance_checkpoint: bool = False,
+                                  limit: t.Optional[int] = None,
+                                  max_threads: int = -1,
+                                  prefetch: int = 1
+                                  ) -> t.ContextManager[t.Iterator[DownloadedPrefix]]:
+        """Like checkpoint_download_manager, but yields each checkpoint as soon as it's downloaded while the next ones
+        download in the background, so they can be processed while the rest is still downloading.
+        Download errors are raised from the iterator. The checkpoint only advances up to the last yielded checkpoint,
+        ones that were never downloaded or never handed out are left for the next run.
+        Don't fork from the loop body, the downloader thread may hold locks at any time. Use a spawn/forkserver context.
+        :param base_download_dir: Local base directory where checkpointed dirs will be downloaded
+        :param advance_checkpoint: Whether or not the checkpoint file should be updated after the last yielded checkpoint
+        :param limit: max number of checkpointed dirs to download
+        :param max_threads: maximum number of threads for multithreading
+        :param prefetch: max number of downloaded checkpoints waiting to be processed
+        :return: Iterator of tuples (local_downloaded_dir, timestamp_prefix)
+        """
+        prefixes = self.remaining_prefixes[:limit]
+        base_download_dir = Path(base_download_dir).resolve()
+        if not base_download_dir.is_dir():
+            raise ValueError(f"Provided base_download_dir does not exist: {base_download_dir!s}")
+
+        downloaded: queue.Queue = queue.Queue(maxsize=max(1, prefetch))
+        stop = threading.Event()
+        done = object()
+        yielded: t.List[TimestampedPrefix] = []
+
+        def download_all() -> None:
+            try:
+                for prefix in prefixes:
+                    if stop.is_set():
+                        return
+                    download_dir = Path(base_download_dir, Path(prefix.prefix_path).name)
+                    self.pull_prefix(
+                        prefix=prefix,
+                        local_dir=download_dir,
+                        max_threads=max_threads
+                    )
+                    downloaded.put(DownloadedPrefix(local_path=download_dir, timestamped_prefix=prefix))
+            except Exception as e:
+                downloaded.put(e)
+            finally:
+                downloaded.put(done)
+
+        def iter_downloaded() -> t.Iterator[DownloadedPrefix]:
+            while True:
+                item = downloaded.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yielded.append(item.timestamped_prefix)
+                yield item
+
+        downloader = threading.Thread(target=download_all, daemon=True)
+        downloader.start()
+        try:
+            yield iter_downloaded()
+        finally:
+            stop.set()
+            # unblock the downloader if it's waiting on a full queue
+            while downloader.is_alive():
+                try:
+                    downloaded.get(timeout=1)
+                except queue.Empty:
+                    pass
+            if yielded and advance_checkpoint:
+                self.current_checkpoint_ts = yielded[-1].timestamp
@@ -96,16 +96,45 @@ def db_cli(
 pass_core_dbm = click.make_pass_decorator(CoreDBManager)
 
 
+def common_stream_options(f):
+    @click.option(
+        '--stream',
+        type=bool,
+        default=True,
+        show_default=True,
+        help="Stream gzipped tables directly between S3 and the db, concurrently, without going through download dir"
+    )
+    @click.option(
+        '--max-threads',
+        type=int,
+        default=-1,
+        show_default=True,
+        help="Max number of tables streamed at once, -1 for cpu count"
+    )
+    @functools.wraps(f)
+    def wf(*args, **kwargs):
+        return f(*args, **kwargs)
+    return wf
+
+
 @db_cli.command(name='backup')
+@common_stream_options
 @common_backup_options
 @common_options
 @pass_core_dbm
-def backup(dbm: CoreDBManager, db: str, download_dir: t.Optional[str], ts: dt.datetime) -> None:
+def backup(dbm: CoreDBManager,
+           db: str,
+           download_dir: t.Optional[str],
+           ts: dt.datetime,
+           stream: bool,
+           max_threads: int) -> None:
     """Backup DB tables"""
     dbm.backup_all_tables(
         db_type=db,
         ts=ts,
-        job_dir=download_dir or None
+        job_dir=download_dir or None,
+        stream=stream,
+        max_threads=max_threads
     )
 
 
@@ -117,16 +146,25 @@ def backup(dbm: CoreDBManager, db: str, download_dir: t.Optional[str], ts: dt.da
     show_default=True,
     help="Wipe out destination tables before restoring them"
 )
+@common_stream_options
 @common_backup_options
 @common_options
 @pass_core_dbm
-def restore(dbm: CoreDBManager, db: str, ts: dt.datetime, download_dir: t.Optional[str], replace: bool) -> None:
+def restore(dbm: CoreDBManager,
+            db: str,
+            ts: dt.datetime,
+            download_dir: t.Optional[str],
+            replace: bool,
+            stream: bool,
+            max_threads: int) -> None:
     """Restore DB tables"""
     dbm.restore_all_tables(
         db_type=db,
         ts=ts,
         job_dir=download_dir or None,
-        truncate_first=replace
+        truncate_first=replace,
+        stream=stream,
+        max_threads=max_threads
     )
 
 
@@ -1,6 +1,8 @@
-from dataPipelines.gc_db_utils.utils import export_to_csv, import_from_csv, truncate_table, check_if_table_or_view_exists
+from dataPipelines.gc_db_utils.utils import export_to_csv, import_from_csv, truncate_table, check_if_table_or_view_exists, \
+    run_piped, CsvTarget
 from dataPipelines.gc_db_utils.orch.utils import recreate_tables_and_views as recreate_orch_db_schema
-from dataPipelines.gc_db_utils.web.utils import recreate_tables_and_views as recreate_web_db_schema, seed_dafa_charter_map
+from dataPipelines.gc_db_utils.web.utils import recreate_tables_and_views as recreate_web_db_schema, seed_dafa_charter_map, \
+    refresh_snapshot_table
 from enum import Enum
 import typing as t
 from dataPipelines.gc_ingest.config import Config
@@ -9,9 +11,10 @@ from common.utils.parsers import parse_timestamp
 import datetime as dt
 from pathlib import Path
 import sys
+import time
 from tempfile import TemporaryDirectory
-from dataPipelines.gc_db_utils.web.models import SnapshotEntry
-from dataPipelines.gc_db_utils.web.schemas import SnapshotEntrySchema
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.s3.transfer import TransferConfig
 from dataPipelines.gc_db_utils.orch.models import SnapshotViewEntry
 
 
@@ -26,6 +29,9 @@ class CoreDBManager:
         DBType.ORCH: {'versioned_docs', 'publications', 'pipeline_jobs'},
         DBType.WEB: {'dafa_charter_map', 'gc_document_corpus_snapshot'}
     }
+    # tables that other backed up tables reference, restored before the rest
+    RESTORE_FIRST_TABLES: t.FrozenSet[str] = frozenset({'publications'})
+    STREAMED_BACKUP_FILE_EXTENSION = '.csv.gz'
 
     def __init__(self,
                  db_backup_base_prefix: str,
@@ -93,27 +99,13 @@ class CoreDBManager:
                 yield obj
 
     # TODO: remove recreate db snapshot functions/cli out of dataPipelines.gc_ingest.tools.snapshot
-    # TODO: create a more generic function for materializing views from one db to another with optional field remapping
     def _refresh_web_db_snapshot(self) -> None:
         """Recreate snapshot table in web db using snapshot view from orch db"""
-
-        # TODO: see if we can use csv export/import with io buffer instead of this
-        # TODO: See if we can do atomic update instead of truncate to improve availability
-        with Config.connection_helper.web_db_session_scope('rw') as session:
-            web_db_entries = [
-                SnapshotEntry(**{k: getattr(orch_entry, k) for k, _ in SnapshotEntrySchema.__dict__.items() if not k.startswith('_')})
-                for orch_entry in self._get_orch_db_snapshot_entries()
-            ]
-
-            if not web_db_entries:
-                return
-
-            truncate_table(
-                db_engine=self.get_db_engine(db_type=DBType.WEB),
-                table=str(SnapshotEntry.__tablename__),
-                cascade=True
-            )
-            session.add_all(web_db_entries)
+        refresh_snapshot_table(
+            orch_engine=self.get_db_engine(db_type=DBType.ORCH),
+            web_engine=self.get_db_engine(db_type=DBType.WEB),
+            orch_snapshot_view=str(SnapshotViewEntry.__tablename__)
+        )
 
     def refresh_materialized_tables(self, db_type: t.Union[DBType, str]) -> None:
         """Refreshes materialized or seeded tables/views"""
@@ -135,17 +127,18 @@ class CoreDBManager:
     def export_table_or_view(self,
                              db_type: t.Union[DBType, str],
                              table_or_view: str,
-                             output_file: t.Union[Path, str],
-                             schema: str = 'public'):
+                             output_file: CsvTarget,
+                             schema: str = 'public',
+                             compressed: bool = False):
         """Import table from file
         :param db_type: db type - web/orch
         :param table: table_or_view to read from
-        :param output_file: file to export to
+        :param output_file: file or writable binary file object to export to
         :param schema: table_or_view schema
+        :param compressed: whether to gzip the output
         """
         db_type = DBType(db_type)
         db_engine = self.get_db_engine(db_type=db_type)
-        output_file = Path(output_file).resolve()
 
         if not check_if_table_or_view_exists(db_engine=db_engine, table_or_view=table_or_view, schema=schema):
             raise LookupError(f"Can't export from '{schema}.{table_or_view}' - does not exist in '{db_type.value}' db.")
@@ -154,23 +147,25 @@ class CoreDBManager:
             db_engine=db_engine,
             output_file=output_file,
             table_or_view=table_or_view,
-            schema=schema
+            schema=schema,
+            compressed=compressed
         )
 
     def import_table(self,
                      db_type: t.Union[DBType, str],
                      table: str,
-                     input_file: t.Union[Path, str],
-                     schema: str = 'public'):
+                     input_file: CsvTarget,
+                     schema: str = 'public',
+                     compressed: bool = False):
         """Import table from file
         :param db_type: db type - web/orch
         :param table: table to write into
-        :param input_file: file to import from
+        :param input_file: file or readable binary file object to import from
         :param schema: table schema
+        :param compressed: whether input is gzipped
         """
         db_type = DBType(db_type)
         db_engine = self.get_db_engine(db_type=db_type)
-        input_file = Path(input_file).resolve()
 
         if not check_if_table_or_view_exists(db_engine=db_engine, table_or_view=table, schema=schema):
             raise LookupError(f"Can't load into '{schema}.{table}' - does not exist in '{db_type.value}' db.")
@@ -179,7 +174,8 @@ class CoreDBManager:
             db_engine=db_engine,
             input_file=input_file,
             table=table,
-            schema=schema
+            schema=schema,
+            compressed=compressed
         )
 
     def export_all_tables(self,
@@ -218,33 +214,166 @@ class CoreDBManager:
             raise ValueError(f"Given import dir doesn't exist: {import_base_dir!s}")
 
         restoreable_tables = self.BACKUP_TABLES_MAP[db_type]
-        importable_files = [p for p in import_base_dir.glob("*.csv")]
-        importable_tables = [p.stem for p in importable_files]
+        importable_files = [p for p in import_base_dir.glob("*.csv")] + \
+            [p for p in import_base_dir.glob("*" + self.STREAMED_BACKUP_FILE_EXTENSION)]
+        importable_tables = [p.name.split('.', 1)[0] for p in importable_files]
 
         if not restoreable_tables >= set(importable_tables):
             expected_files = [t + '.csv' for t in restoreable_tables]
             raise ValueError(f"Could not find appropriate backup files in the dir. "
                                f"- looking for {expected_files}, but found these instead: {[p.name for p in importable_files]}")
 
-        for table_name, import_file_path in ((p.stem, p) for p in importable_files if p.stem in restoreable_tables):
+        for table_name, import_file_path in zip(importable_tables, importable_files):
+            if table_name not in restoreable_tables:
+                continue
             print(f"Importing Table:{table_name} from {import_file_path!s}", file=sys.stderr)
             self.import_table(
                 db_type=db_type,
                 table=table_name,
-                input_file=import_file_path
+                input_file=import_file_path,
+                compressed=import_file_path.suffix == '.gz'
             )
 
+    def get_backup_object_path(self, db_type: t.Union[DBType, str], table: str, ts: t.Union[dt.datetime, str]) -> str:
+        """Get S3 path of a streamed table backup"""
+        return self.s3u.path_join(
+            self.get_backup_prefix(db_type=db_type, ts=ts),
+            table + self.STREAMED_BACKUP_FILE_EXTENSION
+        )
+
+    def get_backup_object_paths(self, db_type: t.Union[DBType, str], ts: t.Union[dt.datetime, str]) -> t.Dict[str, str]:
+        """Get {table: s3 path} of backed up tables at given timestamp, streamed (.csv.gz) or not (.csv)"""
+        db_type = DBType(db_type)
+        backup_prefix = self.s3u.format_as_prefix(self.get_backup_prefix(db_type=db_type, ts=ts))
+
+        object_paths: t.Dict[str, str] = {}
+        for object_path in self.s3u.iter_object_paths_at_prefix(prefix=backup_prefix):
+            file_name = object_path[len(backup_prefix):]
+            for ext in (self.STREAMED_BACKUP_FILE_EXTENSION, '.csv'):
+                if file_name.endswith(ext):
+                    object_paths[file_name[:-len(ext)]] = object_path
+                    break
+
+        restoreable_tables = self.BACKUP_TABLES_MAP[db_type]
+        if not restoreable_tables >= set(object_paths.keys()):
+            raise ValueError(f"Could not find appropriate backup files at {backup_prefix} "
+                             f"- looking for {sorted(restoreable_tables)}, but found these instead: {sorted(object_paths)}")
+        return object_paths
+
+    def stream_table_backup(self, db_type: t.Union[DBType, str], table: str, object_path: str) -> str:
+        """Stream gzipped csv export of a table straight into a multipart S3 upload, without touching local disk
+        :param db_type: db type - web/orch
+        :param table: table to back up
+        :param object_path: S3 path of the backup object
+        :return: S3 path of the backup object
+        """
+        db_type = DBType(db_type)
+        start = time.time()
+        run_piped(
+            write_func=lambda fd: self.export_table_or_view(
+                db_type=db_type, table_or_view=table, output_file=fd, compressed=True),
+            read_func=lambda fd: self.s3u.upload_fileobj(fileobj=fd, object_path=object_path)
+        )
+        print(f"Backed up {db_type.value} Table:{table} to {object_path} in {time.time() - start:.1f}s", file=sys.stderr)
+        return object_path
+
+    def stream_table_restore(self, db_type: t.Union[DBType, str], table: str, object_path: str) -> str:
+        """Stream S3 table backup straight into COPY ... FROM STDIN, without touching local disk
+        :param db_type: db type - web/orch
+        :param table: table to restore
+        :param object_path: S3 path of the backup object, gzipped if it ends with .gz
+        :return: S3 path of the backup object
+        """
+        db_type = DBType(db_type)
+        start = time.time()
+        run_piped(
+            write_func=lambda fd: self.s3u.download_fileobj(object_path=object_path, fileobj=fd),
+            read_func=lambda fd: self.import_table(
+                db_type=db_type, table=table, input_file=fd, compressed=object_path.endswith('.gz'))
+        )
+        print(f"Restored {db_type.value} Table:{table} from {object_path} in {time.time() - start:.1f}s", file=sys.stderr)
+        return object_path
+
+    def _stream_backups(self, db_types: t.List[DBType], ts: dt.datetime, max_threads: int) -> None:
+        """Stream backups of all tables of given dbs concurrently"""
+        for db_type in db_types:
+            backup_prefix = self.get_backup_prefix(db_type=db_type, ts=ts)
+            if self.s3u.prefix_exists(backup_prefix):
+                raise ValueError(f"Cannot backup to given timestamped prefix because it already exists: {backup_prefix}")
+            print(f"Backing up {db_type.value} tables to S3 {backup_prefix}.", file=sys.stderr)
+
+        max_workers = S3Utils.get_max_workers(max_threads)
+        # every streamed table runs its own multipart transfer threads
+        self.ch.ensure_s3_pool_connections(max_workers * TransferConfig().max_concurrency)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.stream_table_backup,
+                    db_type=db_type,
+                    table=table,
+                    object_path=self.get_backup_object_path(db_type=db_type, table=table, ts=ts)
+                )
+                for db_type in db_types
+                for table in sorted(self.BACKUP_TABLES_MAP[db_type])
+            ]
+            for future in as_completed(futures):
+                future.result()
+
+    def _stream_restores(self,
+                         db_types: t.List[DBType],
+                         ts: dt.datetime,
+                         max_threads: int,
+                         truncate_first: bool) -> None:
+        """Stream restores of all tables of given dbs concurrently, tables others depend on go first"""
+        object_paths = {db_type: self.get_backup_object_paths(db_type=db_type, ts=ts) for db_type in db_types}
+
+        if truncate_first:
+            print("Truncating tables before import ...", file=sys.stderr)
+            for db_type in db_types:
+                self.truncate_backup_tables(db_type=db_type)
+
+        jobs = [(db_type, table, object_path)
+                for db_type in db_types
+                for table, object_path in sorted(object_paths[db_type].items())]
+        waves = [
+            [job for job in jobs if job[1] in self.RESTORE_FIRST_TABLES],
+            [job for job in jobs if job[1] not in self.RESTORE_FIRST_TABLES]
+        ]
+
+        max_workers = S3Utils.get_max_workers(max_threads)
+        # every streamed table runs its own multipart transfer threads
+        self.ch.ensure_s3_pool_connections(max_workers * TransferConfig().max_concurrency)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for wave in waves:
+                futures = [
+                    executor.submit(self.stream_table_restore, db_type=db_type, table=table, object_path=object_path)
+                    for db_type, table, object_path in wave
+                ]
+                for future in as_completed(futures):
+                    future.result()
+
     def backup_all_tables(self,
                           db_type: t.Union[DBType, str],
                           ts: t.Union[dt.datetime, str],
-                          job_dir: t.Optional[t.Union[Path, str]] = None) -> None:
+                          job_dir: t.Optional[t.Union[Path, str]] = None,
+                          stream: bool = True,
+                          max_threads: int = -1) -> None:
         """Backup all tables for given db_type to S3
         :param db_type: type of db - web/orch
         :param ts: backup timestamp that determines s3 backup path
-        :param job_dir: directory used to store downloaded files - temp dir by default
+        :param job_dir: directory used to store exported files - temp dir by default, unused when streaming
+        :param stream: stream gzipped exports of all tables concurrently straight to S3 instead of going through disk
+        :param max_threads: max number of tables backed up at once when streaming, -1 for cpu count
         """
         db_type = DBType(db_type)
         ts = parse_timestamp(ts, raise_parse_error=True)
+
+        if stream:
+            self._stream_backups(db_types=[db_type], ts=ts, max_threads=max_threads)
+            return
+
         backup_prefix = self.get_backup_prefix(db_type=db_type, ts=ts)
 
         if self.s3u.prefix_exists(backup_prefix):
@@ -268,10 +397,16 @@ class CoreDBManager:
 
     def backup_all_tables_for_all_dbs(self,
                                       ts: t.Union[dt.datetime, str],
-                                      job_dir: t.Optional[t.Union[Path, str]] = None) -> None:
-        """Backup all tables for all databases"""
+                                      job_dir: t.Optional[t.Union[Path, str]] = None,
+                                      stream: bool = True,
+                                      max_threads: int = -1) -> None:
+        """Backup all tables for all databases, see backup_all_tables"""
         ts = parse_timestamp(ts, raise_parse_error=True)
 
+        if stream:
+            self._stream_backups(db_types=list(DBType), ts=ts, max_threads=max_threads)
+            return
+
         for dbt in DBType:
             td = None
             try:
@@ -296,12 +431,16 @@ class CoreDBManager:
                            db_type: t.Union[DBType, str],
                            ts: t.Union[dt.datetime, str],
                            job_dir: t.Optional[t.Union[Path, str]] = None,
-                           truncate_first: bool = False) -> None:
+                           truncate_first: bool = False,
+                           stream: bool = True,
+                           max_threads: int = -1) -> None:
         """Restore all tables for db_type from given backup timestamp
         :param ts: backup timestamp that determines s3 backup path
         :param db_type: DB type - web/orch
-        :param job_dir: directory used to store downloaded files - temp dir by default
+        :param job_dir: directory used to store downloaded files - temp dir by default, unused when streaming
         :param truncate_first: whether to truncate target db tables before importing data
+        :param stream: stream backups concurrently from S3 straight into the tables instead of going through disk
+        :param max_threads: max number of tables restored at once when streaming, -1 for cpu count
         """
         db_type = DBType(db_type)
         ts = parse_timestamp(ts, raise_parse_error=True)
@@ -310,6 +449,11 @@ class CoreDBManager:
         if not self.s3u.prefix_exists(backup_prefix):
             raise ValueError(f"There is no backup at given prefix to import: {backup_prefix}")
 
+        if stream:
+            print(f"Restoring from backups at {backup_prefix}.", file=sys.stderr)
+            self._stream_restores(db_types=[db_type], ts=ts, max_threads=max_threads, truncate_first=truncate_first)
+            return
+
         try:
             td = None
             if job_dir:
@@ -332,10 +476,20 @@ class CoreDBManager:
     def restore_all_tables_for_all_dbs(self,
                                        ts: t.Union[dt.datetime, str],
                                        job_dir: t.Optional[t.Union[Path, str]] = None,
-                                       truncate_first: bool = False) -> None:
-        """Restore all tables for all databases"""
+                                       truncate_first: bool = False,
+                                       stream: bool = True,
+                                       max_threads: int = -1) -> None:
+        """Restore all tables for all databases, see restore_all_tables"""
         ts = parse_timestamp(ts, raise_parse_error=True)
 
+        if stream:
+            for dbt in DBType:
+                backup_prefix = self.get_backup_prefix(db_type=dbt, ts=ts)
+                if not self.s3u.prefix_exists(backup_prefix):
+                    raise ValueError(f"There is no backup at given prefix to import: {backup_prefix}")
+            self._stream_restores(db_types=list(DBType), ts=ts, max_threads=max_threads, truncate_first=truncate_first)
+            return
+
         for dbt in DBType:
             td = None
             try:
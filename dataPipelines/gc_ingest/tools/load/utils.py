@@ -61,6 +61,8 @@ class LoadManager:
     METADATA_DOC_EXTENSION = '.metadata'
     PARSED_DOC_EXTENSION = '.json'
     THUMBNAIL_EXTENSION = '.png'
+    # max rows per batched db statement
+    DB_BULK_BATCH_SIZE = 1000
 
     def __init__(self,
                  load_archive_base_prefix: str,
@@ -220,13 +222,65 @@ class LoadManager:
                 thumbnail_idoc=_get_corresponding_thumbnail_idoc(raw_doc=raw_doc_path, thumbnail_dir=thumbnail_dir)
             )
 
-    def process_db_pub_updates(self, idgs: t.Iterable[IngestableDocGroup]) -> None:
+    @staticmethod
+    def _iter_batches(items: t.List[t.Any], batch_size: int) -> t.Iterable[t.List[t.Any]]:
+        for i in range(0, len(items), batch_size):
+            yield items[i:i + batch_size]
+
+    @staticmethod
+    def _supports_bulk_upsert(session) -> bool:
+        """Bulk path relies on postgres INSERT ... ON CONFLICT or sqlite INSERT OR IGNORE"""
+        return session.get_bind().dialect.name in ('postgresql', 'sqlite')
+
+    def _bulk_get_or_create_pub_ids(self, docs: t.Dict[str, t.Dict[str, t.Any]], session) -> t.Dict[str, int]:
+        """Get {doc_name: pub_id} for given {doc_name: metadata}, inserting missing publications
+        :param docs: metadata keyed by doc_name
+        :param session: db session
+        :return: pub ids keyed by doc_name, docs whose publication could be neither found nor inserted are left out
+        """
+        names = list(docs.keys())
+        pub_ids: t.Dict[str, int] = {}
+        for batch in self._iter_batches(names, self.DB_BULK_BATCH_SIZE):
+            pub_ids.update(Publication.get_ids_by_name(names=batch, session=session))
+
+        new_rows = [Publication.row_from_document(docs[name]) for name in names if name not in pub_ids]
+        for batch in self._iter_batches(new_rows, self.DB_BULK_BATCH_SIZE):
+            pub_ids.update(Publication.insert_rows_ignore_existing(rows=batch, session=session))
+
+        # rows skipped on conflict were inserted by someone else in the meantime
+        raced = [name for name in names if name not in pub_ids]
+        if raced:
+            pub_ids.update(Publication.get_ids_by_name(names=raced, session=session))
+
+        for name in names:
+            if name not in pub_ids:
+                print(f"Could not find or insert publication for doc: {name}", file=sys.stderr)
+
+        print(f"Publications: {len(names)} in batch, {len(new_rows)} new", file=sys.stderr)
+        return pub_ids
+
+    def process_db_pub_updates(self, idgs: t.Iterable[IngestableDocGroup], bulk: bool = True) -> None:
         """Process publications table db updates using given docs
         :param idgs: iterable of IngestableDocGroup's
+        :param bulk: look up/insert all pubs in a few batched statements instead of per-doc ORM round-trips,
+            falls back to the ORM path on dbs other than postgres and sqlite
         :return: N/A, inserts/updates pub table as a side-effect
         """
-        pubs: t.Dict[str, Publication] = {}
         with Config.connection_helper.orch_db_session_scope('rw') as session:
+            if bulk and self._supports_bulk_upsert(session):
+                docs: t.Dict[str, t.Dict[str, t.Any]] = {}
+                for idg in idgs:
+                    # if there's no metadata, we can't update the db
+                    if not idg.metadata_idoc or not idg.thumbnail_idoc:
+                        continue
+                    docs.setdefault(idg.metadata_idoc.metadata['doc_name'], idg.metadata_idoc.metadata)
+
+                if docs:
+                    self._bulk_get_or_create_pub_ids(docs=docs, session=session)
+                    session.commit()
+                return
+
+            pubs: t.Dict[str, Publication] = {}
             for idg in idgs:
                 # if there's no metadata, we can't update the db
                 if not idg.metadata_idoc or not idg.thumbnail_idoc:
@@ -250,11 +304,46 @@ class LoadManager:
 
     def process_db_doc_updates(self,
                                idgs: t.Iterable[IngestableDocGroup],
-                               ts: t.Union[dt.datetime, str]) -> None:
-        """Process versioned_doc table db updates using given docs"""
+                               ts: t.Union[dt.datetime, str],
+                               bulk: bool = True) -> None:
+        """Process versioned_doc table db updates using given docs
+        :param idgs: iterable of IngestableDocGroup's
+        :param ts: batch timestamp
+        :param bulk: resolve pubs and insert versioned docs in batched statements instead of per-doc ORM
+            round-trips, falls back to the ORM path on dbs other than postgres and sqlite
+        """
         ts = parse_timestamp(ts=ts, raise_parse_error=True)
 
         with Config.connection_helper.orch_db_session_scope('rw') as session:
+            if bulk and self._supports_bulk_upsert(session):
+                idgs = [idg for idg in idgs if idg.metadata_idoc]
+                docs: t.Dict[str, t.Dict[str, t.Any]] = {}
+                for idg in idgs:
+                    docs.setdefault(idg.metadata_idoc.metadata['doc_name'], idg.metadata_idoc.metadata)
+                if not docs:
+                    return
+
+                pub_ids = self._bulk_get_or_create_pub_ids(docs=docs, session=session)
+                # docs without a publication are skipped, like in the per-doc path
+                idgs = [idg for idg in idgs if idg.metadata_idoc.metadata['doc_name'] in pub_ids]
+                rows = [
+                    dict(
+                        pub_id=pub_ids[idg.metadata_idoc.metadata['doc_name']],
+                        **VersionedDoc.row_from_document(
+                            doc=idg.metadata_idoc.metadata,
+                            filename=idg.raw_idoc.local_path.name,
+                            doc_location=idg.raw_idoc.s3_path or "",
+                            batch_timestamp=ts
+                        )
+                    )
+                    for idg in idgs
+                ]
+                for batch in self._iter_batches(rows, self.DB_BULK_BATCH_SIZE):
+                    session.execute(VersionedDoc.__table__.insert(), batch)
+                session.commit()
+                print(f"Versioned docs: {len(rows)} inserted", file=sys.stderr)
+                return
+
             for idg in idgs:
                 if not idg.metadata_idoc:
                     continue
@@ -306,6 +395,8 @@ class LoadManager:
         else:
             raise ValueError(f"Invalid max_threads value given: ${max_threads}")
 
+        Config.connection_helper.ensure_s3_pool_connections(max_workers)
+
         def dl_inner_func(file, ts_set):
             file.raw_idoc.s3_path = _upload_to_s3(file.raw_idoc, ts=ts_set)
             if file.parsed_idoc:
@@ -315,13 +406,13 @@ class LoadManager:
             if file.thumbnail_idoc:
                 file.thumbnail_idoc.s3_path = _upload_to_s3(file.thumbnail_idoc, ts=ts_set)
 
-            yield file
+            return file
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             r = executor.map(dl_inner_func, (idg for idg in idgs), (ts for _ in idgs))
             for result in r:
                 if result:
-                    uploaded_files.append(next(result))
+                    uploaded_files.append(result)
 
         return uploaded_files
 
@@ -107,15 +107,23 @@ def pull(sm: SnapshotManager, snapshot_type: str, dst_dir: str, using_db: bool)
     show_default=True,
     help="Replace all of current snapshot with this update"
 )
+@click.option(
+    '--sync',
+    type=bool,
+    default=False,
+    show_default=True,
+    help="Only upload files that are new or changed compared to the current snapshot"
+)
 @common_options
 @pass_sm
-def update(sm: SnapshotManager, snapshot_type: str, src_dir: str, replace: bool) -> None:
+def update(sm: SnapshotManager, snapshot_type: str, src_dir: str, replace: bool, sync: bool) -> None:
     """Update current snapshot using local files"""
     print("Updating current snapshot ...")
     sm.update_current_snapshot_from_disk(
         local_dir=src_dir,
         snapshot_type=snapshot_type,
-        replace=replace
+        replace=replace,
+        sync=sync
     )
 
 
@@ -126,12 +134,20 @@ def update(sm: SnapshotManager, snapshot_type: str, src_dir: str, replace: bool)
     help='Timestamp to use when creating backup prefix',
     default=Config.default_batch_timestamp_str
 )
+@click.option(
+    '--incremental',
+    type=bool,
+    default=False,
+    show_default=True,
+    help="Only backup files changed since the previous incremental backup"
+)
 @common_options
 @pass_sm
-def backup(sm: SnapshotManager, snapshot_type: str, ts: dt.datetime) -> None:
+def backup(sm: SnapshotManager, snapshot_type: str, ts: dt.datetime, incremental: bool) -> None:
     """Backup current snapshot to archive"""
     print(f"Backing up current {snapshot_type} snapshot ...")
-    sm.backup_current_snapshot(
+    backup_func = sm.backup_current_snapshot_incremental if incremental else sm.backup_current_snapshot
+    backup_func(
         snapshot_type=snapshot_type,
         snapshot_ts=ts
     )
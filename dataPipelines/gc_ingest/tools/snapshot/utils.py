@@ -9,9 +9,9 @@ import shutil
 from datetime import date
 from dataPipelines.gc_ingest.config import Config
 from dataPipelines.gc_db_utils.orch.models import SnapshotViewEntry
-from dataPipelines.gc_db_utils.web.models import SnapshotEntry
-from dataPipelines.gc_db_utils.web.schemas import SnapshotEntrySchema
+from dataPipelines.gc_db_utils.web.utils import refresh_snapshot_table
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
 
 
 
@@ -22,6 +22,9 @@ class SnapshotType(Enum):
 
 
 class SnapshotManager:
+    # incremental backups are described by a manifest object next to their (possibly empty) backup prefix,
+    # outside of it, so it's never listed or copied as part of the backup
+    BACKUP_MANIFEST_SUFFIX = ".manifest.json"
 
     def __init__(self,
                  current_doc_snapshot_prefix: str,
@@ -80,26 +83,12 @@ class SnapshotManager:
 
     def recreate_web_db_snapshot(self) -> None:
         """Recreate snapshot table in web db using snapshot view from orch db"""
-
-        def truncate_web_db_snapshot() -> None:
-            """Trims the snapshot table"""
-            ch = Config.connection_helper
-
-            with ch.web_db_session_scope('rw') as session:
-                session.execute(f'TRUNCATE TABLE {SnapshotEntry.__tablename__}')
-
-        with Config.connection_helper.web_db_session_scope('rw') as session:
-            web_db_entries = [
-                SnapshotEntry(**{k: getattr(orch_entry, k) for k, _ in SnapshotEntrySchema.__dict__.items() if
-                                 not k.startswith('_')})
-                for orch_entry in self.get_orch_db_snapshot_entries()
-            ]
-
-            if not web_db_entries:
-                return
-
-            truncate_web_db_snapshot()
-            session.add_all(web_db_entries)
+        ch = Config.connection_helper
+        refresh_snapshot_table(
+            orch_engine=ch.orch_db_engine,
+            web_engine=ch.web_db_engine,
+            orch_snapshot_view=str(SnapshotViewEntry.__tablename__)
+        )
 
     def pull_current_snapshot_to_disk(self,
                                       local_dir: t.Union[Path, str],
@@ -158,12 +147,14 @@ class SnapshotManager:
     def update_current_snapshot_from_disk(self, local_dir: t.Union[Path, str],
                                           snapshot_type: t.Union[SnapshotType, str],
                                           replace: bool = False,
-                                          max_threads: int = -1) -> None:
+                                          max_threads: int = -1,
+                                          sync: bool = False) -> None:
         """Update current raw/parsed snapshot
         :param local_dir: path to local flat directory with the files
         :param snapshot_type: type of snapshot raw/parsed
         :param replace: whether to delete all destination files first
         :param max_threads: maximum number of threads for multiprocessing
+        :param sync: only upload files that are new or changed compared to the current snapshot
         """
         local_dir = Path(local_dir).resolve()
         snapshot_type = SnapshotType(snapshot_type)
@@ -175,14 +166,128 @@ class SnapshotManager:
 
         print(f"Updating current snapshot at {prefix} prefix with contents of local dir {local_dir!s} ... ",
               file=sys.stderr)
-        self.s3u.upload_dir(local_dir=local_dir, prefix_path=prefix, max_threads=max_threads)
+        self.s3u.upload_dir(local_dir=local_dir, prefix_path=prefix, max_threads=max_threads,
+                            sync=sync and not replace)
+
+    def get_backup_manifest_path(self, snapshot_type: t.Union[SnapshotType, str], ts: t.Union[dt.datetime, str]) -> str:
+        """Get path of the manifest of an incremental backup"""
+        backup_prefix = self.get_backup_prefix_for_ts(snapshot_type=snapshot_type, ts=ts)
+        return self.s3u.format_as_prefix(backup_prefix).rstrip('/') + self.BACKUP_MANIFEST_SUFFIX
+
+    def get_backup_manifest(self,
+                            snapshot_type: t.Union[SnapshotType, str],
+                            ts: t.Union[dt.datetime, str]) -> t.Optional[t.Dict[str, t.Any]]:
+        """Get manifest of the incremental backup at a timestamp, None if there isn't one"""
+        return self.s3u.get_json_object(
+            object_path=self.get_backup_manifest_path(snapshot_type=snapshot_type, ts=ts),
+            bucket=self.bucket_name
+        )
+
+    def get_latest_backup_manifest(self,
+                                   snapshot_type: t.Union[SnapshotType, str],
+                                   before_ts: t.Union[dt.datetime, str]) -> t.Optional[t.Dict[str, t.Any]]:
+        """Get manifest of the most recent incremental backup older than before_ts, None if there isn't one"""
+        snapshot_type = SnapshotType(snapshot_type)
+        before_ts = parse_timestamp(before_ts, raise_parse_error=True)
+        base_prefix = self.s3u.format_as_prefix(self.get_backup_prefix(snapshot_type))
+
+        latest_ts = None
+        for obj in self.s3u.iter_objects_at_prefix(prefix=base_prefix, bucket=self.bucket_name, delimiter='/'):
+            if (not obj['Key'].endswith(self.BACKUP_MANIFEST_SUFFIX)
+                    or obj['Key'].endswith(self.s3u.COPY_MANIFEST_SUFFIX)):
+                continue
+            ts_str = obj['Key'][len(base_prefix):-len(self.BACKUP_MANIFEST_SUFFIX)]
+            try:
+                ts = dt.datetime.strptime(ts_str, Config.TIMESTAMP_FORMAT)
+            except ValueError:
+                continue
+            if ts < before_ts and (latest_ts is None or ts > latest_ts):
+                latest_ts = ts
+
+        if latest_ts is None:
+            return None
+        return self.get_backup_manifest(snapshot_type=snapshot_type, ts=latest_ts)
+
+    def backup_current_snapshot_incremental(self,
+                                            snapshot_type: t.Union[SnapshotType, str],
+                                            snapshot_ts: t.Union[dt.datetime, str] = dt.datetime.now(),
+                                            max_threads: int = -1) -> t.Optional[str]:
+        """Backup current raw/parsed snapshot, copying only objects that changed since the previous incremental backup.
+        The backup's manifest maps every object of the snapshot (relative key) to its etag, size and the location
+        of its copy, which is in this backup or in an older one. Older backup prefixes referenced by a
+        manifest must be kept as long as the manifest is.
+        :param snapshot_type: type of snapshot - raw/parsed
+        :param snapshot_ts: timestamp to use when constructing the backup prefix
+        :param max_threads: maximum number of threads for multithreading
+        :return: s3 prefix to the backup
+        """
+        snapshot_type = SnapshotType(snapshot_type)
+        snapshot_ts = parse_timestamp(snapshot_ts, raise_parse_error=True)
+        current_prefix = self.s3u.format_as_prefix(self.get_current_prefix(snapshot_type))
+        backup_prefix = self.s3u.format_as_prefix(
+            self.get_backup_prefix_for_ts(snapshot_type=snapshot_type, ts=snapshot_ts)
+        )
+
+        if self.get_backup_manifest(snapshot_type=snapshot_type, ts=snapshot_ts):
+            raise ValueError(
+                f"Cannot backup current snapshot because corresponding manifest already exists: {backup_prefix}")
+        if self.s3u.get_copy_manifest(backup_prefix, bucket=self.bucket_name):
+            raise ValueError(
+                f"Cannot backup current snapshot because a full backup already exists: {backup_prefix}")
+        if not self.s3u.prefix_exists(current_prefix):
+            print(f"Cannot backup current snapshot because there's nothing there: {current_prefix}", file=sys.stderr)
+            return None
+
+        previous_manifest = self.get_latest_backup_manifest(snapshot_type=snapshot_type, before_ts=snapshot_ts)
+        previous_objects = previous_manifest['objects'] if previous_manifest else {}
+
+        objects: t.Dict[str, t.Dict[str, t.Any]] = {}
+        to_copy: t.List[t.Tuple[str, str, int]] = []
+        for obj in self.s3u.iter_objects_at_prefix(prefix=current_prefix, bucket=self.bucket_name):
+            relative_key = obj['Key'][len(current_prefix):]
+            entry = {'ETag': obj['ETag'], 'Size': obj['Size']}
+            previous_entry = previous_objects.get(relative_key)
+            if previous_entry and previous_entry['ETag'] == entry['ETag'] and previous_entry['Size'] == entry['Size']:
+                entry['Location'] = previous_entry['Location']
+            else:
+                entry['Location'] = backup_prefix + relative_key
+                to_copy.append((obj['Key'], entry['Location'], obj['Size']))
+            objects[relative_key] = entry
+
+        print(f"Backing up {len(to_copy)} changed of {len(objects)} objects at {current_prefix} "
+              f"to archive {backup_prefix} ...", file=sys.stderr)
+
+        max_workers = self.s3u.get_max_workers(max_threads)
+        Config.connection_helper.ensure_s3_pool_connections(max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(
+                lambda c: self.s3u.copy_object(src_obj_path=c[0], dst_obj_path=c[1], bucket=self.bucket_name,
+                                               size=c[2]),
+                to_copy
+            ))
+
+        # manifest goes last, an interrupted backup just gets redone
+        self.s3u.put_json_object(
+            obj={
+                'snapshot_type': snapshot_type.value,
+                'timestamp': snapshot_ts.strftime(Config.TIMESTAMP_FORMAT),
+                'base_timestamp': previous_manifest['timestamp'] if previous_manifest else None,
+                'objects': objects
+            },
+            object_path=self.get_backup_manifest_path(snapshot_type=snapshot_type, ts=snapshot_ts),
+            bucket=self.bucket_name
+        )
+        return backup_prefix
 
     def backup_current_snapshot(self,
                                 snapshot_type: t.Union[SnapshotType, str],
-                                snapshot_ts: t.Union[dt.datetime, str] = dt.datetime.now()) -> t.Optional[str]:
-        """Backup current raw/parsed snapshot to timestamped location in S3
+                                snapshot_ts: t.Union[dt.datetime, str] = dt.datetime.now(),
+                                max_threads: int = -1) -> t.Optional[str]:
+        """Backup current raw/parsed snapshot to timestamped location in S3.
+        An interrupted backup to the same timestamp is resumed instead of failing on the existing prefix.
         :param snapshot_type: type of snapshot - raw/parsed
         :param snapshot_ts: timestamp to use when constructing the backup prefix
+        :param max_threads: maximum number of threads for multithreading
         :return: s3 prefix to the backup
         """
         snapshot_type = SnapshotType(snapshot_type)
@@ -190,9 +295,12 @@ class SnapshotManager:
         current_prefix = self.get_current_prefix(snapshot_type)
         backup_prefix = self.get_backup_prefix_for_ts(snapshot_type=snapshot_type, ts=snapshot_ts)
 
-        if self.s3u.prefix_exists(backup_prefix):
+        if self.s3u.prefix_exists(backup_prefix) and not self.s3u.is_copy_resumable(backup_prefix):
             raise ValueError(
                 f"Cannot backup current snapshot because corresponding prefix already exists: {backup_prefix}")
+        if self.get_backup_manifest(snapshot_type=snapshot_type, ts=snapshot_ts):
+            raise ValueError(
+                f"Cannot backup current snapshot because an incremental backup already exists: {backup_prefix}")
         if not self.s3u.prefix_exists(current_prefix):
             print(f"Cannot backup current snapshot because there's nothing there: {current_prefix}", file=sys.stderr)
             return None
@@ -200,18 +308,29 @@ class SnapshotManager:
         print(f"Backing up current prefix {current_prefix} to archive {backup_prefix} ...", file=sys.stderr)
         self.s3u.copy_prefix(
             src_prefix=current_prefix,
-            dst_prefix=backup_prefix
+            dst_prefix=backup_prefix,
+            max_threads=max_threads,
+            resumable=True
         )
         return backup_prefix
 
-    def backup_all_current_snapshots(self, snapshot_ts: t.Union[dt.datetime, str] = dt.datetime.now()) -> t.List[str]:
-        """Backup snapshots for all databases"""
+    def backup_all_current_snapshots(self,
+                                     snapshot_ts: t.Union[dt.datetime, str] = dt.datetime.now(),
+                                     max_threads: int = -1,
+                                     incremental: bool = False) -> t.List[str]:
+        """Backup snapshots for all databases
+        :param snapshot_ts: timestamp to use when constructing the backup prefixes
+        :param max_threads: maximum number of threads for multithreading
+        :param incremental: only copy objects changed since the previous incremental backup
+        """
         snapshot_ts = parse_timestamp(ts=snapshot_ts, raise_parse_error=True)
         backed_up_snapshot_paths: t.List[str] = []
+        backup_func = self.backup_current_snapshot_incremental if incremental else self.backup_current_snapshot
         for st in SnapshotType:
-            s3_path = self.backup_current_snapshot(
+            s3_path = backup_func(
                 snapshot_type=st,
-                snapshot_ts=snapshot_ts
+                snapshot_ts=snapshot_ts,
+                max_threads=max_threads
             )
             if s3_path:
                 backed_up_snapshot_paths.append(s3_path)
@@ -219,39 +338,71 @@ class SnapshotManager:
 
     def restore_current_snapshot(self,
                                  snapshot_type: t.Union[SnapshotType, str],
-                                 snapshot_ts: t.Union[dt.datetime, str]) -> str:
+                                 snapshot_ts: t.Union[dt.datetime, str],
+                                 max_threads: int = -1) -> str:
         """Restore current raw/parsed snapshot from one corresponding to a timestamp
         :param snapshot_type: type of snapshot - raw/parsed
         :param snapshot_tis: timestamp to use when figuring out what prefix to restore from
+        :param max_threads: maximum number of threads for multithreading
         :return: s3 prefix to the current snapshot
         """
         snapshot_type = SnapshotType(snapshot_type)
         snapshot_ts = parse_timestamp(snapshot_ts)
         current_prefix = self.get_current_prefix(snapshot_type)
         backup_prefix = self.get_backup_prefix_for_ts(snapshot_type=snapshot_type, ts=snapshot_ts)
+        manifest = self.get_backup_manifest(snapshot_type=snapshot_type, ts=snapshot_ts)
+
+        # list and validate the backup before anything is deleted from the current snapshot
+        backup_objects = None
+        if manifest:
+            if not manifest.get('objects'):
+                raise ValueError(f"Cannot restore backup prefix, its manifest lists no objects: {backup_prefix}")
+        else:
+            if self.s3u.is_copy_resumable(backup_prefix):
+                raise ValueError(f"Cannot restore backup prefix, the backup is incomplete: {backup_prefix}")
+            backup_objects = self.s3u.list_prefix_objects(prefix=backup_prefix, bucket=self.bucket_name)
+            if not backup_objects:
+                raise ValueError(f"Cannot restore backup prefix, it doesn't exist: {backup_prefix}")
 
-        if not self.s3u.prefix_exists(backup_prefix):
-            raise ValueError(f"Cannot restore backup prefix, it doesn't exist: {backup_prefix}")
         if self.s3u.prefix_exists(current_prefix):
             print(f"Deleting current prefix prior to restore: {current_prefix} ...", file=sys.stderr)
-            for obj_path in self.s3u.iter_object_paths_at_prefix(current_prefix):
-                self.s3u.delete_object(obj_path)
+            self.s3u.delete_prefix(prefix=current_prefix, max_threads=max_threads)
 
         print(f"Restoring current prefix - {current_prefix} - from backup at {backup_prefix} ...", file=sys.stderr)
-        self.s3u.copy_prefix(
-            src_prefix=backup_prefix,
-            dst_prefix=current_prefix
-        )
+        if manifest:
+            # incremental backup, objects are spread over this and older backups
+            current_prefix = self.s3u.format_as_prefix(current_prefix)
+            max_workers = self.s3u.get_max_workers(max_threads)
+            Config.connection_helper.ensure_s3_pool_connections(max_workers)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(
+                    lambda item: self.s3u.copy_object(src_obj_path=item[1]['Location'],
+                                                      dst_obj_path=current_prefix + item[0],
+                                                      bucket=self.bucket_name,
+                                                      size=item[1]['Size']),
+                    manifest['objects'].items()
+                ))
+        else:
+            self.s3u.copy_prefix(
+                src_prefix=backup_prefix,
+                dst_prefix=current_prefix,
+                bucket=self.bucket_name,
+                max_threads=max_threads,
+                src_objects=backup_objects
+            )
         return current_prefix
 
-    def restore_all_current_snapshots(self, snapshot_ts: t.Union[dt.datetime, str] = dt.datetime.now()) -> t.List[str]:
+    def restore_all_current_snapshots(self,
+                                      snapshot_ts: t.Union[dt.datetime, str] = dt.datetime.now(),
+                                      max_threads: int = -1) -> t.List[str]:
         """Restore current snapshots for all databases"""
         snapshot_ts = parse_timestamp(ts=snapshot_ts, raise_parse_error=True)
         restored_current_prefixes: t.List[str] = []
         for st in SnapshotType:
             s3_path = self.restore_current_snapshot(
                 snapshot_type=st,
-                snapshot_ts=snapshot_ts
+                snapshot_ts=snapshot_ts,
+                max_threads=max_threads
             )
             restored_current_prefixes.append(s3_path)
         return restored_current_prefixes
@@ -61,15 +61,23 @@ def scrape(csv_file_path: str, infobox_dir: str) -> None:
     type=click.Path(resolve_path=True, exists=True, dir_okay=True, file_okay=False),
     required=False
 )
+@click.option(
+    '--batch-size',
+    help='Number of documents loaded per transaction',
+    type=int,
+    default=500
+)
 @pass_njm
-def run(njm: Neo4jJobManager, source: str, clear: bool, max_threads: int, without_web_scraping: bool, infobox_dir: str) -> None:
+def run(njm: Neo4jJobManager, source: str, clear: bool, max_threads: int, without_web_scraping: bool, infobox_dir: str,
+        batch_size: int) -> None:
     njm.run_update(
         source=source,
         clear=clear,
         max_threads=max_threads,
         without_web_scraping=without_web_scraping,
         scrape_wiki=(without_web_scraping == False),
-        infobox_dir=infobox_dir
+        infobox_dir=infobox_dir,
+        batch_size=batch_size
     )
 
 def remove_docs_from_neo4j(njm: Neo4jJobManager, removal_list: list):
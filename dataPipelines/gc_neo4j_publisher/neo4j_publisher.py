@@ -8,7 +8,7 @@ from pathlib import Path
 import pandas as pd
 from joblib._multiprocessing_helpers import mp
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from gamechangerml.src.featurization.abbreviation import expand_abbreviations_no_context
 from gamechangerml.src.featurization.responsibilities import get_responsibilities
@@ -19,6 +19,7 @@ import common.utils.text_utils as tu
 import re
 from .config import Config as MainConfig
 from functools import lru_cache
+from collections import defaultdict
 
 
 @lru_cache(maxsize=None)
@@ -79,6 +80,8 @@ def get_hierarchy_json() -> dict:
     return hierarchy_dict
 
 
+# process_ent runs for every entity mention in the corpus, while the set of distinct mentions is small
+@lru_cache(maxsize=2 ** 16)
 def process_ent(ent: str) -> t.Union[t.List[str], str]:
     first_word = ent.split(" ")[0]
     if (
@@ -113,13 +116,48 @@ def process_query(query: str, parameters: t.Dict[str, t.Any] = None, **kwparamet
                 print("Error with query: {0}. Error: {1}".format(query, e))
 
 
+def process_read_query(query: str, parameters: t.Dict[str, t.Any] = None) -> t.List[dict]:
+    """Run a read query in its own transaction, retried like process_write_query. Unlike process_query, errors are
+    raised to the caller, so a failed read can't be mistaken for an empty result."""
+    with MainConfig.connection_helper.neo4j_session_scope() as session:
+        return session.read_transaction(lambda tx: tx.run(query, parameters).data())
+
+
+def process_write_query(query: str, parameters: t.Dict[str, t.Any] = None) -> t.List[dict]:
+    """Run a write query in its own transaction. The driver's managed write_transaction already retries transient
+    errors (deadlocks, lock timeouts, leader switches) with backoff, any other error is raised to the caller."""
+    with MainConfig.connection_helper.neo4j_session_scope() as session:
+        return session.write_transaction(lambda tx: tx.run(query, parameters).data())
+
+
+def process_write_queries(queries: t.List[t.Tuple[str, t.Dict[str, t.Any]]]) -> None:
+    """Run (query, parameters) write queries in order in a single transaction, retried like process_write_query"""
+    def run_queries(tx) -> None:
+        for query, parameters in queries:
+            tx.run(query, parameters).consume()
+
+    with MainConfig.connection_helper.neo4j_session_scope() as session:
+        session.write_transaction(run_queries)
+
+
 class Neo4jPublisher:
     def __init__(self):
         self.entEntRelationsStmt = []
         self.verified_entities_list, self.alias_mapping_dict = get_all_entities_and_aliases()
+        self.verified_entities_index = self._build_verified_entities_index(self.verified_entities_list)
         self.crowdsourcedEnts = set()
 
-    def process_json(self, filepath: str, q: mp.Queue) -> str:
+    @staticmethod
+    def _build_verified_entities_index(verified_entities_list: t.List[str]) -> t.Dict[str, str]:
+        """Upper-cased entity name -> canonical name, the first entity wins on case-insensitive duplicates"""
+        index = {}
+        for ent in verified_entities_list:
+            if isinstance(ent, str):
+                index.setdefault(ent.upper(), ent)
+        return index
+
+    def build_document_payload(self, filepath: str) -> t.Dict[str, t.Any]:
+        """Build the policy.createDocumentNodesFromJson payload for a parsed json"""
         with open(filepath) as f:
             j = json.load(f)
             o = {}
@@ -159,7 +197,6 @@ class Neo4jPublisher:
             o["entities"] = self.process_entity_list(j, "entities")
             o["orgs"] = self.process_entity_list(j, "orgs")
             o["roles"] = self.process_entity_list(j, "roles")
-            process_query('CALL policy.createDocumentNodesFromJson(' + json.dumps(json.dumps(o)) + ')')
 
             # # TODO responsibilities
             # text = j["text"]
@@ -168,8 +205,19 @@ class Neo4jPublisher:
             # TODO paragraphs
             # self.process_paragraphs(j, doc_id)
 
-        q.put(1)
-        return id
+        return o
+
+    @staticmethod
+    def load_documents(docs: t.List[t.Dict[str, t.Any]]) -> None:
+        """Create the document nodes for a batch of payloads in a single transaction.
+        Each doc gets its own standalone CALL, an in-query CALL (e.g. after UNWIND) would need the procedure's
+        YIELD columns unless it is VOID."""
+        start = time.time()
+        process_write_queries([
+            ('CALL policy.createDocumentNodesFromJson($doc)', {"doc": json.dumps(o)})
+            for o in docs
+        ])
+        print('Loaded batch of {0} docs in {1:.2f}s'.format(len(docs), time.time() - start), file=sys.stderr)
 
     def process_responsibilities(self, text: str) -> None:
         resp = get_responsibilities(text, agencies=self.verified_entities_list)
@@ -305,6 +353,34 @@ class Neo4jPublisher:
 
         return (list(hierarchy_nodes), list(relations))
 
+    @staticmethod
+    def _ensure_entity_name_index() -> None:
+        """Hierarchy lookups match on Entity.name, make sure it's indexed even if the db wasn't cleared"""
+        with MainConfig.connection_helper.neo4j_session_scope() as session:
+            try:
+                session.run("CREATE INDEX entity_index IF NOT EXISTS FOR (e:Entity) ON (e.name)").consume()
+            except exceptions.ClientError as e:
+                # the unique_ents constraint already backs Entity.name with an index
+                print("Skipping entity_index creation: {0}".format(e), file=sys.stderr)
+
+    @staticmethod
+    def _get_entity_lookup() -> t.Dict[str, t.Set[str]]:
+        """
+        Read every Entity name and alias in one pass
+        Returns: name or alias -> names of the Entity nodes it refers to
+        """
+        lookup = defaultdict(set)
+        rows = process_read_query("MATCH (n:Entity) RETURN n.name AS name, n.aliases AS aliases")
+        for row in rows:
+            name = row["name"]
+            if name is None:
+                continue
+            lookup[name].add(name)
+            if isinstance(row["aliases"], str):
+                for alias in row["aliases"].split(";"):
+                    lookup[alias].add(name)
+        return lookup
+
     def ingest_hierarchy_information(self) -> None:
         """
         This function pulls in the hierarchy json and generates an authority tree in the graph
@@ -312,6 +388,9 @@ class Neo4jPublisher:
         2) Create any nodes that are not currently in the graph (including matching by name/alias)
             a) This is commonly for non-org/roles, such as `United States Constitution`
         3) Create `HAS_AUTHORITY_OVER` relationships between the nodes in the authority tree
+
+        Names and aliases are resolved against a single read of the Entity nodes, so both the node creation and
+        the relationships are one parameterized UNWIND statement each, matching on the indexed Entity.name.
         Returns: None
         """
         print("Inserting Hierarchy Relationships ...")
@@ -319,66 +398,93 @@ class Neo4jPublisher:
 
         all_hierarchy_nodes, authority_relationships = self._get_nodes_and_relations(hierarchy_dict)
 
+        self._ensure_entity_name_index()
+        entity_lookup = self._get_entity_lookup()
+
         # check to see if the nodes are currently in the graph, for those that aren't (e.g., `United States Constitution`)
         # create a new node for those
-        hierarchy_nodes_created = 0
-        for hierarchy_node in all_hierarchy_nodes:
-            match_cypher = "OPTIONAL MATCH (n:Entity) " \
-                           "WHERE n.name='" + hierarchy_node + "' OR '" + hierarchy_node + "' in split(n.aliases,';') "\
-                           "RETURN n IS NOT NULL AS Exists"
-            # result = process_query(match_cypher)
-
-            # create the node if the match_cypher above does not match on an existing node
-            if not process_query(match_cypher)[0]['Exists']:
-                create_cypher = "CREATE (n:Entity {name: '" + hierarchy_node + "'})"
-                process_query(create_cypher)
-                hierarchy_nodes_created += 1
-        print(f"Inserted {hierarchy_nodes_created} hierarchy nodes (entity node type)")
-
-        cypher_list = []
-        for authority, subordinate in authority_relationships:
-            # list join is to trying to find a way to make it more readable in code
-            cypher_parts = [
-                "MATCH (a:Entity), (b:Entity)",
-                f"WHERE (a.name = '{authority}' OR '{authority}' in split(a.aliases, ';')) AND (b.name = '{subordinate}' OR '{subordinate}' in split(b.aliases, ';'))",
-                "MERGE (a)-[r:HAS_AUTHORITY_OVER]->(b)"]
-
-            cypher_string = " ".join(cypher_parts)
-            cypher_list.append(cypher_string)
-
-        print(f"Inserting {len(cypher_list)} hierarchy relationships ...")
-
-        # Execute all of the `HAS_AUTHORITY_OVER` cypher commands
-        for cypher in cypher_list:
-            process_query(cypher)
-
-    def process_dir(self, files: t.List[str], file_dir: str, q: mp.Queue, max_threads: int) -> None:
+        missing_nodes = [node for node in all_hierarchy_nodes if node not in entity_lookup]
+        if missing_nodes:
+            process_write_query("UNWIND $names AS name MERGE (n:Entity {name: name})", {"names": missing_nodes})
+        for node in missing_nodes:
+            entity_lookup[node].add(node)
+        print(f"Inserted {len(missing_nodes)} hierarchy nodes (entity node type)")
+
+        relationships = [
+            {"authority": authority_name, "subordinate": subordinate_name}
+            for authority, subordinate in authority_relationships
+            for authority_name in entity_lookup[authority]
+            for subordinate_name in entity_lookup[subordinate]
+        ]
+
+        print(f"Inserting {len(relationships)} hierarchy relationships ...")
+        if relationships:
+            process_write_query(
+                "UNWIND $rels AS rel "
+                "MATCH (a:Entity {name: rel.authority}) "
+                "MATCH (b:Entity {name: rel.subordinate}) "
+                "MERGE (a)-[r:HAS_AUTHORITY_OVER]->(b)",
+                {"rels": relationships}
+            )
+
+    def process_dir(self, files: t.List[str], file_dir: str, q: mp.Queue, max_threads: int,
+                    batch_size: int = 500, load_threads: int = 1) -> None:
+        """Build document payloads concurrently and load them in batches of batch_size docs per transaction.
+        Batches are loaded on their own executor while the remaining payloads are still being built."""
         if not files:
             return
 
-        with ThreadPoolExecutor(max_workers=min(max_threads, 16)) as ex:
-            futures = []
+        def load_batch(batch: t.List[t.Dict[str, t.Any]]) -> None:
+            try:
+                self.load_documents(batch)
+            except Exception as err:
+                print('Error loading batch starting with ' + batch[0]["id"] + ', loading its docs one by one. Error: '
+                      + str(err), file=sys.stderr)
+                # one bad doc shouldn't cost the rest of its batch
+                for doc in batch:
+                    try:
+                        self.load_documents([doc])
+                    except Exception as doc_err:
+                        print('Error loading doc ' + doc["id"] + ' Error: ' + str(doc_err), file=sys.stderr)
+            for _ in batch:
+                q.put(1)
+
+        with ThreadPoolExecutor(max_workers=min(max_threads, 16)) as build_ex, \
+                ThreadPoolExecutor(max_workers=load_threads) as load_ex:
+            future_to_filename = {}
             for filename in files:
+                if filename.endswith('.json'):
+                    fut = build_ex.submit(self.build_document_payload, os.path.join(file_dir, filename))
+                    future_to_filename[fut] = filename
+
+            batch = []
+            load_futures = []
+            for fut in as_completed(future_to_filename):
                 try:
-                    if filename.endswith('.json'):
-                        futures.append(ex.submit(self.process_json(os.path.join(file_dir, filename), q)))
+                    batch.append(fut.result())
                 except Exception as err:
-                    print('RuntimeError in: ' + filename + ' Error: ' + str(err), file=sys.stderr)
+                    print('RuntimeError in: ' + future_to_filename[fut] + ' Error: ' + str(err), file=sys.stderr)
                     q.put(1)
+                    continue
+                if len(batch) >= batch_size:
+                    load_futures.append(load_ex.submit(load_batch, batch))
+                    batch = []
+            if batch:
+                load_futures.append(load_ex.submit(load_batch, batch))
+            for fut in load_futures:
+                fut.result()
         return
 
     def filter_ents(self, ent: str) -> str:
         new_ent = process_ent(ent)
-        try:
-            match_idx = [ent.upper() for ent in self.verified_entities_list].index(new_ent.upper())
-            return self.verified_entities_list[match_idx]
-        except:
-            if new_ent in self.alias_mapping_dict:
-                return self.alias_mapping_dict[new_ent]
-            if new_ent in self.crowdsourcedEnts:
-                return new_ent
-            else:
-                return ""
+        verified_ent = self.verified_entities_index.get(new_ent.upper())
+        if verified_ent is not None:
+            return verified_ent
+        if new_ent in self.alias_mapping_dict:
+            return self.alias_mapping_dict[new_ent]
+        if new_ent in self.crowdsourcedEnts:
+            return new_ent
+        return ""
 
     def process_crowdsourced_ents(self, without_web_scraping: bool, infobox_dir: t.Optional[str] = None):
         # check that if no web scraping, we have infobox-dir defined.
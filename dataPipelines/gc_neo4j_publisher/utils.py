@@ -54,8 +54,9 @@ class Neo4jJobManager:
             pbar.update()
 
     @staticmethod
-    def process_files(files: t.List[str], file_dir: str, q: mp.Queue, publisher: Neo4jPublisher, max_threads: int) -> None:
-        publisher.process_dir(files, file_dir, q, max_threads)
+    def process_files(files: t.List[str], file_dir: str, q: mp.Queue, publisher: Neo4jPublisher, max_threads: int,
+                      batch_size: int = 500) -> None:
+        publisher.process_dir(files, file_dir, q, max_threads, batch_size=batch_size)
 
     @staticmethod
     def get_chunks(lst: t.List[t.Any], n: int) -> t.Iterable[t.List[t.Any]]:
@@ -79,7 +80,8 @@ class Neo4jJobManager:
                    max_threads: int,
                    scrape_wiki: bool,
                    without_web_scraping: bool,
-                   infobox_dir: t.Union[str, Path]) -> None:
+                   infobox_dir: t.Union[str, Path],
+                   batch_size: int = 500) -> None:
         """Run Neo4j Update Job
         :param source: Path to source directory
         :param clear: Clear out all old entities first (care, can stall db if not enough RAM)
@@ -87,6 +89,7 @@ class Neo4jJobManager:
         :param scrape_wiki: whether to scrape the wiki when running the update
         :param without_web_scraping: designates if being run in environment without internet access
         :param infobox_dir: where the infobox jsons are saved if no web scraping
+        :param batch_size: number of documents loaded per transaction
         """
         source = str(Path(source).resolve())
         max_theoretical_threads = mp.cpu_count() - 1 if mp.cpu_count() - 1 > 0 else 1
@@ -154,7 +157,7 @@ class Neo4jJobManager:
         q = mp.Queue()
         proc = mp.Process(target=self.listener, args=(q, len(files)))
         proc.start()
-        workers = [mp.Process(target=self.process_files, args=(file_chunks[i], file_dir, q, publisher, max_threads)) for i in range(n)]
+        workers = [mp.Process(target=self.process_files, args=(file_chunks[i], file_dir, q, publisher, max_threads, batch_size)) for i in range(n)]
         for worker in workers:
             worker.start()
         for worker in workers:
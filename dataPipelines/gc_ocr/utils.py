@@ -7,7 +7,7 @@ Reference: https://ocrmypdf.readthedocs.io/en/latest/installation.html
 
 from pathlib import Path
 import typing as t
-from common.utils.file_utils import is_pdf, is_ocr_pdf, is_encrypted_pdf
+from common.utils.file_utils import PdfProbe, probe_pdf
 import ocrmypdf
 import sys
 from enum import Enum
@@ -46,6 +46,11 @@ class PreviouslyOCRError(OCRError):
     pass
 
 
+class OCRTimeoutError(OCRError):
+    """When OCR job took longer than allowed"""
+    pass
+
+
 class PDFOCR:
     def __init__(self,
                  input_file: t.Union[str, Path],
@@ -56,7 +61,8 @@ class PDFOCR:
                  ignore_init_errors: bool = True,
                  show_progress_bar: bool = False,
                  num_threads: t.Optional[int] = None,
-                 force_ocr: bool = False
+                 force_ocr: bool = False,
+                 probe: t.Optional[PdfProbe] = None
                  ):
         """PDF OCR Util
         :param input_file: Input pdf file path
@@ -65,6 +71,7 @@ class PDFOCR:
         :param ocr_job_type: OCR job type ('normal','skip-text','redo-ocr','force-ocr')
         :param ignore_init_errors: Don't raise errors related to job type
         :param show_progress_bar: Show progress bar during conversion
+        :param probe: PdfProbe of the input file, if the caller already has one
         """
 
         self.input_file = Path(input_file).resolve()
@@ -88,19 +95,20 @@ class PDFOCR:
         if self.output_file.exists() and not overwrite_output:
             raise FileExistsError(f"Output file already exists: {self.output_file!s}")
 
-        if not is_pdf(self.input_file):
+        probe = probe or probe_pdf(self.input_file)
+        if not probe.is_pdf:
             e = NotPDFError(f"Given file is not a pdf: {self.input_file!s}")
             if not ignore_init_errors:
                 print(e)
             else:
                 raise e
-        elif is_encrypted_pdf(self.input_file):
+        elif probe.is_encrypted:
             e = EncryptedPDFError(f"Give file is an encrypted pdf: {self.input_file!s}")
             if not ignore_init_errors:
                 print(e)
             else:
                 raise e
-        elif is_ocr_pdf(self.input_file) and not self.job_type in [OCRJobType.FORCE_OCR,OCRJobType.REDO_OCR]:
+        elif probe.is_ocr() and not self.job_type in [OCRJobType.FORCE_OCR,OCRJobType.REDO_OCR]:
             e = PreviouslyOCRError(f"Given file is already OCR'ed: {self.input_file!s}")
             if not ignore_init_errors:
                 print(e)
@@ -130,30 +138,45 @@ class PDFOCR:
 
         return is_successful
 
-    def convert_in_subprocess(self, raise_error: bool = False) -> bool:
-        """Run in a subprocess, supports non-daemonic MP pools"""
+    def convert_in_subprocess(self,
+                              raise_error: bool = False,
+                              pages: t.Optional[str] = None,
+                              output_type: t.Optional[str] = None,
+                              timeout: t.Optional[float] = None) -> bool:
+        """Run in a subprocess, supports non-daemonic MP pools
+        :param raise_error: Raise OCRError if OCR was not successful
+        :param pages: Only OCR these pages, e.g. "1 3 4" or "1-3"
+        :param output_type: ocrmypdf output type, e.g. "pdf" (default is pdfa)
+        :param timeout: Seconds after which the OCR subprocess is killed and OCRTimeoutError is raised
+        """
         print(f"[INFO] OCR'ing [In Subprocess] file {self.input_file!s}, writing output to {self.output_file!s}", file=sys.stderr)
-        process = sub.run(
-            [
-                'ocrmypdf',
-                *[p for p in
-                    [
-                        {
-                            OCRJobType.SKIP_TEXT: '--skip-text',
-                            OCRJobType.REDO_OCR: '--redo-ocr',
-                            OCRJobType.FORCE_OCR: '--force-ocr'
-                        }.get(self.job_type)
-                        
-                    ] if p
+        try:
+            process = sub.run(
+                [
+                    'ocrmypdf',
+                    *[p for p in
+                        [
+                            {
+                                OCRJobType.SKIP_TEXT: '--skip-text',
+                                OCRJobType.REDO_OCR: '--redo-ocr',
+                                OCRJobType.FORCE_OCR: '--force-ocr'
+                            }.get(self.job_type)
+
+                        ] if p
+                    ],
+                    f'--jobs={self.num_threads}',
+                    *([f'--pages={",".join(pages.split())}'] if pages else []),
+                    *([f'--output-type={output_type}'] if output_type else []),
+                    str(self.input_file),
+                    str(self.output_file)
                 ],
-                f'--jobs={self.num_threads}',
-                str(self.input_file),
-                str(self.output_file)
-            ]
-        )
+                timeout=timeout
+            )
+        except sub.TimeoutExpired:
+            raise OCRTimeoutError(f"[ERROR] OCR of '{self.input_file.name}' timed out after {timeout}s")
 
         is_successful = process.returncode == 0
         if raise_error and not is_successful:
             raise OCRError(f"[ERROR] Could not OCR '{self.input_file.name}'")
 
-        return is_successful
\ No newline at end of file
+        return is_successful
@@ -0,0 +1,227 @@
+import gzip
+import os
+import pytest
+import sqlalchemy
+from dataPipelines.gc_db_utils.utils import run_piped, PipeWriterError, refresh_table_from_query
+
+# bigger than the pipe buffer and than the s3 multipart threshold
+BIG_DATA = os.urandom(9 * 1024 ** 2)
+
+
+class WriterFailed(Exception):
+    pass
+
+
+def write_then_fail(data):
+    def write_func(fd):
+        fd.write(data)
+        raise WriterFailed()
+    return write_func
+
+
+def test_run_piped_streams_data():
+    result = run_piped(write_func=lambda fd: fd.write(BIG_DATA), read_func=lambda fd: fd.read())
+    assert result == BIG_DATA
+
+
+def test_run_piped_streams_gzipped_data():
+    def write_func(fd):
+        with gzip.GzipFile(fileobj=fd, mode="wb") as gz:
+            gz.write(BIG_DATA)
+
+    def read_func(fd):
+        with gzip.GzipFile(fileobj=fd, mode="rb") as gz:
+            return gz.read()
+
+    assert run_piped(write_func=write_func, read_func=read_func) == BIG_DATA
+
+
+def test_run_piped_writer_failure_fails_reader():
+    read_results = []
+
+    def read_func(fd):
+        read_results.append(fd.read())
+
+    with pytest.raises(WriterFailed):
+        run_piped(write_func=write_then_fail(b"partial"), read_func=read_func)
+    assert read_results == []
+
+
+def test_run_piped_writer_failure_fails_reader_wrapping_error():
+    def read_func(fd):
+        try:
+            fd.read()
+        except PipeWriterError as e:
+            raise RuntimeError("reader failed") from e
+
+    with pytest.raises(WriterFailed):
+        run_piped(write_func=write_then_fail(BIG_DATA), read_func=read_func)
+
+
+def test_run_piped_writer_failure_inside_gzip_fails_reader():
+    # the gzip trailer is still written when the writer fails, the stream looks complete
+    def write_func(fd):
+        with gzip.GzipFile(fileobj=fd, mode="wb") as gz:
+            gz.write(b"partial")
+            raise WriterFailed()
+
+    def read_func(fd):
+        with gzip.GzipFile(fileobj=fd, mode="rb") as gz:
+            return gz.read()
+
+    with pytest.raises(WriterFailed):
+        run_piped(write_func=write_func, read_func=read_func)
+
+
+def test_run_piped_reader_failure():
+    def read_func(fd):
+        fd.read(10)
+        raise ValueError("reader failed")
+
+    with pytest.raises(ValueError):
+        run_piped(write_func=lambda fd: fd.write(BIG_DATA), read_func=read_func)
+
+
+@pytest.mark.parametrize("data", [b"partial", BIG_DATA])
+def test_run_piped_writer_failure_leaves_no_s3_object(data):
+    moto = pytest.importorskip("moto")
+    from configuration.helpers import ConnectionHelper
+    from common.utils.s3 import S3Utils
+
+    ch = ConnectionHelper({'aws': {
+        'bucket_name': 'test-bucket',
+        'default_region': 'us-east-1',
+        'auth_type': 'key',
+        'access_key': 'testing',
+        'secret_key': 'testing',
+        'endpoint_type': 'aws',
+    }})
+    with moto.mock_aws():
+        ch.s3_client.create_bucket(Bucket='test-bucket')
+        s3u = S3Utils(ch)
+
+        with pytest.raises(WriterFailed):
+            run_piped(
+                write_func=write_then_fail(data),
+                read_func=lambda fd: s3u.upload_fileobj(fileobj=fd, object_path="backup/table.csv.gz")
+            )
+
+        assert not s3u.object_exists("backup/table.csv.gz")
+        assert not ch.s3_client.list_multipart_uploads(Bucket='test-bucket').get('Uploads')
+
+
+class FakeCursor:
+    def __init__(self, copied):
+        self.copied = copied
+
+    def execute(self, sql, params=None):
+        pass
+
+    def copy_expert(self, sql, file):
+        self.copied.append(file.read())
+
+
+class FakeConnection:
+    def __init__(self):
+        self.copied = []
+        self.rolled_back = self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self.copied)
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeEngine:
+    def __init__(self, raw_connection):
+        self.raw_connection = raw_connection
+
+
+def test_refresh_table_from_query_source_connect_failure_fails_load():
+    def connect_failed():
+        raise sqlalchemy.exc.OperationalError("connect", None, Exception("could not connect to server"))
+
+    dst_con = FakeConnection()
+
+    # the pipe is closed even though the source never connected, so the COPY into staging doesn't hang
+    with pytest.raises(sqlalchemy.exc.OperationalError):
+        refresh_table_from_query(
+            src_engine=FakeEngine(connect_failed),
+            query="SELECT 1",
+            dst_engine=FakeEngine(lambda: dst_con),
+            table="docs",
+            columns=["id"]
+        )
+
+    assert dst_con.copied == []
+    assert dst_con.rolled_back and dst_con.closed
+
+
+@pytest.fixture
+def postgres_engine():
+    url = os.environ.get("GC_TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("GC_TEST_POSTGRES_URL is not set")
+    engine = sqlalchemy.create_engine(url)
+    try:
+        engine.connect().close()
+    except sqlalchemy.exc.OperationalError as e:
+        pytest.skip(f"no postgres db: {e}")
+    engine.execute("DROP SCHEMA IF EXISTS gc_refresh_test CASCADE")
+    engine.execute("CREATE SCHEMA gc_refresh_test")
+    yield engine
+    engine.execute("DROP SCHEMA IF EXISTS gc_refresh_test CASCADE")
+    engine.dispose()
+
+
+@pytest.mark.postgres
+def test_refresh_table_from_query_swaps_in_staging_table(postgres_engine):
+    postgres_engine.execute("""
+        CREATE TABLE gc_refresh_test.source (id int, name text);
+        INSERT INTO gc_refresh_test.source VALUES (1, 'one'), (2, 'two'), (3, 'three');
+        CREATE TABLE gc_refresh_test.docs (id int PRIMARY KEY, name text);
+        CREATE INDEX docs_name_idx ON gc_refresh_test.docs (name);
+        INSERT INTO gc_refresh_test.docs VALUES (1, 'stale');
+        CREATE VIEW gc_refresh_test.docs_vw AS SELECT * FROM gc_refresh_test.docs;
+    """)
+
+    def refresh(query):
+        return refresh_table_from_query(
+            src_engine=postgres_engine,
+            query=query,
+            dst_engine=postgres_engine,
+            table="docs",
+            columns=["id", "name"],
+            schema="gc_refresh_test",
+            # the view follows the renamed table, rebind it to the new one
+            post_swap_sql="CREATE OR REPLACE VIEW gc_refresh_test.docs_vw AS SELECT * FROM gc_refresh_test.docs"
+        )
+
+    def rows(relation):
+        return postgres_engine.execute(f"SELECT id, name FROM gc_refresh_test.{relation} ORDER BY id").fetchall()
+
+    def index_names():
+        return sorted(r[0] for r in postgres_engine.execute(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = 'gc_refresh_test' AND tablename = 'docs'"
+        ))
+
+    old_index_names = index_names()
+    assert refresh("SELECT id, name FROM gc_refresh_test.source") == 3
+    assert rows("docs") == rows("docs_vw") == [(1, 'one'), (2, 'two'), (3, 'three')]
+    assert index_names() == old_index_names
+
+    # a second refresh doesn't collide with the index names the first one left behind
+    postgres_engine.execute("DELETE FROM gc_refresh_test.source WHERE id = 3")
+    assert refresh("SELECT id, name FROM gc_refresh_test.source") == 2
+    assert rows("docs_vw") == [(1, 'one'), (2, 'two')]
+
+    # an empty result leaves the table untouched
+    assert refresh("SELECT id, name FROM gc_refresh_test.source WHERE false") == 0
+    assert rows("docs") == [(1, 'one'), (2, 'two')]
+    assert not postgres_engine.execute(
+        "SELECT 1 FROM pg_tables WHERE schemaname = 'gc_refresh_test' AND tablename IN ('docs_staging', 'docs_old')"
+    ).fetchall()
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+pytest.importorskip("gamechangerml")
+
+from dataPipelines.gc_elasticsearch_publisher.gc_elasticsearch_publisher import ElasticsearchPublisher
+
+
+def make_publisher(ingest_dir, **kwargs):
+    return ElasticsearchPublisher(
+        ingest_dir=str(ingest_dir),
+        index_name="test_index",
+        host="localhost",
+        port=9200,
+        mapping_file=None,
+        alias=None,
+        username=None,
+        password=None,
+        environment="docker",
+        **kwargs
+    )
+
+
+def test_get_jdicts_loads_stripped_docs_in_spawned_workers(tmpdir):
+    names = ["doc%i" % i for i in range(10)]
+    for name in names:
+        with open(os.path.join(str(tmpdir), name + ".json"), "w") as f:
+            json.dump(dict(filename=name + ".pdf", text="full text", pages=[], raw_text="raw", title=name), f)
+
+    publisher = make_publisher(tmpdir, json_load_workers=2)
+    docs = sorted(publisher.get_jdicts(), key=lambda doc: doc["title"])
+
+    assert docs == [
+        dict(filename=name + ".pdf", title=name, _id=hashlib.sha256(name.encode()).hexdigest())
+        for name in names
+    ]
+
+
+def make_actions(publisher, count, text_size=10):
+    return list(publisher.get_actions(
+        dict(_id=str(i), title="doc %i" % i, body="x" * text_size) for i in range(count)
+    ))
+
+
+def chunk_doc_ids(chunks):
+    return [[action_line["index"]["_id"] for action_line, _ in chunk] for chunk, _ in chunks]
+
+
+def test_chunk_actions_bounded_by_doc_count(tmpdir):
+    publisher = make_publisher(tmpdir, bulk_chunk_size=3)
+
+    chunks = list(publisher.chunk_actions(make_actions(publisher, 7)))
+
+    assert chunk_doc_ids(chunks) == [["0", "1", "2"], ["3", "4", "5"], ["6"]]
+    for chunk, chunk_bytes in chunks:
+        # action and source lines, each with a trailing new line
+        assert chunk_bytes == sum(len(json.dumps(action_line, separators=(",", ":"))) + len(source) + 2
+                                  for action_line, source in chunk)
+
+
+def test_chunk_actions_bounded_by_bytes(tmpdir):
+    publisher = make_publisher(tmpdir, bulk_chunk_size=100)
+    actions = make_actions(publisher, 6, text_size=1000)
+    action_bytes = next(publisher.chunk_actions(actions[:1]))[1]
+    publisher.bulk_max_chunk_bytes = action_bytes * 2 + 1
+
+    chunks = list(publisher.chunk_actions(actions))
+
+    assert chunk_doc_ids(chunks) == [["0", "1"], ["2", "3"], ["4", "5"]]
+    assert all(chunk_bytes <= publisher.bulk_max_chunk_bytes for _, chunk_bytes in chunks)
+
+
+def test_chunk_actions_gives_oversized_doc_its_own_chunk(tmpdir):
+    publisher = make_publisher(tmpdir, bulk_max_chunk_bytes=500)
+    actions = make_actions(publisher, 2) + [dict(_op_type="index", _index="test_index", _id="big", body="x" * 1000)]
+    actions += make_actions(publisher, 1)
+
+    chunks = list(publisher.chunk_actions(actions))
+
+    assert chunk_doc_ids(chunks) == [["0", "1"], ["big"], ["0"]]
+    assert chunks[1][1] > publisher.bulk_max_chunk_bytes
+
+
+def test_send_chunk_sends_sources_serialized_by_chunk_actions(tmpdir, monkeypatch):
+    publisher = make_publisher(tmpdir)
+    serializer = publisher.es.transport.serializer
+    serialized = []
+    dumps = serializer.dumps
+    monkeypatch.setattr(serializer, "dumps", lambda data: serialized.append(data) or dumps(data))
+    bodies = []
+
+    def bulk(body, **kwargs):
+        bodies.append(body)
+        lines = body.splitlines()
+        return {"items": [{"index": {"_id": json.loads(line)["index"]["_id"], "status": 201}}
+                          for line in lines[::2]]}
+
+    monkeypatch.setattr(publisher.es, "bulk", bulk)
+
+    [(chunk, _)] = publisher.chunk_actions(make_actions(publisher, 2))
+    results = publisher._send_chunk(chunk)
+
+    assert [success for success, _ in results] == [True, True]
+    sources = [json.loads(line) for line in bodies[0].splitlines()[1::2]]
+    assert sources == [dict(title="doc %i" % i, body="x" * 10) for i in range(2)]
+    # each source dict went through the serializer once, the bulk helper got the string back
+    assert sum(isinstance(data, dict) and "title" in data for data in serialized) == 2
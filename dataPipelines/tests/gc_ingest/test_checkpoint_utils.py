@@ -0,0 +1,103 @@
+import datetime as dt
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from common.utils.s3 import TimestampedPrefix
+from dataPipelines.gc_ingest.tools.checkpoint.utils import CheckpointManager
+
+PREFIXES = [
+    TimestampedPrefix(prefix_path="checkpoints/2021-01-0%i" % day, timestamp=dt.datetime(2021, 1, day),
+                      timestamp_str="2021-01-0%i" % day)
+    for day in (1, 2, 3, 4)
+]
+
+
+class FakeCheckpointManager(CheckpointManager):
+    """Checkpoint manager with checkpoints kept in memory instead of s3"""
+
+    def __init__(self, prefixes, fail_on=None):
+        self.prefixes = prefixes
+        self.fail_on = fail_on
+        self.checkpoint_ts = None
+        self.pulled = []
+
+    @property
+    def current_checkpoint_ts(self):
+        return self.checkpoint_ts
+
+    @current_checkpoint_ts.setter
+    def current_checkpoint_ts(self, new_value):
+        self.checkpoint_ts = new_value
+
+    @property
+    def remaining_prefixes(self):
+        return self.prefixes
+
+    def pull_prefix(self, prefix, local_dir, max_threads=-1):
+        if prefix == self.fail_on:
+            raise IOError("download failed")
+        Path(local_dir).mkdir(exist_ok=True)
+        self.pulled.append(prefix)
+
+
+def test_stream_manager_yields_all_and_advances_to_last(tmpdir):
+    cpm = FakeCheckpointManager(PREFIXES)
+
+    with cpm.checkpoint_stream_manager(str(tmpdir), advance_checkpoint=True) as downloaded_prefixes:
+        streamed = [dp.timestamped_prefix for dp in downloaded_prefixes]
+
+    assert streamed == PREFIXES
+    assert cpm.checkpoint_ts == PREFIXES[-1].timestamp
+
+
+def test_stream_manager_leaves_checkpoint_unless_asked(tmpdir):
+    cpm = FakeCheckpointManager(PREFIXES)
+
+    with cpm.checkpoint_stream_manager(str(tmpdir)) as downloaded_prefixes:
+        list(downloaded_prefixes)
+
+    assert cpm.checkpoint_ts is None
+
+
+def test_stream_manager_raises_download_error_and_advances_to_last_yielded(tmpdir):
+    cpm = FakeCheckpointManager(PREFIXES, fail_on=PREFIXES[2])
+    streamed = []
+
+    with pytest.raises(IOError, match="download failed"):
+        with cpm.checkpoint_stream_manager(str(tmpdir), advance_checkpoint=True) as downloaded_prefixes:
+            for dp in downloaded_prefixes:
+                streamed.append(dp.timestamped_prefix)
+
+    assert streamed == PREFIXES[:2]
+    # checkpoints after the failed download are left for the next run
+    assert cpm.checkpoint_ts == PREFIXES[1].timestamp
+
+
+def test_stream_manager_early_exit_with_full_queue_stops_downloader(tmpdir):
+    cpm = FakeCheckpointManager(PREFIXES)
+    threads_before = threading.active_count()
+
+    with pytest.raises(ValueError):
+        with cpm.checkpoint_stream_manager(str(tmpdir), advance_checkpoint=True, prefetch=1) as downloaded_prefixes:
+            next(downloaded_prefixes)
+            # let the downloader fill the queue and block on it
+            while len(cpm.pulled) < 3:
+                time.sleep(0.01)
+            raise ValueError("processing failed")
+
+    # the downloader was unblocked and stopped before pulling the rest
+    assert cpm.pulled == PREFIXES[:3]
+    assert threading.active_count() == threads_before
+    assert cpm.checkpoint_ts == PREFIXES[0].timestamp
+
+
+def test_stream_manager_with_nothing_to_download(tmpdir):
+    cpm = FakeCheckpointManager([])
+
+    with cpm.checkpoint_stream_manager(str(tmpdir), advance_checkpoint=True) as downloaded_prefixes:
+        assert list(downloaded_prefixes) == []
+
+    assert cpm.checkpoint_ts is None
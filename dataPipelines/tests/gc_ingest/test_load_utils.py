@@ -0,0 +1,130 @@
+import datetime as dt
+import pytest
+import sqlalchemy
+from configuration.helpers import ConnectionHelper
+from dataPipelines.gc_ingest.config import Config
+from dataPipelines.gc_ingest.tools.load.utils import (
+    LoadManager, IngestableDocGroup, IngestableRawDoc, IngestableMetadataDoc, IngestableThumbnailDoc
+)
+from dataPipelines.gc_db_utils.orch.models import OrchReflectedBase, Publication, VersionedDoc
+from dataPipelines.gc_db_utils.orch.utils import init_db_bindings
+
+TS = dt.datetime(2021, 1, 1)
+
+
+@pytest.fixture
+def load_manager(monkeypatch, tmpdir):
+    ch = ConnectionHelper({'aws': {
+        'bucket_name': 'test-bucket',
+        'default_region': 'us-east-1',
+        'auth_type': 'key',
+        'access_key': 'testing',
+        'secret_key': 'testing',
+        'endpoint_type': 'aws',
+    }})
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmpdir / 'orch.db'}")
+    OrchReflectedBase.metadata.create_all(engine)
+    init_db_bindings(engine)
+    ch._orch_db_engine = engine
+    monkeypatch.setattr(ch, 'init_dbs', lambda *args, **kwargs: None)
+    monkeypatch.setattr(Config, 'connection_helper', ch)
+    yield LoadManager(load_archive_base_prefix="gamechanger/load-archive/", bucket_name='test-bucket')
+    engine.dispose()
+
+
+def make_doc(name, version_hash="v1"):
+    return {
+        'doc_name': name,
+        'doc_title': f"Title of {name}",
+        'doc_type': 'DoDI',
+        'doc_num': name.split()[-1],
+        'publication_date': '2020-01-01T00:00:00',
+        'version_hash': version_hash,
+    }
+
+
+def make_idg(tmpdir, doc):
+    raw_path = tmpdir / (doc['doc_name'] + '.pdf')
+    return IngestableDocGroup(
+        raw_idoc=IngestableRawDoc(local_path=raw_path, s3_path="raw/" + raw_path.basename),
+        metadata_idoc=IngestableMetadataDoc(local_path=str(raw_path) + '.metadata', metadata=doc),
+        thumbnail_idoc=IngestableThumbnailDoc(local_path=str(raw_path) + '.png')
+    )
+
+
+def get_pub_ids(session):
+    table = Publication.__table__
+    return dict(session.execute(sqlalchemy.select([table.c.name, table.c.id])).fetchall())
+
+
+def get_vdoc_rows(session):
+    table = VersionedDoc.__table__
+    return sorted(session.execute(
+        sqlalchemy.select([table.c.name, table.c.pub_id, table.c.version_hash, table.c.doc_location])
+    ).fetchall())
+
+
+def test_bulk_get_or_create_pub_ids(load_manager):
+    with Config.connection_helper.orch_db_session_scope('rw') as session:
+        existing_ids = Publication.insert_rows_ignore_existing(
+            rows=[Publication.row_from_document(make_doc("DoDI 1.01"))], session=session)
+        session.commit()
+
+    docs = {name: make_doc(name) for name in ["DoDI 1.01", "DoDI 1.02", "DoDI 1.03"]}
+    with Config.connection_helper.orch_db_session_scope('rw') as session:
+        pub_ids = load_manager._bulk_get_or_create_pub_ids(docs=docs, session=session)
+        session.commit()
+
+    assert set(pub_ids) == set(docs)
+    assert pub_ids["DoDI 1.01"] == existing_ids["DoDI 1.01"]
+    with Config.connection_helper.orch_db_session_scope('ro') as session:
+        assert get_pub_ids(session) == pub_ids
+
+
+def test_bulk_get_or_create_pub_ids_skips_missing_pubs(load_manager, monkeypatch):
+    # e.g. the pub row was deleted between the conflicting insert and the lookup
+    monkeypatch.setattr(Publication, 'insert_rows_ignore_existing', staticmethod(lambda rows, session: {}))
+    monkeypatch.setattr(Publication, 'get_ids_by_name', staticmethod(lambda names, session: {}))
+    with Config.connection_helper.orch_db_session_scope('rw') as session:
+        assert load_manager._bulk_get_or_create_pub_ids(docs={"DoDI 1.01": make_doc("DoDI 1.01")}, session=session) == {}
+
+
+def test_process_db_updates_bulk(load_manager, tmpdir):
+    load_manager.process_db_pub_updates([make_idg(tmpdir, make_doc("DoDI 1.01"))])
+
+    idgs = [
+        make_idg(tmpdir, make_doc("DoDI 1.01", version_hash="v2")),
+        make_idg(tmpdir, make_doc("DoDI 1.02")),
+        # duplicate pub in the same batch
+        make_idg(tmpdir, make_doc("DoDI 1.02", version_hash="v2")),
+    ]
+    load_manager.process_db_pub_updates(idgs)
+    load_manager.process_db_doc_updates(idgs, ts=TS)
+
+    with Config.connection_helper.orch_db_session_scope('ro') as session:
+        pub_ids = get_pub_ids(session)
+        assert set(pub_ids) == {"DoDI 1.01", "DoDI 1.02"}
+        assert get_vdoc_rows(session) == [
+            ("DoDI 1.01", pub_ids["DoDI 1.01"], "v2", "raw/DoDI 1.01.pdf"),
+            ("DoDI 1.02", pub_ids["DoDI 1.02"], "v1", "raw/DoDI 1.02.pdf"),
+            ("DoDI 1.02", pub_ids["DoDI 1.02"], "v2", "raw/DoDI 1.02.pdf"),
+        ]
+
+
+def test_process_db_doc_updates_bulk_skips_docs_without_pub(load_manager, tmpdir, monkeypatch):
+    monkeypatch.setattr(
+        LoadManager, '_bulk_get_or_create_pub_ids',
+        lambda self, docs, session: {name: 1 for name in docs if name != "DoDI 1.02"}
+    )
+    with Config.connection_helper.orch_db_session_scope('rw') as session:
+        Publication.insert_rows_ignore_existing(rows=[Publication.row_from_document(make_doc("DoDI 1.01"))],
+                                                session=session)
+        session.commit()
+
+    load_manager.process_db_doc_updates([
+        make_idg(tmpdir, make_doc("DoDI 1.01")),
+        make_idg(tmpdir, make_doc("DoDI 1.02")),
+    ], ts=TS)
+
+    with Config.connection_helper.orch_db_session_scope('ro') as session:
+        assert [row[0] for row in get_vdoc_rows(session)] == ["DoDI 1.01"]
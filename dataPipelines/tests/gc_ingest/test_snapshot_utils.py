@@ -0,0 +1,138 @@
+import datetime as dt
+import pytest
+from configuration.helpers import ConnectionHelper
+from dataPipelines.gc_ingest.config import Config
+from dataPipelines.gc_ingest.tools.snapshot.utils import SnapshotManager, SnapshotType
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "test-bucket"
+TS_1 = dt.datetime(2021, 1, 1)
+TS_2 = dt.datetime(2021, 1, 2)
+
+
+@pytest.fixture
+def snapshot_manager(monkeypatch):
+    ch = ConnectionHelper({'aws': {
+        'bucket_name': BUCKET,
+        'default_region': 'us-east-1',
+        'auth_type': 'key',
+        'access_key': 'testing',
+        'secret_key': 'testing',
+        'endpoint_type': 'aws',
+    }})
+    monkeypatch.setattr(ch, 'init_dbs', lambda *args, **kwargs: None)
+    monkeypatch.setattr(Config, 'connection_helper', ch)
+    monkeypatch.setattr(Config, 's3_bucket', BUCKET)
+    with moto.mock_aws():
+        ch.s3_client.create_bucket(Bucket=BUCKET)
+        yield SnapshotManager(
+            current_doc_snapshot_prefix="gamechanger/",
+            backup_doc_snapshot_prefix="gamechanger/backup/",
+            bucket_name=BUCKET
+        )
+
+
+def put_objects(manager, prefix, objects):
+    for key, body in objects.items():
+        manager.s3u.ch.s3_client.put_object(Bucket=BUCKET, Key=prefix + key, Body=body)
+    manager.s3u.listing_cache.clear()
+
+
+def get_objects(manager, prefix):
+    manager.s3u.listing_cache.clear()
+    return {
+        key[len(prefix):]: manager.s3u.ch.s3_client.get_object(Bucket=BUCKET, Key=key)['Body'].read()
+        for key in manager.s3u.iter_object_paths_at_prefix(prefix)
+    }
+
+
+def test_backup_and_restore_resumable_copy(snapshot_manager):
+    current_prefix = snapshot_manager.get_current_prefix(SnapshotType.RAW)
+    backed_up = {"a.pdf": b"a", "sub/b.pdf": b"b"}
+    put_objects(snapshot_manager, current_prefix, backed_up)
+
+    backup_prefix = snapshot_manager.backup_current_snapshot(SnapshotType.RAW, snapshot_ts=TS_1, max_threads=2)
+    # the copy manifest sits next to the backup prefix, it's not part of the backup
+    assert snapshot_manager.s3u.get_copy_manifest(backup_prefix)['complete']
+    assert get_objects(snapshot_manager, snapshot_manager.s3u.format_as_prefix(backup_prefix)) == backed_up
+    with pytest.raises(ValueError):
+        snapshot_manager.backup_current_snapshot(SnapshotType.RAW, snapshot_ts=TS_1)
+
+    put_objects(snapshot_manager, current_prefix, {"a.pdf": b"changed", "c.pdf": b"c"})
+    snapshot_manager.restore_current_snapshot(SnapshotType.RAW, snapshot_ts=TS_1, max_threads=2)
+
+    assert get_objects(snapshot_manager, current_prefix) == backed_up
+
+
+def test_restore_missing_or_incomplete_backup_keeps_current_snapshot(snapshot_manager):
+    current_prefix = snapshot_manager.get_current_prefix(SnapshotType.RAW)
+    current = {"a.pdf": b"a"}
+    put_objects(snapshot_manager, current_prefix, current)
+
+    with pytest.raises(ValueError):
+        snapshot_manager.restore_current_snapshot(SnapshotType.RAW, snapshot_ts=TS_1)
+
+    # interrupted backup, only the copy manifest and part of the objects got written
+    backup_prefix = snapshot_manager.get_backup_prefix_for_ts(SnapshotType.RAW, TS_1)
+    snapshot_manager.s3u.put_copy_manifest(backup_prefix, {'complete': False, 'objects': []})
+    with pytest.raises(ValueError):
+        snapshot_manager.restore_current_snapshot(SnapshotType.RAW, snapshot_ts=TS_1)
+
+    assert get_objects(snapshot_manager, current_prefix) == current
+
+
+def test_incremental_backups_chain_manifests(snapshot_manager):
+    current_prefix = snapshot_manager.get_current_prefix(SnapshotType.PARSED)
+    put_objects(snapshot_manager, current_prefix, {"a.json": b"a", "b.json": b"b"})
+    backup_1 = snapshot_manager.backup_current_snapshot_incremental(SnapshotType.PARSED, snapshot_ts=TS_1)
+
+    put_objects(snapshot_manager, current_prefix, {"b.json": b"changed", "c.json": b"c"})
+    backup_2 = snapshot_manager.backup_current_snapshot_incremental(SnapshotType.PARSED, snapshot_ts=TS_2)
+
+    manifest_1 = snapshot_manager.get_backup_manifest(SnapshotType.PARSED, TS_1)
+    manifest_2 = snapshot_manager.get_backup_manifest(SnapshotType.PARSED, TS_2)
+    assert manifest_1['base_timestamp'] is None
+    assert manifest_2['base_timestamp'] == manifest_1['timestamp']
+    assert snapshot_manager.get_latest_backup_manifest(SnapshotType.PARSED, before_ts=TS_2) == manifest_1
+
+    # unchanged objects point into the first backup, only changed ones were copied into the second
+    assert {k: v['Location'] for k, v in manifest_2['objects'].items()} == {
+        "a.json": backup_1 + "a.json",
+        "b.json": backup_2 + "b.json",
+        "c.json": backup_2 + "c.json",
+    }
+    assert get_objects(snapshot_manager, backup_1) == {"a.json": b"a", "b.json": b"b"}
+    assert get_objects(snapshot_manager, backup_2) == {"b.json": b"changed", "c.json": b"c"}
+
+    # manifests are next to the backup prefixes, not in them
+    with pytest.raises(ValueError):
+        snapshot_manager.backup_current_snapshot(SnapshotType.PARSED, snapshot_ts=TS_2)
+    with pytest.raises(ValueError):
+        snapshot_manager.backup_current_snapshot_incremental(SnapshotType.PARSED, snapshot_ts=TS_2)
+
+
+def test_incremental_backup_without_changes_has_only_a_manifest(snapshot_manager):
+    current_prefix = snapshot_manager.get_current_prefix(SnapshotType.PARSED)
+    put_objects(snapshot_manager, current_prefix, {"a.json": b"a"})
+    snapshot_manager.backup_current_snapshot_incremental(SnapshotType.PARSED, snapshot_ts=TS_1)
+    backup_2 = snapshot_manager.backup_current_snapshot_incremental(SnapshotType.PARSED, snapshot_ts=TS_2)
+
+    assert snapshot_manager.get_backup_manifest(SnapshotType.PARSED, TS_2)
+    assert not snapshot_manager.s3u.prefix_exists(backup_2)
+
+
+def test_restore_from_incremental_manifest(snapshot_manager):
+    current_prefix = snapshot_manager.get_current_prefix(SnapshotType.PARSED)
+    put_objects(snapshot_manager, current_prefix, {"a.json": b"a", "b.json": b"b"})
+    snapshot_manager.backup_current_snapshot_incremental(SnapshotType.PARSED, snapshot_ts=TS_1)
+    put_objects(snapshot_manager, current_prefix, {"b.json": b"changed", "c.json": b"c"})
+    snapshot_manager.backup_current_snapshot_incremental(SnapshotType.PARSED, snapshot_ts=TS_2)
+    backed_up = get_objects(snapshot_manager, current_prefix)
+
+    put_objects(snapshot_manager, current_prefix, {"a.json": b"changed", "d.json": b"d"})
+    snapshot_manager.restore_current_snapshot(SnapshotType.PARSED, snapshot_ts=TS_2, max_threads=2)
+    assert get_objects(snapshot_manager, current_prefix) == backed_up
+
+    snapshot_manager.restore_current_snapshot(SnapshotType.PARSED, snapshot_ts=TS_1, max_threads=2)
+    assert get_objects(snapshot_manager, current_prefix) == {"a.json": b"a", "b.json": b"b"}
@@ -0,0 +1,288 @@
+import json
+import os
+import queue
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("gamechangerml")
+
+from dataPipelines.gc_neo4j_publisher import neo4j_publisher
+from dataPipelines.gc_neo4j_publisher.neo4j_publisher import Neo4jPublisher
+
+VERIFIED_ENTITIES = ["Department of Defense", "Joint Staff", "DEPARTMENT OF DEFENSE", "Secretary of the Navy"]
+ALIASES = {"DoD": "Department of Defense", "SECNAV": "Secretary of the Navy"}
+
+
+@pytest.fixture
+def publisher(monkeypatch):
+    monkeypatch.setattr(neo4j_publisher, "get_all_entities_and_aliases", lambda: (VERIFIED_ENTITIES, ALIASES))
+    monkeypatch.setattr(neo4j_publisher, "get_abbcount_dict", lambda: {})
+    monkeypatch.setattr(neo4j_publisher, "expand_abbreviations_no_context", lambda ent, dic: [])
+    neo4j_publisher.process_ent.cache_clear()
+    yield Neo4jPublisher()
+    neo4j_publisher.process_ent.cache_clear()
+
+
+def write_parsed_json(tmpdir, name, **fields):
+    doc = dict(id=name + ".pdf_0", filename=name + ".pdf", paragraphs=[])
+    doc.update(fields)
+    with open(os.path.join(str(tmpdir), name + ".json"), "w") as f:
+        json.dump(doc, f)
+    return name + ".json"
+
+
+def test_build_verified_entities_index():
+    index = Neo4jPublisher._build_verified_entities_index(VERIFIED_ENTITIES + [float("nan"), None, "joint staff"])
+
+    # the first spelling of case-insensitive duplicates wins, non-string rows (empty csv cells) are skipped
+    assert index == {
+        "DEPARTMENT OF DEFENSE": "Department of Defense",
+        "JOINT STAFF": "Joint Staff",
+        "SECRETARY OF THE NAVY": "Secretary of the Navy",
+    }
+
+
+@pytest.mark.parametrize("ent,expected", [
+    ("Joint Staff", "Joint Staff"),
+    ("the Joint Staff", "Joint Staff"),
+    ("THE Joint Staff", "Joint Staff"),
+    ("This Joint Staff", "Joint Staff"),
+    ("A Joint Staff", "Joint Staff"),
+    ("Joint Staff.......12", "Joint Staff"),
+    ("Theory of Operations", "Theory of Operations"),
+])
+def test_process_ent(publisher, ent, expected):
+    assert neo4j_publisher.process_ent(ent) == expected
+
+
+def test_process_ent_expands_abbreviations(publisher, monkeypatch):
+    monkeypatch.setattr(neo4j_publisher, "expand_abbreviations_no_context",
+                        lambda ent, dic: ["Secretary of the Navy"] if ent == "SECNAV" else [])
+
+    assert neo4j_publisher.process_ent("the SECNAV") == "Secretary of the Navy"
+    assert neo4j_publisher.process_ent("Joint Staff") == "Joint Staff"
+
+
+@pytest.mark.parametrize("ent,expected", [
+    # verified entities match case-insensitively, the first spelling in the list is returned
+    ("Department of Defense", "Department of Defense"),
+    ("department of defense", "Department of Defense"),
+    ("DEPARTMENT OF DEFENSE", "Department of Defense"),
+    ("the Joint Staff", "Joint Staff"),
+    # aliases match exactly and resolve to their entity
+    ("DoD", "Department of Defense"),
+    ("the DoD", "Department of Defense"),
+    ("SECNAV", "Secretary of the Navy"),
+    ("dod", ""),
+    # crowdsourced entities are kept as is
+    ("Crowdsourced Org", "Crowdsourced Org"),
+    ("crowdsourced org", ""),
+    ("Unknown Org", ""),
+])
+def test_filter_ents(publisher, ent, expected):
+    publisher.crowdsourcedEnts.add("Crowdsourced Org")
+
+    assert publisher.filter_ents(ent) == expected
+
+
+def test_build_document_payload(publisher, tmpdir):
+    filename = write_parsed_json(
+        tmpdir, "DoDI 1000.01",
+        doc_type="DoDI",
+        title='The "Title"',
+        ref_list=["DoDI 1000.02", "Title 10's"],
+        keyw_5=["kéyword"],
+        publication_date_dt=None,
+        paragraphs=[
+            {"par_inc_count": 0, "orgs": {"ORG_s": ["the DoD", "Unknown Org"]}},
+            {"par_inc_count": 1, "orgs": {"ORG_s": ["Department of Defense"]}, "entities": {"ORG_s": ["Joint Staff"]}},
+        ],
+    )
+
+    payload = publisher.build_document_payload(os.path.join(str(tmpdir), filename))
+
+    assert payload["id"] == "DoDI 1000.01.pdf_0"
+    assert payload["doc_type"] == "DoDI"
+    assert payload["title"] == "The 'Title'"
+    assert payload["ref_list"] == ["DoDI 1000.02", 'Title 10"s']
+    assert payload["keyw_5"] == ["kyword"]
+    assert payload["publication_date_dt"] == ""
+    assert payload["page_count"] == 0
+    assert payload["orgs"] == {
+        "entityPars": {"Department of Defense": [0, 1]},
+        "entityCounts": {"Department of Defense": 2},
+    }
+    assert payload["entities"] == {"entityPars": {"Joint Staff": [1]}, "entityCounts": {"Joint Staff": 1}}
+    assert payload["roles"] == {"entityPars": {}, "entityCounts": {}}
+
+
+def test_load_documents_calls_procedure_once_per_doc_in_one_transaction(monkeypatch):
+    transactions = []
+    monkeypatch.setattr(neo4j_publisher, "process_write_queries", transactions.append)
+
+    Neo4jPublisher.load_documents([{"id": "a"}, {"id": "b"}])
+
+    assert transactions == [[
+        ("CALL policy.createDocumentNodesFromJson($doc)", {"doc": json.dumps({"id": "a"})}),
+        ("CALL policy.createDocumentNodesFromJson($doc)", {"doc": json.dumps({"id": "b"})}),
+    ]]
+
+
+class FakeTransaction:
+    def __init__(self, rows=None):
+        self.queries = []
+        self.rows = rows or []
+
+    def run(self, query, parameters=None):
+        self.queries.append((query, parameters))
+        return self
+
+    def consume(self):
+        return None
+
+    def data(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows=None):
+        self.transactions = []
+        self.rows = rows
+
+    def write_transaction(self, transaction_function):
+        tx = FakeTransaction(self.rows)
+        result = transaction_function(tx)
+        self.transactions.append(tx.queries)
+        return result
+
+    read_transaction = write_transaction
+
+
+def use_session(monkeypatch, session):
+    class FakeConnectionHelper:
+        @contextmanager
+        def neo4j_session_scope(self):
+            yield session
+
+    monkeypatch.setattr(neo4j_publisher.MainConfig, "connection_helper", FakeConnectionHelper())
+
+
+def test_process_write_queries_runs_all_queries_in_one_transaction(monkeypatch):
+    session = FakeSession()
+    use_session(monkeypatch, session)
+    queries = [("CALL policy.createDocumentNodesFromJson($doc)", {"doc": "{}"}), ("RETURN 1", None)]
+
+    neo4j_publisher.process_write_queries(queries)
+
+    assert session.transactions == [queries]
+
+
+def test_process_dir_batches_and_falls_back_to_single_docs(publisher, tmpdir, monkeypatch):
+    names = ["doc%i" % i for i in range(6)]
+    files = [write_parsed_json(tmpdir, name) for name in names] + ["not_json.txt", "bad.json"]
+    # unreadable json, its payload can't be built
+    with open(os.path.join(str(tmpdir), "bad.json"), "w") as f:
+        f.write("{")
+
+    transactions = []
+
+    def process_write_queries(queries):
+        doc_ids = [json.loads(parameters["doc"])["id"] for _, parameters in queries]
+        transactions.append(doc_ids)
+        if "doc3.pdf_0" in doc_ids:
+            raise ValueError("bad doc")
+
+    monkeypatch.setattr(neo4j_publisher, "process_write_queries", process_write_queries)
+    q = queue.Queue()
+
+    publisher.process_dir(files, str(tmpdir), q, max_threads=4, batch_size=3)
+
+    batches = [doc_ids for doc_ids in transactions if len(doc_ids) > 1]
+    single_docs = [doc_ids[0] for doc_ids in transactions if len(doc_ids) == 1]
+    assert sorted(doc_id for doc_ids in batches for doc_id in doc_ids) == [name + ".pdf_0" for name in names]
+    assert [len(doc_ids) for doc_ids in batches] == [3, 3]
+    # only the failed batch is retried, doc by doc, so its other docs still get loaded
+    failed_batch = next(doc_ids for doc_ids in batches if "doc3.pdf_0" in doc_ids)
+    assert sorted(single_docs) == sorted(failed_batch)
+    # one progress tick per json, loaded or not
+    assert q.qsize() == len(names) + 1
+
+
+def test_process_read_query_runs_in_read_transaction_and_raises(monkeypatch):
+    session = FakeSession(rows=[{"name": "Joint Staff"}])
+    use_session(monkeypatch, session)
+
+    assert neo4j_publisher.process_read_query("MATCH (n) RETURN n.name AS name") == [{"name": "Joint Staff"}]
+    assert session.transactions == [[("MATCH (n) RETURN n.name AS name", None)]]
+
+    # the driver gave up retrying
+    def read_transaction(transaction_function):
+        raise ConnectionError("neo4j is down")
+
+    session.read_transaction = read_transaction
+    with pytest.raises(ConnectionError):
+        neo4j_publisher.process_read_query("MATCH (n) RETURN n.name AS name")
+
+
+ENTITY_ROWS = [
+    {"name": "Department of Defense", "aliases": "DoD;DOD"},
+    {"name": "Secretary of Defense", "aliases": "SecDef"},
+    # the same alias on two nodes refers to both
+    {"name": "Department of the Navy", "aliases": "DON"},
+    {"name": "Navy Department", "aliases": "DON"},
+    {"name": "Joint Staff", "aliases": None},
+    {"name": None, "aliases": "orphan alias"},
+]
+
+
+def test_get_entity_lookup_resolves_names_and_aliases(monkeypatch):
+    monkeypatch.setattr(neo4j_publisher, "process_read_query", lambda query: ENTITY_ROWS)
+
+    lookup = Neo4jPublisher._get_entity_lookup()
+
+    assert dict(lookup) == {
+        "Department of Defense": {"Department of Defense"},
+        "DoD": {"Department of Defense"},
+        "DOD": {"Department of Defense"},
+        "Secretary of Defense": {"Secretary of Defense"},
+        "SecDef": {"Secretary of Defense"},
+        "Department of the Navy": {"Department of the Navy"},
+        "Navy Department": {"Navy Department"},
+        "DON": {"Department of the Navy", "Navy Department"},
+        "Joint Staff": {"Joint Staff"},
+    }
+
+
+def test_get_entity_lookup_raises_on_failed_read(monkeypatch):
+    def process_read_query(query):
+        raise ConnectionError("neo4j is down")
+
+    monkeypatch.setattr(neo4j_publisher, "process_read_query", process_read_query)
+
+    # a failed read must not look like an empty graph, every hierarchy node would be created again
+    with pytest.raises(ConnectionError):
+        Neo4jPublisher._get_entity_lookup()
+
+
+def test_ingest_hierarchy_information_links_nodes_through_aliases(publisher, monkeypatch):
+    hierarchy = {"SecDef": {"DoD": {"DON": {}}, "United States Constitution": {}}}
+    monkeypatch.setattr(neo4j_publisher, "get_hierarchy_json", lambda: hierarchy)
+    monkeypatch.setattr(Neo4jPublisher, "_ensure_entity_name_index", staticmethod(lambda: None))
+    monkeypatch.setattr(neo4j_publisher, "process_read_query", lambda query: ENTITY_ROWS)
+    write_queries = []
+    monkeypatch.setattr(neo4j_publisher, "process_write_query",
+                        lambda query, parameters: write_queries.append((query, parameters)))
+
+    publisher.ingest_hierarchy_information()
+
+    (create_query, created), (relate_query, related) = write_queries
+    assert create_query.startswith("UNWIND $names")
+    assert created == {"names": ["United States Constitution"]}
+    assert relate_query.startswith("UNWIND $rels")
+    assert sorted((rel["authority"], rel["subordinate"]) for rel in related["rels"]) == [
+        ("Department of Defense", "Department of the Navy"),
+        ("Department of Defense", "Navy Department"),
+        ("Secretary of Defense", "Department of Defense"),
+        ("Secretary of Defense", "United States Constitution"),
+    ]